@@ -1,20 +1,59 @@
 # app/agent/agent.py
+import asyncio
 import inspect
+import anyio
+import time
+import uuid
 from datetime import datetime, timezone
-from openai import OpenAI
 import json
 from app.models.conversation import Message
-from .config import OPENAI_API_KEY, MODEL_NAME
+from .config import (
+    MODEL_NAME,
+    MODEL_TIERS,
+    TOOL_CONCURRENCY,
+    TOOL_TIMEOUT_SECONDS,
+    AGENT_MAX_ITERATIONS,
+    AGENT_TURN_TIMEOUT_SECONDS,
+    FALLBACK_MESSAGES,
+    CONTEXT_SUMMARIZE,
+    CONTEXT_SUMMARY_MIN_MESSAGES,
+    CONTEXT_SUMMARY_MAX_TOKENS,
+    SPECULATIVE_RETRIEVAL,
+    SPECULATIVE_INJECT_TOP_K,
+    SPECULATIVE_INJECT_WAIT_SECONDS,
+)
+from .context import build_context, build_summary_request
+from .router import ModelRouter, get_model_router
+from .speculation import Speculation
+from app.models import ConversationSummary
+from app.config.knowledge_base import ANSWER_CACHE_ENABLED
+from app.services.answer_cache import answer_cache
+from app.services.embeddings import embed_query
 from app.services.conversation import ConversationService
+from app.services.deadline import (
+    DeadlineExceeded,
+    bounded_timeout,
+    deadline_scope,
+    remaining,
+)
+from app.services.resilience import resilient_openai
+from app.services.telemetry import agent_turns_aborted, record_usage, span
+from .tools.functions import format_search_results
 from .tools.tools import (
     get_tools,
     get_tool_schemas,
 )
-from typing import List, Tuple, Optional, Dict
+from typing import Any, AsyncIterator, List, Tuple, Optional, Dict
+from jiter import from_json
+from openai import NOT_GIVEN
 
 from pydantic import BaseModel
 
 
+# References to fire-and-forget tasks so they are not garbage collected mid-run
+_background_tasks = set()
+
+
 class OpenAIResponse(BaseModel):
     content: str
     show_to_user: bool
@@ -27,13 +66,31 @@ class Agent:
         conversation_id: str,
         conversation_service: ConversationService,
         tools: Dict[str, callable] = get_tools(),
+        router: ModelRouter = get_model_router(),
     ) -> None:
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
         self.system_prompt = system_prompt
         self.conversation_service = conversation_service
         self.tools = tools
+        self.router = router
         self.conversation_id = conversation_id
-        self.conversation = None
+        # Names the write-ahead journal of the messages not stored yet, apart
+        # from concurrent turns; a new one is started after every flush
+        self.journal_id = uuid.uuid4().hex
+        # Local view of the conversation history and the messages of the current
+        # turn that have not been written to MongoDB yet
+        self.messages: List[dict] = []
+        self.pending_messages: List[Message] = []
+        # Rolling summary of older messages and the oldest message in the last prompt
+        self.summary: Optional[dict] = None
+        self.first_included = 0
+        # State of the current turn used by the semantic answer cache
+        self.turn_started = 0.0
+        self.question_vector: Optional[List[float]] = None
+        self.referenced_docs = set()
+        # time.monotonic() by which the current turn must finish
+        self.deadline: Optional[float] = None
+        # Knowledge base search started speculatively for the current turn
+        self.speculation: Optional[Speculation] = None
 
     @classmethod
     async def create(
@@ -42,18 +99,44 @@ class Agent:
         conversation_id: str,
         conversation_service: ConversationService,
         tools: Dict[str, callable] = get_tools(),
+        router: ModelRouter = get_model_router(),
     ) -> "Agent":
         # Create the agent instance
-        instance = cls(system_prompt, conversation_id, conversation_service, tools)
-
-        # Now we can await the async method to get the conversation
-        instance.conversation = await conversation_service.get_conversation(
-            conversation_id
+        instance = cls(
+            system_prompt, conversation_id, conversation_service, tools, router
         )
 
+        # Load the conversation history once; the agent keeps it up to date locally
+        history = await conversation_service.get_history(conversation_id)
+        if history is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+        instance.messages = [
+            instance.__to_llm_message(message) for message in history["messages"]
+        ]
+        instance.summary = history["summary"]
+
         # Return the fully initialized instance
         return instance
 
+    @staticmethod
+    def __to_llm_message(message: dict) -> dict:
+        """
+        Reduces a stored message to the fields sent to the LLM.
+
+        Args:
+            message (dict): A stored message.
+
+        Returns:
+            dict: The message with role, content and, for function results, name.
+        """
+        if message.get("name"):
+            return {
+                "role": message["role"],
+                "content": message["content"],
+                "name": message["name"],
+            }
+        return {"role": message["role"], "content": message["content"]}
+
     async def __get_messages(self) -> List[dict]:
         """
         Retrieves the list of messages from the system prompt and memory.
@@ -61,27 +144,105 @@ class Agent:
         Returns:
             List of messages to send to the LLM (Large Language Model).
         """
-        # Retrieve the conversation from the conversation service
-        conversation_data = await self.conversation_service.get_conversation(
-            self.conversation_id
+        # The local view already holds the stored history plus this turn's
+        # messages, so there is no need to re-read the conversation. Only what
+        # fits the token budget is sent.
+        messages, self.first_included = build_context(
+            self.system_prompt["content"], self.messages, self.summary
         )
+        return messages
 
-        # Parse the conversation into a list of messages with role and content
-        messages = [
-            (
-                {
-                    "role": message["role"],
-                    "content": message["content"],
-                    "name": message["name"],
-                }
-                if "name" in message
-                else {"role": message["role"], "content": message["content"]}
+    def __schedule_summary(self) -> None:
+        """
+        Starts a background update of the rolling summary once enough messages
+        have fallen out of the prompt since it was last computed.
+        """
+        upto = self.summary["upto"] if self.summary else 0
+        if (
+            CONTEXT_SUMMARIZE
+            and not self.pending_messages
+            and self.first_included - upto >= CONTEXT_SUMMARY_MIN_MESSAGES
+        ):
+            task = asyncio.create_task(self.__summarize(upto, self.first_included))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+    async def __summarize(self, start: int, end: int) -> None:
+        """
+        Folds messages[start:end] into the rolling summary and stores it on the
+        conversation, so it is computed once rather than on every turn.
+
+        Args:
+            start (int): The first message not yet covered by the summary.
+            end (int): The first message still sent to the LLM verbatim.
+        """
+        try:
+            messages = build_summary_request(
+                self.summary["content"] if self.summary else None,
+                self.messages[start:end],
             )
-            for message in conversation_data["messages"]
-        ]
+            with span("llm", "summary"):
+                response = await resilient_openai.call(
+                    "summary",
+                    lambda client: client.chat.completions.create(
+                        model=MODEL_NAME,
+                        messages=messages,
+                        temperature=0,
+                        max_tokens=CONTEXT_SUMMARY_MAX_TOKENS,
+                    ),
+                )
+            record_usage(MODEL_NAME, response.usage)
+            summary = ConversationSummary(
+                content=response.choices[0].message.content, upto=end
+            )
+            await self.conversation_service.update_summary(
+                self.conversation_id, summary
+            )
+        except Exception as e:
+            print(f"Error summarizing conversation {self.conversation_id}: {e}")
+
+    async def __record(self, *message_objs: Message) -> None:
+        """
+        Adds messages to the local history view and the pending write buffer.
+        With a write-ahead journal configured they are also appended to it, so
+        they survive a crash before the buffer is flushed.
+
+        Args:
+            *message_objs (Message): The messages to record.
+        """
+        self.messages.extend(
+            self.__to_llm_message(message.model_dump()) for message in message_objs
+        )
+        self.pending_messages.extend(message_objs)
+        await self.conversation_service.journal_messages(
+            self.conversation_id, self.journal_id, list(message_objs)
+        )
+
+    async def flush(self) -> bool:
+        """
+        Writes all buffered messages to the conversation in a single update.
+        If the write fails the messages stay buffered (and journaled) for the
+        next flush.
 
-        # Include the system prompt as the starting message
-        return [{"role": "system", "content": self.system_prompt["content"]}] + messages
+        Returns:
+            bool: True if the buffer is empty afterwards, False otherwise.
+        """
+        if not self.pending_messages:
+            return True
+        stored = await self.conversation_service.store_messages(
+            self.conversation_id, self.pending_messages
+        )
+        if stored:
+            self.pending_messages = []
+            await self.conversation_service.clear_journal(
+                self.conversation_id, self.journal_id
+            )
+            self.journal_id = uuid.uuid4().hex
+        else:
+            print(
+                f"Error storing {len(self.pending_messages)} messages for conversation {self.conversation_id}"
+            )
+        return stored
 
     def __build_message(self, role: str, content: str, name: str = None) -> Message:
         """
@@ -101,11 +262,51 @@ class Agent:
             status="message_sent",
             name=name,
             timestamp=datetime.now(timezone.utc),
+            journal_id=self.journal_id,
         )
 
+    async def __complete(self, messages: List[dict], tier: str):
+        """
+        Makes one LLM call with the given model tier.
+
+        Args:
+            messages (List[dict]): The prompt.
+            tier (str): A key of MODEL_TIERS.
+
+        Returns:
+            The parsed chat completion.
+        """
+        model = MODEL_TIERS[tier]["model"]
+        timeout = bounded_timeout(None, self.deadline)
+        with span("llm", model):
+            # The SDK timeout applies per attempt; wait_for caps the retries,
+            # failovers and hedges too
+            response = await asyncio.wait_for(
+                resilient_openai.call(
+                    "chat",
+                    lambda client: client.beta.chat.completions.parse(
+                        model=model,
+                        messages=messages,
+                        temperature=0,
+                        max_tokens=MODEL_TIERS[tier]["max_tokens"],
+                        n=1,
+                        stop=None,
+                        tools=get_tool_schemas(),
+                        response_format=OpenAIResponse,
+                        logprobs=self.router.wants_logprobs(tier) or NOT_GIVEN,
+                        timeout=NOT_GIVEN if timeout is None else timeout,
+                    ),
+                ),
+                timeout,
+            )
+        record_usage(model, response.usage)
+        return response
+
     async def call_llm(self) -> Tuple[Optional[str], str]:
         """
         Calls the LLM (Large Language Model) API and processes the response.
+        The router picks the model tier; a call the router judges failed is
+        made once more with its escalation tier.
 
         Returns:
             - assistant_message: The assistant's message content or None.
@@ -113,16 +314,20 @@ class Agent:
         """
         try:
             # Send request to LLM with messages and tools
-            response = self.client.beta.chat.completions.parse(
-                model=MODEL_NAME,
-                messages=await self.__get_messages(),
-                temperature=0,
-                max_tokens=1000,
-                n=1,
-                stop=None,
-                tools=get_tool_schemas(),
-                response_format=OpenAIResponse,
-            )
+            messages = await self.__get_messages()
+            tier = self.router.route(self.messages)
+            while True:
+                response, error = None, None
+                try:
+                    response = await self.__complete(messages, tier)
+                except Exception as e:
+                    error = e
+                reason = self.router.escalation(tier, response, error)
+                if reason is None:
+                    break
+                tier = self.router.escalated(tier, reason)
+            if error is not None:
+                raise error
 
             assistant_message = response.choices[0].message.parsed
             message_type = "assistant"  # Default to assistant response
@@ -131,54 +336,7 @@ class Agent:
             tool_calls = response.choices[0].message.tool_calls
             if tool_calls:
                 message_type = "tools"  # If there are tool calls, it's a tool message
-                for tool_call in tool_calls:
-                    # Print tool call details for debugging
-                    print(f"Tool ID: {tool_call.id}")
-                    print(f"Tool Name: {tool_call.function.name}")
-                    print(f"Arguments: {tool_call.function.arguments}")
-
-                    # Process tool call arguments
-                    tool_name = tool_call.function.name
-                    args_str = (
-                        tool_call.function.arguments
-                    )  # String representing tool arguments
-                    try:
-                        args = json.loads(
-                            args_str
-                        )  # Parse the arguments string into a dictionary
-                    except json.JSONDecodeError:
-                        args = {}  # Default to empty dictionary if parsing fails
-                        print(
-                            f"Error parsing arguments for tool {tool_name}: {args_str}"
-                        )
-
-                    # Dynamically map arguments to the function's signature
-                    if isinstance(args, dict):
-                        func = self.tools.get(tool_name)
-                        if func:
-                            signature = inspect.signature(
-                                func
-                            )  # Get the function signature
-                            bound_args = signature.bind(
-                                **args
-                            )  # Bind arguments to the function signature
-                            bound_args.apply_defaults()  # Apply default values for missing arguments
-                            args = list(
-                                bound_args.arguments.values()
-                            )  # Convert to a list for function call
-
-                    # Execute the tool based on the mapped arguments
-                    result = await self.execute_tool(tool_name, args)
-                    print(f"Tool result: {result}")
-                    result_string = f"Tool result for {args_str}: {result}"
-
-                    # Send the tool result back to the model if it is a tool call
-                    await self.conversation_service.store_message(
-                        self.conversation_id,
-                        self.__build_message(
-                            "function", result_string, tool_call.function.name
-                        ),
-                    )
+                await self.__handle_tool_calls(tool_calls)
 
             return (
                 assistant_message,
@@ -189,6 +347,116 @@ class Agent:
             print(f"Error calling OpenAI API: {e}")
             return None, None  # Return None if an error occurs
 
+    def __bind_tool_args(self, tool_name: str, args_str: str) -> List:
+        """
+        Parses a tool call's JSON arguments and maps them onto the tool's signature.
+
+        Args:
+            tool_name (str): The name of the tool being called.
+            args_str (str): The JSON string of arguments from the model.
+
+        Returns:
+            List: Positional arguments for the tool function.
+        """
+        try:
+            args = json.loads(args_str)  # Parse the arguments string into a dictionary
+        except json.JSONDecodeError:
+            args = {}  # Default to empty dictionary if parsing fails
+            print(f"Error parsing arguments for tool {tool_name}: {args_str}")
+
+        # Dynamically map arguments to the function's signature
+        if isinstance(args, dict):
+            func = self.tools.get(tool_name)
+            if func:
+                signature = inspect.signature(func)  # Get the function signature
+                bound_args = signature.bind(
+                    **args
+                )  # Bind arguments to the function signature
+                bound_args.apply_defaults()  # Apply default values for missing arguments
+                args = list(
+                    bound_args.arguments.values()
+                )  # Convert to a list for function call
+        return args
+
+    async def __run_tool_call(self, tool_call, semaphore: asyncio.Semaphore) -> str:
+        """
+        Executes a single tool call, bounded by the per-turn semaphore and the
+        per-tool timeout.
+
+        Args:
+            tool_call: A tool call from the model's response.
+            semaphore (asyncio.Semaphore): Caps concurrent tool calls in this turn.
+
+        Returns:
+            str: The tool result string to send back to the model.
+        """
+        # Print tool call details for debugging
+        print(f"Tool ID: {tool_call.id}")
+        print(f"Tool Name: {tool_call.function.name}")
+        print(f"Arguments: {tool_call.function.arguments}")
+
+        tool_name = tool_call.function.name
+        args_str = tool_call.function.arguments
+        args = self.__bind_tool_args(tool_name, args_str)
+
+        # Execute the tool based on the mapped arguments
+        async with semaphore:
+            try:
+                timeout = bounded_timeout(TOOL_TIMEOUT_SECONDS, self.deadline)
+                # The deadline also bounds the embedding calls the tool makes
+                with span("tool", tool_name), deadline_scope(self.deadline):
+                    result = await asyncio.wait_for(
+                        self.__execute_or_reuse(tool_name, args, args_str), timeout
+                    )
+            except DeadlineExceeded:
+                result = (
+                    f"Error executing tool '{tool_name}': out of time for this request"
+                )
+            except asyncio.TimeoutError:
+                result = f"Error executing tool '{tool_name}': timed out after {timeout:.1f}s"
+        print(f"Tool result: {result}")
+        # Remember which API docs the answer is built from
+        for match in result if isinstance(result, list) else [result]:
+            if isinstance(match, dict) and "name" in match:
+                self.referenced_docs.add(match["name"])
+        return f"Tool result for {args_str}: {result}"
+
+    async def __handle_tool_calls(self, tool_calls: List) -> List[Tuple[Any, str]]:
+        """
+        Executes the tool calls requested by the model concurrently and records
+        their results in the order the model requested them.
+
+        Args:
+            tool_calls (List): The tool calls from the model's response.
+
+        Returns:
+            List[Tuple[Any, str]]: Each tool call paired with its result string.
+        """
+        semaphore = asyncio.Semaphore(TOOL_CONCURRENCY)
+        result_strings = await asyncio.gather(
+            *(self.__run_tool_call(tool_call, semaphore) for tool_call in tool_calls)
+        )
+
+        # Send the tool results back to the model
+        await self.__record(
+            *(
+                self.__build_message("function", result_string, tool_call.function.name)
+                for tool_call, result_string in zip(tool_calls, result_strings)
+            )
+        )
+        return list(zip(tool_calls, result_strings))
+
+    async def __execute_or_reuse(self, tool_name: str, args: List, args_str: str):
+        """
+        Serves a search_api call from the turn's speculative search when it
+        matches, and executes the tool otherwise.
+        """
+        if self.speculation is not None and tool_name == "search_api":
+            result = await self.speculation.serve(args_str)
+            if result is not None:
+                return result
+        return await self.execute_tool(tool_name, args)
+
     async def execute_tool(self, tool: str, args: List) -> str:
         """
         Executes the tool based on the provided name and arguments.
@@ -209,9 +477,131 @@ class Agent:
                 return f"Error executing tool '{tool}': {e}"
         return f"Tool '{tool}' not found."
 
+    async def __lookup_cached_answer(self, user_input: str) -> Optional[str]:
+        """
+        Looks up an answer to a similar question in the semantic answer cache.
+        Only the opening question of a conversation is looked up, since later
+        questions depend on the conversation so far.
+
+        Args:
+            user_input: The input message from the user.
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss.
+        """
+        self.turn_started = time.perf_counter()
+        self.question_vector = None
+        self.referenced_docs = set()
+        if not ANSWER_CACHE_ENABLED or any(
+            message["role"] == "user" for message in self.messages
+        ):
+            return None
+        try:
+            with deadline_scope(self.deadline):
+                self.question_vector = await embed_query(user_input)
+        except Exception as e:
+            print(f"Error embedding question for the answer cache: {e}")
+            return None
+        entry = answer_cache.lookup(self.question_vector)
+        return entry["answer"] if entry else None
+
+    def __cache_answer(self, user_input: str, answer: str) -> None:
+        """
+        Stores the answer to an opening question in the semantic answer cache.
+        """
+        if self.question_vector is not None:
+            answer_cache.store(
+                user_input,
+                self.question_vector,
+                answer,
+                self.referenced_docs,
+                time.perf_counter() - self.turn_started,
+            )
+
+    async def __speculate(self, user_input: str) -> None:
+        """
+        Starts a knowledge base search for the user's message so it runs
+        alongside the first LLM call. In "inject" mode its top matches are
+        added to the prompt as a search_api result before that call, if they
+        arrive within SPECULATIVE_INJECT_WAIT_SECONDS.
+
+        Args:
+            user_input: The input message from the user.
+        """
+        if SPECULATIVE_RETRIEVAL not in ("reuse", "inject"):
+            return
+        self.speculation = Speculation(user_input, SPECULATIVE_RETRIEVAL, self.deadline)
+        if SPECULATIVE_RETRIEVAL != "inject":
+            return
+        try:
+            matches = await asyncio.wait_for(
+                self.speculation.matches(),
+                bounded_timeout(SPECULATIVE_INJECT_WAIT_SECONDS, self.deadline),
+            )
+        except TimeoutError:
+            return
+        if not matches:
+            return
+        matches = matches[:SPECULATIVE_INJECT_TOP_K]
+        self.speculation.outcome = "injected"
+        self.referenced_docs.update(match["name"] for match in matches)
+        args_str = json.dumps(
+            {"query": user_input, "top_k": len(matches), "fields": None}
+        )
+        result = format_search_results(matches, len(matches))
+        await self.__record(
+            self.__build_message(
+                "function", f"Tool result for {args_str}: {result}", "search_api"
+            )
+        )
+
+    def __end_speculation(self) -> None:
+        if self.speculation is not None:
+            self.speculation.finish()
+            self.speculation = None
+
+    def __exhausted_budget(self, iterations: int) -> Optional[str]:
+        """
+        Checks the turn's budget before another LLM call.
+
+        Args:
+            iterations (int): The LLM calls made so far in this turn.
+
+        Returns:
+            Optional[str]: "deadline" or "max_iterations" if the turn must stop.
+        """
+        left = remaining(self.deadline)
+        if left is not None and left <= 0:
+            return "deadline"
+        if iterations >= AGENT_MAX_ITERATIONS:
+            return "max_iterations"
+        return None
+
+    async def __give_up(self, reason: str) -> str:
+        """
+        Ends a turn that ran out of budget or could not get a response from the
+        LLM with a fallback reply, recorded like any other answer.
+
+        Args:
+            reason (str): A key of FALLBACK_MESSAGES.
+
+        Returns:
+            str: The fallback reply.
+        """
+        if reason == "llm_error" and self.__exhausted_budget(0) == "deadline":
+            reason = "deadline"
+        content = FALLBACK_MESSAGES[reason]
+        agent_turns_aborted.inc(reason=reason)
+        print(f"Ending turn early in conversation {self.conversation_id}: {reason}")
+        await self.__record(self.__build_message("assistant", content))
+        return content
+
     async def interact(self, user_input: str) -> str:
         """
         Processes the user's input, interacts with the assistant, and manages tool calls.
+        The turn is bounded by AGENT_MAX_ITERATIONS LLM calls and
+        AGENT_TURN_TIMEOUT_SECONDS; when either runs out, or the LLM cannot be
+        reached, a fallback reply is returned instead.
 
         Args:
             user_input: The input message from the user.
@@ -219,25 +609,241 @@ class Agent:
         Returns:
             - The final assistant message or tool result.
         """
-        await self.conversation_service.store_message(
-            self.conversation_id, self.__build_message("user", user_input)
-        )
+        self.deadline = time.monotonic() + AGENT_TURN_TIMEOUT_SECONDS
+        cached_answer = await self.__lookup_cached_answer(user_input)
+        await self.__record(self.__build_message("user", user_input))
+
+        # Messages of this turn are buffered and written once when it ends
+        try:
+            if cached_answer is not None:
+                await self.__record(self.__build_message("assistant", cached_answer))
+                return cached_answer
+
+            await self.__speculate(user_input)
+            iterations = 0
+            while True:
+                reason = self.__exhausted_budget(iterations)
+                if reason:
+                    return await self.__give_up(reason)
+                iterations += 1
+                assistant_response, message_type = await self.call_llm()  # Call the LLM
+
+                if message_type is None or (
+                    message_type == "assistant" and assistant_response is None
+                ):
+                    return await self.__give_up("llm_error")
+                if message_type == "tools":
+                    # If it's a tool call, process it and send the result back to the model
+                    print(f"Processing tool call: {assistant_response}")
+                    # Store the tool result in memory (this is optional)
+                else:
+                    # If it's the assistant's final response, return it to the user
+                    print(f"Internal processing: {assistant_response}")
+                    await self.__record(
+                        self.__build_message("assistant", assistant_response.content)
+                    )
+                    if (
+                        assistant_response.show_to_user
+                    ):  # Only return the result if show_to_user is True
+                        self.__cache_answer(user_input, assistant_response.content)
+                        return assistant_response.content
+        finally:
+            self.__end_speculation()
+            # Shielded so a cancelled turn (e.g. the client went away) still
+            # stores what it recorded
+            with anyio.CancelScope(shield=True):
+                await self.flush()
+            self.__schedule_summary()
+
+    async def __stream_llm(self, tier: str) -> AsyncIterator[dict]:
+        """
+        Streams one LLM call, yielding token and tool_call events as they arrive
+        and, last, a completion event carrying the final ChatCompletion.
+
+        Args:
+            tier (str): A key of MODEL_TIERS.
+
+        Yields:
+            dict: Events with "event" and "data" keys.
+        """
+        streamed = ""
+        messages = await self.__get_messages()
+        model = MODEL_TIERS[tier]["model"]
+        timeout = bounded_timeout(None, self.deadline)
+        # A stream is not hedged or failed over mid-way, but its outcome still
+        # counts towards the endpoint's circuit breaker
+        with span("llm", model), resilient_openai.session("chat") as endpoint:
+            async with endpoint.client.beta.chat.completions.stream(
+                model=model,
+                messages=messages,
+                temperature=0,
+                max_tokens=MODEL_TIERS[tier]["max_tokens"],
+                n=1,
+                stop=None,
+                tools=get_tool_schemas(),
+                response_format=OpenAIResponse,
+                stream_options={"include_usage": True},
+                timeout=NOT_GIVEN if timeout is None else timeout,
+            ) as stream:
+                async for event in stream:
+                    # Raises DeadlineExceeded once the turn is out of time
+                    bounded_timeout(None, self.deadline)
+                    if event.type == "content.delta":
+                        # The content is JSON; parse the partial snapshot to get the
+                        # text of the "content" field generated so far
+                        partial = from_json(
+                            event.snapshot.encode(), partial_mode="trailing-strings"
+                        )
+                        content = (
+                            partial.get("content")
+                            if isinstance(partial, dict)
+                            else None
+                        )
+                        if isinstance(content, str) and len(content) > len(streamed):
+                            yield {
+                                "event": "token",
+                                "data": {"content": content[len(streamed) :]},
+                            }
+                            streamed = content
+                    elif event.type == "tool_calls.function.arguments.done":
+                        yield {
+                            "event": "tool_call",
+                            "data": {"name": event.name, "arguments": event.arguments},
+                        }
+                completion = await stream.get_final_completion()
+        record_usage(model, completion.usage)
+        yield {"event": "completion", "data": completion}
+
+    async def __stream_routed(self) -> AsyncIterator[dict]:
+        """
+        Streams one LLM call with the tier the router picks. If the router
+        judges the call failed it is streamed again with the escalation tier,
+        after a retry event telling the client to discard the tokens so far.
 
+        Yields:
+            dict: Events with "event" and "data" keys, the completion last.
+        """
+        tier = self.router.route(self.messages)
         while True:
-            assistant_response, message_type = await self.call_llm()  # Call the LLM
-
-            if message_type == "tools":
-                # If it's a tool call, process it and send the result back to the model
-                print(f"Processing tool call: {assistant_response}")
-                # Store the tool result in memory (this is optional)
-            else:
-                # If it's the assistant's final response, return it to the user
-                print(f"Internal processing: {assistant_response}")
-                await self.conversation_service.store_message(
-                    self.conversation_id,
-                    self.__build_message("assistant", assistant_response.content),
+            completion, error = None, None
+            try:
+                async for event in self.__stream_llm(tier):
+                    if event["event"] == "completion":
+                        completion = event["data"]
+                    else:
+                        yield event
+            except Exception as e:
+                error = e
+            reason = self.router.escalation(tier, completion, error)
+            if reason is None:
+                break
+            tier = self.router.escalated(tier, reason)
+            yield {"event": "retry", "data": {"reason": reason}}
+        if error is not None:
+            raise error
+        yield {"event": "completion", "data": completion}
+
+    async def interact_stream(self, user_input: str) -> AsyncIterator[dict]:
+        """
+        Streaming variant of interact. Yields events as the tool loop progresses
+        and as the assistant's answer is generated:
+
+        - tool_call: the model requested a tool ({"name", "arguments"})
+        - tool_result: a tool finished ({"id", "name"})
+        - token: a new piece of the assistant's content ({"content"})
+        - retry: the message is being regenerated by a stronger model; tokens
+          streamed since the last message should be discarded ({"reason"})
+        - message: a complete assistant message ({"content", "show_to_user"});
+          streamed tokens of a message with show_to_user false are internal
+          and should be discarded by the client
+        - done: the final answer shown to the user ({"content"})
+
+        Args:
+            user_input: The input message from the user.
+
+        Yields:
+            dict: Events with "event" and "data" keys.
+        """
+        self.deadline = time.monotonic() + AGENT_TURN_TIMEOUT_SECONDS
+        cached_answer = await self.__lookup_cached_answer(user_input)
+        await self.__record(self.__build_message("user", user_input))
+
+        # Messages of this turn are buffered and written once when it ends
+        try:
+            if cached_answer is not None:
+                await self.__record(self.__build_message("assistant", cached_answer))
+                await self.flush()
+                yield {
+                    "event": "message",
+                    "data": {"content": cached_answer, "show_to_user": True},
+                }
+                yield {"event": "done", "data": {"content": cached_answer}}
+                return
+
+            await self.__speculate(user_input)
+            iterations = 0
+            while True:
+                reason = self.__exhausted_budget(iterations)
+                message = None
+                if reason is None:
+                    iterations += 1
+                    try:
+                        async for event in self.__stream_routed():
+                            if event["event"] == "completion":
+                                message = event["data"].choices[0].message
+                            else:
+                                yield event
+                    except Exception as e:
+                        print(f"Error streaming from OpenAI API: {e}")
+                    if message is None or (
+                        not message.tool_calls and message.parsed is None
+                    ):
+                        reason = "llm_error"
+                if reason is not None:
+                    content = await self.__give_up(reason)
+                    yield {
+                        "event": "message",
+                        "data": {"content": content, "show_to_user": True},
+                    }
+                    yield {"event": "done", "data": {"content": content}}
+                    return
+
+                if message.tool_calls:
+                    results = await self.__handle_tool_calls(message.tool_calls)
+                    for tool_call, _ in results:
+                        yield {
+                            "event": "tool_result",
+                            "data": {
+                                "id": tool_call.id,
+                                "name": tool_call.function.name,
+                            },
+                        }
+                    continue
+
+                assistant_response = message.parsed
+                await self.__record(
+                    self.__build_message("assistant", assistant_response.content)
                 )
-                if (
-                    assistant_response.show_to_user
-                ):  # Only return the result if show_to_user is True
-                    return assistant_response.content
+                if assistant_response.show_to_user:
+                    await self.flush()
+                    self.__cache_answer(user_input, assistant_response.content)
+                yield {
+                    "event": "message",
+                    "data": {
+                        "content": assistant_response.content,
+                        "show_to_user": assistant_response.show_to_user,
+                    },
+                }
+                if assistant_response.show_to_user:
+                    yield {
+                        "event": "done",
+                        "data": {"content": assistant_response.content},
+                    }
+                    return
+        finally:
+            self.__end_speculation()
+            # Shielded so a cancelled turn (e.g. the client went away) still
+            # stores what it recorded
+            with anyio.CancelScope(shield=True):
+                await self.flush()
+            self.__schedule_summary()
@@ -14,6 +14,76 @@ if not OPENAI_API_KEY:
 
 # Model configuration
 MODEL_NAME = "gpt-4o-2024-08-06"  # Ensure you have access to this model
+MODEL_MAX_TOKENS = int(os.getenv("MODEL_MAX_TOKENS", "1000"))
+
+# Smaller, faster model the router may use for tool selection and short turns
+FAST_MODEL_NAME = os.getenv("FAST_MODEL_NAME", "gpt-4o-mini-2024-07-18")
+FAST_MODEL_MAX_TOKENS = int(os.getenv("FAST_MODEL_MAX_TOKENS", "600"))
+
+# Model tiers the router chooses between for each LLM call
+MODEL_TIERS = {
+    "fast": {"model": FAST_MODEL_NAME, "max_tokens": FAST_MODEL_MAX_TOKENS},
+    "full": {"model": MODEL_NAME, "max_tokens": MODEL_MAX_TOKENS},
+}
+
+# Routing policy: "static" sends every call to the full tier; "heuristic" sends
+# opening calls for simple messages to the fast tier and escalates to the full
+# tier when the fast tier fails to produce a valid response, or answers with a
+# mean token probability below MODEL_ROUTER_MIN_CONFIDENCE (0 disables)
+MODEL_ROUTER = os.getenv("MODEL_ROUTER", "static")
+MODEL_ROUTER_COMPLEXITY_THRESHOLD = float(
+    os.getenv("MODEL_ROUTER_COMPLEXITY_THRESHOLD", "1.0")
+)
+MODEL_ROUTER_MIN_CONFIDENCE = float(os.getenv("MODEL_ROUTER_MIN_CONFIDENCE", "0.7"))
+
+# Tool calls from one LLM turn run concurrently, at most TOOL_CONCURRENCY at a
+# time, and each is abandoned after TOOL_TIMEOUT_SECONDS
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+
+# Budget for one user turn: at most AGENT_MAX_ITERATIONS LLM calls and
+# AGENT_TURN_TIMEOUT_SECONDS of wall time, shared by the LLM, tool and embedding
+# calls it makes. A turn that runs out is answered with a fallback message.
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "6"))
+AGENT_TURN_TIMEOUT_SECONDS = float(os.getenv("AGENT_TURN_TIMEOUT_SECONDS", "60"))
+
+# Speculative retrieval: search the knowledge base for the user's message while
+# the first LLM call runs. "reuse" serves the model's search_api call from it when
+# the model's query shares at least SPECULATIVE_MIN_OVERLAP of its terms (Jaccard)
+# with the message; "inject" also adds the top SPECULATIVE_INJECT_TOP_K matches to
+# the prompt up front, waiting at most SPECULATIVE_INJECT_WAIT_SECONDS for them,
+# so the model can usually answer without a tool round trip. "off" disables it.
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "off")
+SPECULATIVE_MIN_OVERLAP = float(os.getenv("SPECULATIVE_MIN_OVERLAP", "0.5"))
+SPECULATIVE_INJECT_TOP_K = int(os.getenv("SPECULATIVE_INJECT_TOP_K", "3"))
+SPECULATIVE_INJECT_WAIT_SECONDS = float(
+    os.getenv("SPECULATIVE_INJECT_WAIT_SECONDS", "2")
+)
+
+# How often a non-streaming request checks whether its client has gone away
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+# Replies used when a turn is cut short
+FALLBACK_MESSAGES = {
+    "deadline": "Sorry, this is taking longer than expected. Please try again or rephrase your question.",
+    "max_iterations": "Sorry, I couldn't work out an answer to that. Could you rephrase or add more detail?",
+    "llm_error": "Sorry, I ran into a problem generating a response. Please try again in a moment.",
+}
+
+# Context window management: prompt token budget for the history, number of most
+# recent messages always kept, and the size tool results from earlier turns are
+# cut down to
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+CONTEXT_KEEP_RECENT_MESSAGES = int(os.getenv("CONTEXT_KEEP_RECENT_MESSAGES", "6"))
+CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS = int(
+    os.getenv("CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS", "300")
+)
+
+# Optional rolling summary of messages that no longer fit the budget, refreshed
+# once at least CONTEXT_SUMMARY_MIN_MESSAGES new messages have fallen out
+CONTEXT_SUMMARIZE = os.getenv("CONTEXT_SUMMARIZE", "false").lower() == "true"
+CONTEXT_SUMMARY_MIN_MESSAGES = int(os.getenv("CONTEXT_SUMMARY_MIN_MESSAGES", "8"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
 
 
 def generate_system_prompt() -> dict:
@@ -0,0 +1,181 @@
+# app/agent/context.py
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from .config import (
+    MODEL_NAME,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_KEEP_RECENT_MESSAGES,
+    CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS,
+)
+
+import tiktoken
+
+# Approximate per-message overhead of the chat format, in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """
+    Returns the tokenizer for MODEL_NAME, or None if its encoding files are
+    unavailable. Models tiktoken does not know use the o200k_base encoding.
+    """
+    try:
+        name = tiktoken.encoding_name_for_model(MODEL_NAME)
+    except KeyError:
+        name = "o200k_base"
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # The encoding files are downloaded on first use and may be unreachable
+        print(f"Error loading tokenizer, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens in a text with the model's tokenizer.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The number of tokens (estimated as 4 characters per token without the tokenizer).
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts a text down to at most max_tokens tokens, marking that it was elided.
+
+    Args:
+        text (str): The text to truncate.
+        max_tokens (int): The maximum number of tokens to keep.
+
+    Returns:
+        str: The text, truncated if it was longer than max_tokens.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        return text[: max_tokens * 4] + " ...[truncated]"
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + " ...[truncated]"
+
+
+def compact_message(message: dict) -> dict:
+    """
+    Shrinks a tool result from an earlier turn; the model has already used it.
+
+    Args:
+        message (dict): A history message.
+
+    Returns:
+        dict: The message, with function results truncated.
+    """
+    if message["role"] != "function":
+        return message
+    return {
+        **message,
+        "content": truncate_tokens(
+            message["content"], CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS
+        ),
+    }
+
+
+def build_context(
+    system_prompt: str,
+    messages: List[dict],
+    summary: Optional[dict] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[List[dict], int]:
+    """
+    Assembles the messages sent to the LLM within a token budget. The system
+    prompt, the current turn (from the last user message on) and the most
+    recent CONTEXT_KEEP_RECENT_MESSAGES messages are always kept; older
+    messages are added newest first, with their tool results compacted, until
+    the budget is spent. Messages covered by the rolling summary are replaced
+    by the summary.
+
+    Args:
+        system_prompt (str): The system prompt content.
+        messages (List[dict]): The full conversation history, oldest first.
+        summary (dict, optional): The rolling summary ({"content", "upto"}).
+        budget (int, optional): The token budget. Defaults to CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        Tuple[List[dict], int]: The messages to send and the index of the oldest
+        history message included.
+    """
+    head = [{"role": "system", "content": system_prompt}]
+    if summary:
+        head.append(
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary['content']}",
+            }
+        )
+    used = sum(count_message_tokens(message) for message in head)
+
+    last_user = max(
+        (i for i, message in enumerate(messages) if message["role"] == "user"),
+        default=0,
+    )
+    floor = summary["upto"] if summary else 0
+    selected = []
+    first_included = len(messages)
+    for i in range(len(messages) - 1, floor - 1, -1):
+        message = messages[i] if i >= last_user else compact_message(messages[i])
+        cost = count_message_tokens(message)
+        required = i >= last_user or len(messages) - i <= CONTEXT_KEEP_RECENT_MESSAGES
+        if not required and used + cost > budget:
+            break
+        used += cost
+        selected.append(message)
+        first_included = i
+
+    selected.reverse()
+    return head + selected, first_included
+
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a support conversation about the Crustdata APIs.
+Merge the previous summary with the new messages into one concise summary.
+Keep the user's goals, the API endpoints and parameters discussed, and any answers
+already given. Do not add anything that is not in the conversation.
+"""
+
+
+def build_summary_request(previous: Optional[str], messages: List[dict]) -> List[dict]:
+    """
+    Builds the LLM request that folds older messages into the rolling summary.
+
+    Args:
+        previous (str, optional): The current summary, if any.
+        messages (List[dict]): The messages to fold into it.
+
+    Returns:
+        List[dict]: The messages for the summarization call.
+    """
+    transcript = "\n".join(
+        f"{message['role']}: {compact_message(message)['content']}"
+        for message in messages
+    )
+    return [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {
+            "role": "user",
+            "content": f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}",
+        },
+    ]
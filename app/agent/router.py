@@ -0,0 +1,210 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+from openai import ContentFilterFinishReasonError, LengthFinishReasonError
+from pydantic import ValidationError
+from app.services.telemetry import Counter
+from .config import (
+    MODEL_ROUTER,
+    MODEL_ROUTER_COMPLEXITY_THRESHOLD,
+    MODEL_ROUTER_MIN_CONFIDENCE,
+)
+
+model_routes = Counter(
+    "model_routes_total",
+    "LLM calls by the model tier the router chose.",
+    ("router", "tier"),
+)
+model_escalations = Counter(
+    "model_escalations_total",
+    "LLM calls regenerated with a stronger tier, by reason.",
+    ("from_tier", "reason"),
+)
+
+# Errors that mean the model's output did not parse into the response format
+PARSE_ERRORS = (
+    ValidationError,
+    ValueError,
+    LengthFinishReasonError,
+    ContentFilterFinishReasonError,
+)
+
+# Features of a message that call for the full model, and their weights. A
+# message scoring MODEL_ROUTER_COMPLEXITY_THRESHOLD or more goes to the full tier.
+WORD_WEIGHT = 1 / 40
+EXTRA_QUESTION_WEIGHT = 0.3
+CODE_WEIGHT = 1.0
+REASONING_WEIGHT = 0.5
+CODE_PATTERN = re.compile(r"```|\bcurl\b|[{}\[\]]|https?://|Traceback")
+REASONING_PATTERN = re.compile(
+    r"\b(why|compare|difference|explain|debug|error|fail\w*|not working|"
+    r"instead|migrate|optimi[sz]e)\b",
+    re.IGNORECASE,
+)
+
+
+def complexity(text: str) -> float:
+    """
+    Scores how demanding a user message is, as a weighted sum of its length,
+    number of questions, code or payloads and reasoning cues.
+
+    Args:
+        text (str): The message.
+
+    Returns:
+        float: The score; greetings and short follow-ups score well below 1.
+    """
+    score = len(text.split()) * WORD_WEIGHT
+    score += max(text.count("?") - 1, 0) * EXTRA_QUESTION_WEIGHT
+    if CODE_PATTERN.search(text):
+        score += CODE_WEIGHT
+    if REASONING_PATTERN.search(text):
+        score += REASONING_WEIGHT
+    return score
+
+
+def confidence(response) -> float:
+    """
+    The mean per-token probability of a completion's content, or 1 when the
+    response carries no log probabilities.
+    """
+    logprobs = getattr(response.choices[0], "logprobs", None)
+    tokens = getattr(logprobs, "content", None) if logprobs else None
+    if not tokens:
+        return 1.0
+    return math.exp(sum(token.logprob for token in tokens) / len(tokens))
+
+
+class ModelRouter(ABC):
+    """
+    Chooses the model tier of each LLM call and decides when a call should be
+    regenerated with the escalation tier. Subclasses implement select().
+    """
+
+    name = "base"
+    escalation_tier = "full"
+
+    @abstractmethod
+    def select(self, messages: List[dict]) -> str:
+        """
+        Picks the tier for the next LLM call of a turn.
+
+        Args:
+            messages (List[dict]): The conversation so far, latest last.
+
+        Returns:
+            str: A key of MODEL_TIERS.
+        """
+
+    def route(self, messages: List[dict]) -> str:
+        """
+        Chooses the tier for the next LLM call of a turn.
+
+        Args:
+            messages (List[dict]): The conversation so far, latest last.
+
+        Returns:
+            str: A key of MODEL_TIERS.
+        """
+        tier = self.select(messages)
+        model_routes.inc(router=self.name, tier=tier)
+        return tier
+
+    def wants_logprobs(self, tier: str) -> bool:
+        return tier != self.escalation_tier and MODEL_ROUTER_MIN_CONFIDENCE > 0
+
+    def escalation(
+        self, tier: str, response=None, error: Optional[Exception] = None
+    ) -> Optional[str]:
+        """
+        Decides whether a call should be regenerated with the escalation tier.
+
+        Args:
+            tier (str): The tier that served the call.
+            response: The completion, if the call returned one.
+            error (Exception, optional): The error, if the call raised.
+
+        Returns:
+            Optional[str]: The reason to escalate, or None to keep the result.
+        """
+        if tier == self.escalation_tier:
+            return None
+        if error is not None:
+            # Out of time: a second, slower call would not help
+            if isinstance(error, TimeoutError):
+                return None
+            return "parse_failure" if isinstance(error, PARSE_ERRORS) else "error"
+        message = response.choices[0].message
+        if message.tool_calls:
+            return None
+        if message.parsed is None:
+            return "parse_failure"
+        if (
+            self.wants_logprobs(tier)
+            and confidence(response) < MODEL_ROUTER_MIN_CONFIDENCE
+        ):
+            return "low_confidence"
+        return None
+
+    def escalated(self, tier: str, reason: str) -> str:
+        """
+        Records an escalation and returns the tier to retry with.
+        """
+        model_escalations.inc(from_tier=tier, reason=reason)
+        print(f"Escalating LLM call from {tier} to {self.escalation_tier}: {reason}")
+        return self.escalation_tier
+
+
+class StaticRouter(ModelRouter):
+    """
+    Sends every call to the full tier.
+    """
+
+    name = "static"
+
+    def select(self, messages: List[dict]) -> str:
+        return "full"
+
+
+class HeuristicRouter(ModelRouter):
+    """
+    Sends the opening call of a turn to the fast tier when the user's message
+    is simple; that call mostly picks a tool or answers a greeting or short
+    follow-up. Calls that synthesize an answer from tool results, and demanding
+    messages, go to the full tier.
+    """
+
+    name = "heuristic"
+
+    def select(self, messages: List[dict]) -> str:
+        last = messages[-1] if messages else None
+        if last is None or last["role"] != "user":
+            return "full"
+        if complexity(str(last["content"])) >= MODEL_ROUTER_COMPLEXITY_THRESHOLD:
+            return "full"
+        return "fast"
+
+
+ROUTERS: Dict[str, Type[ModelRouter]] = {
+    "static": StaticRouter,
+    "heuristic": HeuristicRouter,
+}
+
+
+def get_model_router(name: str = MODEL_ROUTER) -> ModelRouter:
+    """
+    Builds a router by name. Other routers can be added to ROUTERS or passed to
+    the Agent directly.
+
+    Args:
+        name (str, optional): One of ROUTERS. Defaults to MODEL_ROUTER.
+
+    Returns:
+        ModelRouter: The router.
+    """
+    if name not in ROUTERS:
+        raise ValueError(
+            f"Unknown model router '{name}', expected one of {sorted(ROUTERS)}"
+        )
+    return ROUTERS[name]()
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+from app.services.deadline import deadline_scope
+from app.services.knowledge_base import SEARCH_FIELDS, search_api_doc
+from app.services.lexical_index import tokenize
+from app.services.telemetry import Counter, span
+from .config import SPECULATIVE_MIN_OVERLAP
+from .tools.functions import SEARCH_API_MAX_TOP_K, clamp_top_k, format_search_results
+
+speculative_retrievals = Counter(
+    "speculative_retrievals_total",
+    "Speculative knowledge base searches by outcome: injected into the prompt, "
+    "reused for the model's search_api call, missed (the model searched for "
+    "something else), unused (the model did not search) or failed.",
+    ("mode", "outcome"),
+)
+speculative_search_seconds = Counter(
+    "speculative_search_seconds_total",
+    "Time spent on speculative searches, by whether the result was used.",
+    ("mode", "outcome"),
+)
+
+
+def term_overlap(a: str, b: str) -> float:
+    """
+    Jaccard similarity of the search terms of two queries.
+
+    Args:
+        a (str): The first query.
+        b (str): The second query.
+
+    Returns:
+        float: Shared terms over all distinct terms, from 0 to 1.
+    """
+    terms_a, terms_b = set(tokenize(a)), set(tokenize(b))
+    if not terms_a or not terms_b:
+        return 0.0
+    return len(terms_a & terms_b) / len(terms_a | terms_b)
+
+
+class Speculation:
+    """
+    A knowledge base search for the user's raw message, started alongside the
+    turn's first LLM call so its result is ready if the model asks for it.
+    """
+
+    def __init__(self, query: str, mode: str, deadline: Optional[float]) -> None:
+        self.query = query
+        self.mode = mode
+        self.outcome: Optional[str] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.task = asyncio.ensure_future(self.__search(deadline))
+
+    async def __search(self, deadline: Optional[float]):
+        try:
+            with span("speculative_search", "search_api"), deadline_scope(deadline):
+                return await search_api_doc(self.query, SEARCH_API_MAX_TOP_K)
+        finally:
+            self.finished = time.perf_counter()
+
+    async def matches(self) -> Optional[List[Dict]]:
+        """
+        Waits for the speculative search.
+
+        Returns:
+            Optional[List[Dict]]: The matches, or None if the search failed.
+        """
+        try:
+            # Shielded so a caller timing out does not cancel it for later callers
+            result = await asyncio.shield(self.task)
+        except Exception as e:
+            print(f"Speculative search failed: {e}")
+            result = None
+        if not isinstance(result, list):
+            self.outcome = self.outcome or "failed"
+            return None
+        return result
+
+    async def serve(self, args_str: str):
+        """
+        Answers a search_api call from the speculative search when the model's
+        query is close enough to the user's message.
+
+        Args:
+            args_str (str): The tool call's JSON arguments.
+
+        Returns:
+            The search_api result, or None if the call must run normally.
+        """
+        try:
+            args = json.loads(args_str)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(args, dict):
+            return None
+        query, fields = args.get("query"), args.get("fields")
+        if not isinstance(query, str) or set(fields or []) - set(SEARCH_FIELDS):
+            return None
+        if term_overlap(query, self.query) < SPECULATIVE_MIN_OVERLAP:
+            self.outcome = self.outcome or "missed"
+            return None
+        matches = await self.matches()
+        if matches is None:
+            return None
+        self.outcome = "injected" if self.outcome == "injected" else "reused"
+        top_k = clamp_top_k(args.get("top_k"))
+        keep = {"_id", "name", *(fields or SEARCH_FIELDS)}
+        trimmed = [
+            {key: value for key, value in match.items() if key in keep}
+            for match in matches[:top_k]
+        ]
+        return format_search_results(trimmed, top_k)
+
+    def finish(self) -> None:
+        """
+        Cancels the search if it is still running and records its outcome and
+        the time spent on it.
+        """
+        if not self.task.done():
+            self.task.cancel()
+        outcome = self.outcome or "unused"
+        speculative_retrievals.inc(mode=self.mode, outcome=outcome)
+        seconds = (self.finished or time.perf_counter()) - self.started
+        used = outcome in ("injected", "reused")
+        speculative_search_seconds.inc(
+            seconds, mode=self.mode, outcome="used" if used else "wasted"
+        )
@@ -1,10 +1,40 @@
+from typing import Dict, List, Optional, Union
 from app.services.knowledge_base import search_api_doc
 
+# Matches returned when the model does not ask for a number, and the most it may ask for
+SEARCH_API_DEFAULT_TOP_K = 1
+SEARCH_API_MAX_TOP_K = 5
 
-async def search_api(query: str) -> str:
-    list_of_apis = await search_api_doc(query)
+
+def clamp_top_k(top_k: Optional[int]) -> int:
+    return min(max(top_k or SEARCH_API_DEFAULT_TOP_K, 1), SEARCH_API_MAX_TOP_K)
+
+
+def format_search_results(
+    list_of_apis: Union[List[Dict], Dict], top_k: int
+) -> Union[str, Dict, List[Dict]]:
+    """
+    Shapes knowledge base search results into the search_api tool's result.
+
+    Args:
+        list_of_apis (Union[List[Dict], Dict]): The matches, or an error dict.
+        top_k (int): The number of matches the model asked for.
+
+    Returns:
+        The single match when one was asked for, the list of matches otherwise,
+        or a message when there are none or the search failed.
+    """
+    if isinstance(list_of_apis, dict):
+        return f"Error searching APIs: {list_of_apis['error']}"
     if list_of_apis:
-        first_match_api = list_of_apis[0]
-        first_match_api.__delitem__("vector")
-        return first_match_api
+        # A single match keeps the shape the tool has always returned
+        return list_of_apis[0] if top_k == 1 else list_of_apis
     return "No matching API found."
+
+
+async def search_api(
+    query: str, top_k: Optional[int] = None, fields: Optional[List[str]] = None
+) -> str:
+    top_k = clamp_top_k(top_k)
+    list_of_apis = await search_api_doc(query, top_k, fields)
+    return format_search_results(list_of_apis, top_k)
@@ -4,8 +4,22 @@ search_api_schema = {
         "name": "search_api",
         "parameters": {
             "type": "object",
-            "properties": {"query": {"type": "string"}},
-            "required": ["query"],
+            "properties": {
+                "query": {"type": "string"},
+                "top_k": {
+                    "type": ["integer", "null"],
+                    "description": "Number of matching APIs to return (1-5). Defaults to 1.",
+                },
+                "fields": {
+                    "type": ["array", "null"],
+                    "items": {
+                        "type": "string",
+                        "enum": ["description", "data", "response"],
+                    },
+                    "description": "API doc fields to return besides the name. Defaults to all.",
+                },
+            },
+            "required": ["query", "top_k", "fields"],
             "additionalProperties": False,
         },
         "strict": True,
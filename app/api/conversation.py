@@ -1,6 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from typing import Awaitable, TypeVar
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.agent.config import DISCONNECT_POLL_SECONDS
 from app.dependencies import get_conversation_service, get_agent
 from app.agent.agent import Agent
+from app.services.admission import (
+    AdmissionRejected,
+    AdmissionTicket,
+    admission_controller,
+)
 from app.services.conversation import ConversationService
 from app.models import (
     StartConversationRequest,
@@ -10,6 +21,57 @@ from app.models import (
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+# Status logged for requests whose client went away (nginx's convention)
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Awaits a request's work while polling for the client disconnecting, and
+    cancels the work if it does so it stops consuming LLM calls and capacity.
+
+    Args:
+        request (Request): The incoming request.
+        awaitable (Awaitable): The work to run.
+
+    Returns:
+        The result of the work.
+
+    Raises:
+        ClientDisconnected: If the client went away first.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def admit(user_id: str) -> AdmissionTicket:
+    """
+    Admits an LLM-backed request, answering 429 if the user is over their rate
+    or token budget and 503 if the server is saturated.
+    """
+    try:
+        return await admission_controller.admit(user_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=e.detail, headers=e.headers
+        )
+
 
 # Start conversation endpoint using dependency injection
 @router.post("/start", response_model=dict)
@@ -36,14 +98,61 @@ async def start_conversation(
 @router.post("/send", response_model=SendMessageResponse)
 async def send_message(
     request: SendMessageRequest,
+    http_request: Request,
     agent: Agent = Depends(get_agent),
 ):
     """
     Sends a message in an ongoing conversation identified by conversation_id.
+    The turn is cancelled if the client disconnects before it completes.
     """
+    ticket = await admit(request.user_id)
     try:
         # Using agent to interact with the user
-        agent_response = await agent.interact(request.message)
+        async with ticket:
+            agent_response = await run_until_disconnected(
+                http_request, agent.interact(request.message)
+            )
         return SendMessageResponse(agent=agent_response)
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
+
+
+def format_sse(event: dict) -> str:
+    """
+    Formats an agent event as a Server-Sent Events frame.
+    """
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+@router.post("/send/stream")
+async def send_message_stream(
+    request: SendMessageRequest,
+    agent: Agent = Depends(get_agent),
+):
+    """
+    Sends a message and streams tool progress and the assistant's answer as
+    Server-Sent Events. The final assistant message is stored once complete.
+    If the client disconnects the stream, and with it the turn, is cancelled.
+    """
+    ticket = await admit(request.user_id)
+
+    async def event_stream():
+        try:
+            async for event in agent.interact_stream(request.message):
+                yield format_sse(event)
+        except Exception as e:
+            yield format_sse(
+                {"event": "error", "data": {"detail": f"Error sending message: {e}"}}
+            )
+        finally:
+            await ticket.release()
+
+    # The background task also releases the ticket if the stream never started
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
@@ -1,7 +1,12 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
-from app.models import ApiDoc, ApiDocInResponse, SuccessResponse
-from app.dependencies import get_insert_api_doc, get_search_api_doc
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from app.models import ApiDoc, ApiDocInResponse, SuccessResponse, BulkInsertResponse
+from app.dependencies import (
+    get_insert_api_doc,
+    get_bulk_insert_api_docs,
+    get_search_api_doc,
+)
+from app.services.knowledge_base import parse_api_docs
 
 router = APIRouter()
 
@@ -16,11 +21,40 @@ async def insert_api_doc_route(
     return SuccessResponse(status=True, message=result["message"])
 
 
-@router.post("/search", response_model=List[ApiDocInResponse])
+@router.post("/bulk_insert", response_model=BulkInsertResponse)
+async def bulk_insert_api_docs_route(
+    request: Request, bulk_insert_api_docs=Depends(get_bulk_insert_api_docs)
+):
+    """
+    Loads API docs sent as a JSON array or as JSON Lines (one ApiDoc per line).
+    Documents that fail validation are reported alongside the loaded ones.
+    """
+    body = (await request.body()).decode("utf-8")
+    api_docs, invalid = parse_api_docs(body)
+    if not api_docs and not invalid:
+        raise HTTPException(status_code=400, detail="No API docs in request body")
+
+    result = await bulk_insert_api_docs(api_docs)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    for failure in invalid:
+        result["items"].append({**failure, "status": "failed"})
+    result["failed"] += len(invalid)
+    return result
+
+
+@router.post(
+    "/search",
+    response_model=List[ApiDocInResponse],
+    response_model_exclude_unset=True,
+)
 async def search_api_doc_route(
-    description_query: str, search_api_doc=Depends(get_search_api_doc)
+    description_query: str,
+    top_k: int = Query(10, ge=1, le=100),
+    fields: Optional[List[Literal["description", "data", "response"]]] = Query(None),
+    search_api_doc=Depends(get_search_api_doc),
 ):
-    result = await search_api_doc(description_query)
+    result = await search_api_doc(description_query, top_k, fields)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
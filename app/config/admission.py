@@ -0,0 +1,31 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from the same .env file as the database config
+load_dotenv(dotenv_path="app/.env")
+
+# Agent turns (and so LLM calls) running at once in this worker, and how many
+# more may wait for a slot before requests are rejected with 503
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+
+# Longest a queued request waits for a slot before it is rejected with 503
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(
+    os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5")
+)
+
+# Per-user request rate: sustained messages per minute and burst size. 0 disables.
+USER_RATE_LIMIT_PER_MINUTE = float(os.getenv("USER_RATE_LIMIT_PER_MINUTE", "20"))
+USER_RATE_LIMIT_BURST = float(os.getenv("USER_RATE_LIMIT_BURST", "10"))
+
+# Per-user LLM token budget: sustained tokens per minute and burst size, charged
+# with the usage OpenAI reports once a turn ends. 0 disables.
+USER_TOKEN_BUDGET_PER_MINUTE = float(os.getenv("USER_TOKEN_BUDGET_PER_MINUTE", "60000"))
+USER_TOKEN_BUDGET_BURST = float(os.getenv("USER_TOKEN_BUDGET_BURST", "120000"))
+
+# Where the per-user buckets live: "memory" (per worker) or "mongo" (shared by
+# every worker). The shared store falls back to memory if MongoDB errors.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+# Users tracked by the in-memory bucket store before the least recent are dropped
+RATE_LIMIT_MAX_USERS = int(os.getenv("RATE_LIMIT_MAX_USERS", "10000"))
@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from the same .env file as the database config
+load_dotenv(dotenv_path="app/.env")
+
+# Directory for the write-ahead journal of buffered conversation messages.
+# When set, messages of an in-flight agent turn are appended here before being
+# written to MongoDB in one batch, and journals left by a crashed worker are
+# replayed on startup. Empty disables the journal.
+CONVERSATION_WAL_DIR = os.getenv("CONVERSATION_WAL_DIR", "")
+
+# Number of conversation histories kept in each worker's in-memory cache
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "1000"))
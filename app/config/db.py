@@ -14,6 +14,11 @@ MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB")
 MONGO_API_DOC_COLLECTION = os.getenv("MONGO_API_DOC_COLLECTION")
 MONGO_CONVERSATIONS_COLLECTION = os.getenv("MONGO_CONVERSATIONS_COLLECTION")
+MONGO_KB_META_COLLECTION = os.getenv("MONGO_KB_META_COLLECTION", "kb_meta")
+MONGO_EMBEDDING_CACHE_COLLECTION = os.getenv(
+    "MONGO_EMBEDDING_CACHE_COLLECTION", "embedding_cache"
+)
+MONGO_RATE_LIMIT_COLLECTION = os.getenv("MONGO_RATE_LIMIT_COLLECTION", "rate_limits")
 
 if (
     not MONGO_URI
@@ -30,3 +35,6 @@ client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
 db = client[MONGO_DB]
 api_doc_collection = db[MONGO_API_DOC_COLLECTION]
 conversations_collection = db[MONGO_CONVERSATIONS_COLLECTION]
+kb_meta_collection = db[MONGO_KB_META_COLLECTION]
+embedding_cache_collection = db[MONGO_EMBEDDING_CACHE_COLLECTION]
+rate_limit_collection = db[MONGO_RATE_LIMIT_COLLECTION]
@@ -0,0 +1,92 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from the same .env file as the database config
+load_dotenv(dotenv_path="app/.env")
+
+# Seconds between checks of the knowledge base version counter. Another worker
+# inserting a document bumps the counter and the in-memory index is reloaded.
+KB_INDEX_REFRESH_SECONDS = float(os.getenv("KB_INDEX_REFRESH_SECONDS", "5"))
+
+# Key of the version counter document in the knowledge base meta collection
+KB_VERSION_KEY = "api_doc_version"
+
+# Vector index backend: "exact" (brute force) or "ivf" (approximate, inverted file)
+KB_INDEX_BACKEND = os.getenv("KB_INDEX_BACKEND", "exact")
+
+# IVF tuning: number of k-means buckets (0 picks sqrt(N)) and buckets scanned per query
+KB_IVF_NLIST = int(os.getenv("KB_IVF_NLIST", "0"))
+KB_IVF_NPROBE = int(os.getenv("KB_IVF_NPROBE", "8"))
+
+# Optional on-disk index snapshot so workers skip rebuilding on boot
+KB_INDEX_SNAPSHOT_PATH = os.getenv("KB_INDEX_SNAPSHOT_PATH", "")
+
+# Optional memory-mapped index file shared by the workers on a host: one worker
+# builds it from MongoDB and the others map it read-only, so the vectors are held
+# in memory once. Inserts write a new version of the file and rename it into place.
+KB_INDEX_MMAP_PATH = os.getenv("KB_INDEX_MMAP_PATH", "")
+
+# Embedding model used for both stored document vectors and search queries, until
+# a re-embedding job (manage.py reembed) activates another one.
+# Documents inserted before the model was recorded used KB_LEGACY_EMBEDDING_MODEL.
+KB_EMBEDDING_MODEL = os.getenv("KB_EMBEDDING_MODEL", "text-embedding-3-small")
+KB_LEGACY_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Key of the meta document naming the active embedding model, and prefix of the
+# progress documents of re-embedding jobs
+KB_ACTIVE_MODEL_KEY = "active_embedding_model"
+KB_REEMBED_JOB_PREFIX = "reembed:"
+
+# Re-embedding jobs: documents per batch and the most texts embedded per minute,
+# so a migration does not starve live traffic of embedding quota (0: no limit)
+KB_REEMBED_BATCH_SIZE = int(os.getenv("KB_REEMBED_BATCH_SIZE", "100"))
+KB_REEMBED_TEXTS_PER_MINUTE = int(os.getenv("KB_REEMBED_TEXTS_PER_MINUTE", "3000"))
+
+# Query embedding cache: in-process LRU bounded by entry count, with a TTL, and an
+# optional MongoDB tier shared by every worker
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+EMBEDDING_CACHE_PERSISTENT = (
+    os.getenv("EMBEDDING_CACHE_PERSISTENT", "false").lower() == "true"
+)
+
+# Opt-in semantic answer cache: a first question whose embedding is at least
+# ANSWER_CACHE_THRESHOLD similar to an answered one reuses that answer
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# Bulk ingestion: descriptions per embeddings request and requests in flight
+KB_EMBED_BATCH_SIZE = int(os.getenv("KB_EMBED_BATCH_SIZE", "100"))
+KB_EMBED_CONCURRENCY = int(os.getenv("KB_EMBED_CONCURRENCY", "4"))
+
+# Multi-vector indexing: besides the description, each request parameter and
+# response section is embedded as its own chunk pointing back at the document.
+# Searches fetch KB_CHUNK_OVERFETCH chunks per requested document before
+# collapsing them to their best-scoring parents.
+KB_CHUNKING_ENABLED = os.getenv("KB_CHUNKING_ENABLED", "true").lower() == "true"
+KB_CHUNK_MAX_CHARS = int(os.getenv("KB_CHUNK_MAX_CHARS", "2000"))
+KB_CHUNK_OVERFETCH = int(os.getenv("KB_CHUNK_OVERFETCH", "4"))
+
+# Hybrid retrieval: BM25 keyword matches over names, descriptions and payload keys
+# are fused with vector matches (reciprocal rank fusion with constant KB_RRF_K).
+# A query that cannot be embedded within the timeout falls back to keywords only.
+KB_HYBRID_SEARCH = os.getenv("KB_HYBRID_SEARCH", "true").lower() == "true"
+KB_RRF_K = int(os.getenv("KB_RRF_K", "60"))
+KB_QUERY_EMBEDDING_TIMEOUT_SECONDS = float(
+    os.getenv("KB_QUERY_EMBEDDING_TIMEOUT_SECONDS", "3")
+)
+
+# Storage format of document vectors: "float32" (packed binary), "int8" (packed,
+# scalar-quantized with a per-vector scale) or "list" (an array of doubles, the
+# original format). Every format can be read regardless of this setting;
+# `python manage.py migrate-vectors` rewrites existing documents.
+KB_VECTOR_FORMAT = os.getenv("KB_VECTOR_FORMAT", "float32")
+
+# Candidates taken from each of the vector and keyword rankings before fusion,
+# when a search asks for fewer results than this
+KB_SEARCH_CANDIDATES = int(os.getenv("KB_SEARCH_CANDIDATES", "10"))
+
+# Coalesce concurrent identical query embeddings and searches onto one call
+KB_SINGLE_FLIGHT = os.getenv("KB_SINGLE_FLIGHT", "true").lower() == "true"
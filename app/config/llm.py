@@ -0,0 +1,54 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Shared OpenAI client settings. OPENAI_BASE_URL may point at a compatible
+# deployment or a local stub server (see benchmarks/fake_openai.py).
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Connection pool limits for the HTTP client behind the OpenAI client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+
+# Request timeouts (seconds) and automatic retries on connection errors, 429s and 5xx
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Failover: comma-separated OpenAI-compatible base URLs (deployments, regions or
+# proxies) tried in order when one errors or its circuit is open. Defaults to
+# OPENAI_BASE_URL alone.
+OPENAI_ENDPOINTS = [
+    url.strip() for url in os.getenv("OPENAI_ENDPOINTS", "").split(",") if url.strip()
+] or [OPENAI_BASE_URL]
+
+# Circuit breaker per endpoint: opens after this many consecutive failures and
+# lets a trial request through after the reset period
+OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))
+OPENAI_BREAKER_RESET_SECONDS = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+
+# Request hedging: for the listed operations ("chat", "embedding"), a duplicate
+# request is sent when the first has not answered within the given percentile of
+# recent latencies, and the first response wins. Empty disables hedging.
+OPENAI_HEDGE_OPERATIONS = {
+    name.strip()
+    for name in os.getenv("OPENAI_HEDGE_OPERATIONS", "").split(",")
+    if name.strip()
+}
+OPENAI_HEDGE_PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "95"))
+# Delay used until OPENAI_HEDGE_MIN_SAMPLES latencies have been seen, and the floor
+OPENAI_HEDGE_MIN_SAMPLES = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+OPENAI_HEDGE_DEFAULT_DELAY_SECONDS = float(
+    os.getenv("OPENAI_HEDGE_DEFAULT_DELAY_SECONDS", "2")
+)
+OPENAI_HEDGE_MIN_DELAY_SECONDS = float(
+    os.getenv("OPENAI_HEDGE_MIN_DELAY_SECONDS", "0.05")
+)
+# Hedges may add at most this share of extra requests, with a small burst allowance
+OPENAI_HEDGE_BUDGET_RATIO = float(os.getenv("OPENAI_HEDGE_BUDGET_RATIO", "0.1"))
+OPENAI_HEDGE_BUDGET_BURST = float(os.getenv("OPENAI_HEDGE_BUDGET_BURST", "10"))
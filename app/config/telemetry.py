@@ -0,0 +1,11 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from the same .env file as the database config
+load_dotenv(dotenv_path="app/.env")
+
+# Print one structured JSON line per HTTP request with its per-stage breakdown
+TELEMETRY_LOG_REQUESTS = os.getenv("TELEMETRY_LOG_REQUESTS", "true").lower() == "true"
+
+# Also print a line for every timed span (embedding, scoring, mongo, llm, tool)
+TELEMETRY_LOG_SPANS = os.getenv("TELEMETRY_LOG_SPANS", "false").lower() == "true"
@@ -1,6 +1,10 @@
 from app.services.conversation import ConversationService
-from fastapi import Depends
-from app.services.knowledge_base import insert_api_doc, search_api_doc
+from fastapi import Depends, HTTPException
+from app.services.knowledge_base import (
+    insert_api_doc,
+    bulk_insert_api_docs,
+    search_api_doc,
+)
 from app.config.db import db
 from app.agent.agent import Agent
 from app.agent.config import generate_system_prompt
@@ -17,6 +21,10 @@ def get_insert_api_doc():
     return insert_api_doc
 
 
+def get_bulk_insert_api_docs():
+    return bulk_insert_api_docs
+
+
 def get_search_api_doc():
     return search_api_doc
 
@@ -26,6 +34,9 @@ async def get_agent(
     request: SendMessageRequest,
     conversation_service: ConversationService = Depends(get_conversation_service),
 ):
-    return await Agent.create(
-        generate_system_prompt(), request.conversation_id, conversation_service
-    )
+    try:
+        return await Agent.create(
+            generate_system_prompt(), request.conversation_id, conversation_service
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
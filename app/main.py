@@ -1,9 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import conversation, knowledge_base
+from app.api import conversation, knowledge_base, metrics
+from app.agent.context import get_encoding
+from app.config.db import db
+from app.services.admission import ensure_rate_limit_indexes
+from app.services.conversation import ConversationService
+from app.services.embeddings import ensure_embedding_cache_indexes
+from app.services.knowledge_base import load_index
+from app.services.openai_client import init_openai_client, close_openai_client
+from app.services.telemetry import TelemetryMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled OpenAI client is shared by every request in this process
+    init_openai_client()
+    # The tokenizer may download its encoding on first use; do it before serving
+    get_encoding()
+    # Load the API doc vectors into memory before serving searches
+    await load_index()
+    await ensure_embedding_cache_indexes()
+    await ensure_rate_limit_indexes()
+    # Store messages journaled by workers that died mid-turn
+    replayed = await ConversationService(db).replay_journal()
+    if replayed:
+        print(f"Replayed {replayed} journaled conversation messages.")
+    yield
+    await close_openai_client()
+
 
 # Initialize FastAPI app
-app = FastAPI(title="Crust Data Support Agent")
+app = FastAPI(title="Crust Data Support Agent", lifespan=lifespan)
 
 # Allow CORS for all origins or specify the allowed origins (e.g., ["http://localhost:3000"])
 app.add_middleware(
@@ -15,9 +43,12 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allows all headers
 )
+# Trace ids, request latency and per-stage timing for every request
+app.add_middleware(TelemetryMiddleware)
 
 # Include routes
 app.include_router(conversation.router)
 app.include_router(
     knowledge_base.router, prefix="/knowledge_base", tags=["Knowledge Base"]
 )
+app.include_router(metrics.router, tags=["Metrics"])
@@ -1,10 +1,17 @@
-from .conversation import Conversation, Message
+from .conversation import Conversation, ConversationSummary, Message
 from .knowledge_base import ApiDoc
 from .requests import StartConversationRequest, SendMessageRequest
-from .responses import SuccessResponse, ApiDocInResponse, SendMessageResponse
+from .responses import (
+    SuccessResponse,
+    ApiDocInResponse,
+    SendMessageResponse,
+    BulkInsertItem,
+    BulkInsertResponse,
+)
 
 __all__ = [
     "Conversation",
+    "ConversationSummary",
     "Message",
     "ApiDoc",
     "StartConversationRequest",
@@ -12,4 +19,6 @@ __all__ = [
     "SuccessResponse",
     "ApiDocInResponse",
     "SendMessageResponse",
+    "BulkInsertItem",
+    "BulkInsertResponse",
 ]
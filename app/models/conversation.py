@@ -9,9 +9,17 @@ class Message(BaseModel):
     status: str
     name: str | None = None
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    journal_id: str | None = None  # Write-ahead journal the message was stored from
+
+
+class ConversationSummary(BaseModel):
+    content: str
+    upto: int  # Number of leading messages the summary covers
 
 
 class Conversation(BaseModel):
     user_id: str
     status: str
     messages: List[Message] = []
+    version: int = 0
+    summary: ConversationSummary | None = None
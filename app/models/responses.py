@@ -1,12 +1,13 @@
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, List, Optional
 
 
 class ApiDocInResponse(BaseModel):
+    # Only name is always present; searches may ask for a subset of the rest
     name: str
-    description: str
-    data: Any
-    response: Any
+    description: Optional[str] = None
+    data: Any = None
+    response: Any = None
 
 
 class SuccessResponse(BaseModel):
@@ -16,3 +17,19 @@ class SuccessResponse(BaseModel):
 
 class SendMessageResponse(BaseModel):
     agent: str
+
+
+class BulkInsertItem(BaseModel):
+    name: Optional[str] = None
+    item: Optional[int] = None
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkInsertResponse(BaseModel):
+    inserted: int
+    updated: int
+    unchanged: int
+    failed: int
+    items: List[BulkInsertItem]
@@ -0,0 +1,323 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from pymongo import ReturnDocument
+from app.config.admission import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_USERS,
+    USER_RATE_LIMIT_BURST,
+    USER_RATE_LIMIT_PER_MINUTE,
+    USER_TOKEN_BUDGET_BURST,
+    USER_TOKEN_BUDGET_PER_MINUTE,
+)
+from app.config.db import rate_limit_collection
+from app.services.telemetry import Counter, Histogram, request_stats_var
+
+# Idle buckets are full again long before this, so MongoDB may expire them
+BUCKET_TTL_SECONDS = 3600
+
+admission_decisions = Counter(
+    "admission_decisions_total",
+    "Admission decisions for LLM-backed requests, by result.",
+    ("result",),
+)
+admission_wait_seconds = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests waited in the queue for an in-flight slot.",
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted. Carries the HTTP status to answer
+    with and how long the client should wait before retrying.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class MemoryBucketStore:
+    """
+    Token buckets kept in this worker, least recently used users dropped first.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_USERS) -> None:
+        self.max_keys = max_keys
+        # key -> [tokens, monotonic time of the last update]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def update(
+        self, key: str, capacity: float, rate: float, require: float, cost: float
+    ) -> Tuple[bool, float]:
+        """
+        Refills a bucket for the time since its last update, then takes cost
+        from it if it holds at least require.
+
+        Args:
+            key (str): The bucket key.
+            capacity (float): The most the bucket holds.
+            rate (float): Refill rate per second.
+            require (float): The balance needed to be granted.
+            cost (float): What a grant takes; may leave the balance negative.
+
+        Returns:
+            Tuple[bool, float]: Whether it was granted and the balance after.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None) or [capacity, now]
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        granted = tokens >= require
+        if granted:
+            tokens -= cost
+        self._buckets[key] = [tokens, now]
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return granted, tokens
+
+
+class MongoBucketStore:
+    """
+    Token buckets shared by every worker, each refilled and debited atomically
+    with a single pipeline update. Falls back to a local store when MongoDB
+    errors, so a database hiccup does not block or reject every request.
+    """
+
+    def __init__(self, collection, fallback: MemoryBucketStore) -> None:
+        self.collection = collection
+        self.fallback = fallback
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index(
+            "updated_at", expireAfterSeconds=BUCKET_TTL_SECONDS
+        )
+
+    async def update(
+        self, key: str, capacity: float, rate: float, require: float, cost: float
+    ) -> Tuple[bool, float]:
+        now = datetime.now(timezone.utc)
+        elapsed = {
+            "$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]
+        }
+        refilled = {
+            "$min": [
+                capacity,
+                {
+                    "$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [elapsed, rate]},
+                    ]
+                },
+            ]
+        }
+        pipeline = [
+            {"$set": {"tokens": refilled, "updated_at": now}},
+            {"$set": {"granted": {"$gte": ["$tokens", require]}}},
+            {
+                "$set": {
+                    "tokens": {
+                        "$cond": [
+                            "$granted",
+                            {"$subtract": ["$tokens", cost]},
+                            "$tokens",
+                        ]
+                    }
+                }
+            },
+        ]
+        try:
+            bucket = await self.collection.find_one_and_update(
+                {"_id": key},
+                pipeline,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            print(f"Error updating shared rate limit bucket {key}: {e}")
+            return await self.fallback.update(key, capacity, rate, require, cost)
+        return bool(bucket["granted"]), float(bucket["tokens"])
+
+
+class AdmissionTicket:
+    """
+    An admitted request's hold on an in-flight slot. Releasing it frees the
+    slot and charges the user's token budget with the tokens the request used.
+    Release is idempotent so it can be called from more than one cleanup path.
+    """
+
+    def __init__(self, controller: "AdmissionController", user_id: str) -> None:
+        self.controller = controller
+        self.user_id = user_id
+        self.stats = request_stats_var.get()
+        self.released = False
+
+    def tokens_used(self) -> int:
+        if self.stats is None:
+            return 0
+        return sum(self.stats["tokens"].values())
+
+    async def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        self.controller.release_slot()
+        await self.controller.charge_tokens(self.user_id, self.tokens_used())
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.release()
+
+
+class AdmissionController:
+    """
+    Decides whether an LLM-backed request runs now, waits or is turned away:
+    users over their request rate or token budget get a fast 429, and once
+    every in-flight slot is taken requests queue up to a bounded depth and
+    time, beyond which they get a 503.
+    """
+
+    def __init__(
+        self,
+        store,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ) -> None:
+        self.store = store
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    async def check_user(self, user_id: str) -> None:
+        """
+        Takes one request from the user's rate bucket and checks that their
+        token budget is not overdrawn.
+
+        Raises:
+            AdmissionRejected: With status 429 if either is exhausted.
+        """
+        if USER_RATE_LIMIT_PER_MINUTE > 0:
+            rate = USER_RATE_LIMIT_PER_MINUTE / 60
+            granted, tokens = await self.store.update(
+                f"requests:{user_id}", USER_RATE_LIMIT_BURST, rate, 1, 1
+            )
+            if not granted:
+                admission_decisions.inc(result="rate_limited")
+                raise AdmissionRejected(
+                    429, "Too many messages; slow down.", (1 - tokens) / rate
+                )
+        if USER_TOKEN_BUDGET_PER_MINUTE > 0:
+            rate = USER_TOKEN_BUDGET_PER_MINUTE / 60
+            # Usage is only known afterwards, so a turn is admitted while the
+            # budget is positive and its tokens are charged when it ends
+            granted, tokens = await self.store.update(
+                f"tokens:{user_id}", USER_TOKEN_BUDGET_BURST, rate, 1, 0
+            )
+            if not granted:
+                admission_decisions.inc(result="token_budget")
+                raise AdmissionRejected(
+                    429, "Token budget exhausted; try again later.", (1 - tokens) / rate
+                )
+
+    async def acquire_slot(self) -> None:
+        """
+        Takes an in-flight slot, queueing for one if all are taken.
+
+        Raises:
+            AdmissionRejected: With status 503 if the queue is full or the wait
+                times out.
+        """
+        if self.in_flight >= self.max_in_flight and self.waiting >= self.max_queue:
+            admission_decisions.inc(result="queue_full")
+            raise AdmissionRejected(
+                503, "Server is busy; try again shortly.", self.queue_timeout
+            )
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            admission_decisions.inc(result="queue_timeout")
+            raise AdmissionRejected(
+                503, "Server is busy; try again shortly.", self.queue_timeout
+            )
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        admission_wait_seconds.observe(time.perf_counter() - start)
+
+    def release_slot(self) -> None:
+        self.in_flight -= 1
+        self.slots.release()
+
+    async def charge_tokens(self, user_id: str, tokens: int) -> None:
+        if USER_TOKEN_BUDGET_PER_MINUTE <= 0 or not tokens:
+            return
+        await self.store.update(
+            f"tokens:{user_id}",
+            USER_TOKEN_BUDGET_BURST,
+            USER_TOKEN_BUDGET_PER_MINUTE / 60,
+            -math.inf,
+            tokens,
+        )
+
+    async def admit(self, user_id: str) -> AdmissionTicket:
+        """
+        Admits a request from a user, waiting for an in-flight slot if needed.
+        The caller must release the returned ticket when the request ends.
+
+        Args:
+            user_id (str): The user sending the request.
+
+        Returns:
+            AdmissionTicket: The admitted request's ticket.
+
+        Raises:
+            AdmissionRejected: If the request is turned away.
+        """
+        await self.check_user(user_id)
+        await self.acquire_slot()
+        admission_decisions.inc(result="admitted")
+        return AdmissionTicket(self, user_id)
+
+
+memory_bucket_store = MemoryBucketStore()
+bucket_store = (
+    MongoBucketStore(rate_limit_collection, memory_bucket_store)
+    if RATE_LIMIT_BACKEND == "mongo"
+    else memory_bucket_store
+)
+admission_controller = AdmissionController(bucket_store)
+
+
+async def ensure_rate_limit_indexes() -> None:
+    """
+    Creates the TTL index that expires idle buckets in the shared store.
+    """
+    if isinstance(bucket_store, MongoBucketStore):
+        await bucket_store.ensure_indexes()
@@ -0,0 +1,149 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence
+from app.config.knowledge_base import (
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL_SECONDS,
+)
+from app.services.telemetry import (
+    answer_cache_invalidations,
+    answer_cache_lookups,
+    answer_cache_saved_seconds,
+)
+from app.services.vector_index import ExactIndex
+
+
+class AnswerCache:
+    """
+    Per-process semantic cache of answers to support questions.
+
+    Questions are matched by embedding similarity using the same vector index
+    as the knowledge base. Each entry remembers the API docs its answer was
+    built from, so changing one of those docs invalidates the answer.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, threshold: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.index = ExactIndex()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, question_vector: Sequence[float]) -> Optional[dict]:
+        """
+        Finds a cached answer to a sufficiently similar question.
+
+        Args:
+            question_vector (Sequence[float]): The embedding of the new question.
+
+        Returns:
+            Optional[dict]: The cache entry ("question", "answer", "doc_names",
+            "latency", "score"), or None on a miss.
+        """
+        for key, score in self.index.search(question_vector, 1):
+            entry = self._entries[key]
+            if entry["expires_at"] < time.monotonic():
+                self._remove([key])
+            elif score >= self.threshold:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry["latency"]
+                answer_cache_lookups.inc(result="hit")
+                answer_cache_saved_seconds.inc(entry["latency"])
+                return {**entry, "score": score}
+        self.misses += 1
+        answer_cache_lookups.inc(result="miss")
+        return None
+
+    def store(
+        self,
+        question: str,
+        question_vector: Sequence[float],
+        answer: str,
+        doc_names: Iterable[str],
+        latency: float,
+    ) -> None:
+        """
+        Caches an answer, evicting the least recently used entries beyond max_size.
+
+        Args:
+            question (str): The question that was answered.
+            question_vector (Sequence[float]): The question's embedding.
+            answer (str): The answer shown to the user.
+            doc_names (Iterable[str]): Names of the API docs the answer used.
+            latency (float): Seconds it took to produce the answer.
+        """
+        key = uuid.uuid4().hex
+        self._entries[key] = {
+            "question": question,
+            "answer": answer,
+            "doc_names": set(doc_names),
+            "latency": latency,
+            "expires_at": time.monotonic() + self.ttl_seconds,
+        }
+        self.index.add(key, question_vector)
+        if len(self._entries) > self.max_size:
+            overflow = len(self._entries) - self.max_size
+            self._remove(list(self._entries)[:overflow])
+
+    def invalidate_docs(self, doc_names: Iterable[str]) -> int:
+        """
+        Drops every answer built from any of the given API docs.
+
+        Args:
+            doc_names (Iterable[str]): Names of API docs that changed.
+
+        Returns:
+            int: The number of answers dropped.
+        """
+        names = set(doc_names)
+        stale = [
+            key for key, entry in self._entries.items() if entry["doc_names"] & names
+        ]
+        self._remove(stale)
+        self.invalidations += len(stale)
+        answer_cache_invalidations.inc(len(stale), reason="doc_changed")
+        return len(stale)
+
+    def clear(self) -> None:
+        """
+        Drops every answer, e.g. when another worker changed the knowledge base.
+        """
+        self.invalidations += len(self._entries)
+        answer_cache_invalidations.inc(len(self._entries), reason="cleared")
+        self._entries.clear()
+        self.index = ExactIndex()
+
+    def _remove(self, keys: List[str]) -> None:
+        if keys:
+            for key in keys:
+                del self._entries[key]
+            self.index.remove(set(keys))
+
+    def stats(self) -> dict:
+        """
+        Returns the cache size, hit rate and the LLM time saved by hits.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+answer_cache = AnswerCache(
+    ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_THRESHOLD
+)
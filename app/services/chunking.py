@@ -0,0 +1,65 @@
+import json
+from typing import Any, Dict, List
+from app.config.knowledge_base import KB_CHUNK_MAX_CHARS
+from app.models.knowledge_base import ApiDoc
+
+
+def render_value(value: Any, max_chars: int = KB_CHUNK_MAX_CHARS) -> str:
+    """
+    Renders a parameter or response value as compact text for embedding.
+
+    Args:
+        value (Any): The value to render.
+        max_chars (int, optional): The maximum length of the result.
+
+    Returns:
+        str: The value as JSON (plain text for strings), truncated to max_chars.
+    """
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text[:max_chars]
+
+
+def sections(value: Any) -> List[tuple]:
+    """
+    Splits a data or response payload into (key, value) sections. Objects split
+    by top-level key; a list of objects (an example result page) splits by the
+    keys of its first item.
+
+    Args:
+        value (Any): The payload.
+
+    Returns:
+        List[tuple]: The sections, or a single unnamed section for other values.
+    """
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        value = value[0]
+    if isinstance(value, dict):
+        return list(value.items())
+    if value in (None, "", [], {}):
+        return []
+    return [(None, value)]
+
+
+def chunk_api_doc(api_doc: ApiDoc) -> List[Dict]:
+    """
+    Splits an API document into the chunks embedded alongside its description:
+    one per request parameter and one per response section.
+
+    Args:
+        api_doc (ApiDoc): The API document.
+
+    Returns:
+        List[Dict]: Chunks with a "kind" ("parameter" or "response") and the
+        "text" to embed, prefixed with the document name for context.
+    """
+    chunks = []
+    for kind, payload in (("parameter", api_doc.data), ("response", api_doc.response)):
+        for key, value in sections(payload):
+            label = f"{kind} {key}" if key is not None else kind
+            chunks.append(
+                {
+                    "kind": kind,
+                    "text": f"{api_doc.name} {label}: {render_value(value)}",
+                }
+            )
+    return chunks
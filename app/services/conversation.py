@@ -1,10 +1,84 @@
+import asyncio
+import glob
+import os
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from app.models import Conversation, Message
+from pymongo import ReturnDocument
+from app.models import Conversation, ConversationSummary, Message
 from app.config.db import conversations_collection
+from app.config.conversation import CONVERSATION_WAL_DIR, CONVERSATION_CACHE_SIZE
+from app.services.telemetry import span
 from pydantic import ValidationError
 
 
+def to_history_message(message: dict) -> dict:
+    """
+    Keeps only the fields of a stored message that make up the LLM history.
+
+    Args:
+        message (dict): A stored message.
+
+    Returns:
+        dict: The message's role, content and name.
+    """
+    return {
+        "role": message["role"],
+        "content": message["content"],
+        "name": message.get("name"),
+    }
+
+
+class ConversationCache:
+    """
+    Per-process LRU cache of conversation histories, keyed by conversation ID
+    and tagged with the conversation version they reflect. A history is a dict
+    with the conversation's "messages" and its rolling "summary".
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+
+    def get(self, conversation_id: str) -> Optional[Tuple[int, dict]]:
+        entry = self._entries.get(conversation_id)
+        if entry is not None:
+            self._entries.move_to_end(conversation_id)
+        return entry
+
+    def put(self, conversation_id: str, version: int, history: dict) -> None:
+        self._entries[conversation_id] = (version, history)
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def apply(
+        self, conversation_id: str, version: int, change: Callable[[dict], dict]
+    ) -> None:
+        """
+        Applies a write made by this process to the cached history. If the cached
+        history is not the version immediately before it, another worker wrote
+        in between and the entry is dropped instead.
+        """
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return
+        if entry[0] == version - 1:
+            self.put(conversation_id, version, change(entry[1]))
+        else:
+            self.invalidate(conversation_id)
+
+    def invalidate(self, conversation_id: str) -> None:
+        self._entries.pop(conversation_id, None)
+
+
+conversation_cache = ConversationCache(CONVERSATION_CACHE_SIZE)
+
+# Largest $slice length MongoDB accepts, i.e. "all remaining messages"
+MAX_SLICE = 2**31 - 1
+
+
 class ConversationService:
     def __init__(self, db: AsyncIOMotorDatabase):
         """
@@ -27,9 +101,10 @@ class ConversationService:
             dict: A dictionary containing the message, conversation ID, and status.
         """
         conversation = Conversation(user_id=user_id, status="started", messages=[])
-        result = await self.conversations_collection.insert_one(
-            conversation.model_dump()
-        )
+        with span("mongo_write", "start_conversation"):
+            result = await self.conversations_collection.insert_one(
+                conversation.model_dump()
+            )
         conversation_id = str(result.inserted_id)
         return {
             "message": f"Conversation started for user {user_id}",
@@ -48,11 +123,267 @@ class ConversationService:
         Returns:
             bool: True if the message was successfully stored, False otherwise.
         """
+        return await self.store_messages(conversation_id, [message_obj])
+
+    async def store_messages(
+        self,
+        conversation_id: str,
+        message_objs: List[Message],
+        journal_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Stores several messages in an ongoing conversation with a single write,
+        preserving their order. Every write bumps the conversation version so
+        cached histories in other workers can detect it.
+
+        Args:
+            conversation_id (str): The ID of the conversation.
+            message_objs (List[Message]): The message objects to append.
+            journal_id (str, optional): If given, nothing is written when the
+                conversation already has a message from this journal.
+
+        Returns:
+            bool: True if the messages were successfully stored, False otherwise.
+        """
+        if not message_objs:
+            return True
+        query = {"_id": ObjectId(conversation_id)}
+        if journal_id is not None:
+            query["messages.journal_id"] = {"$ne": journal_id}
         try:
-            conversation_update = {"$push": {"messages": message_obj.model_dump()}}
-            await self.conversations_collection.update_one(
-                {"_id": ObjectId(conversation_id)}, conversation_update
+            conversation_update = {
+                "$push": {
+                    "messages": {
+                        "$each": [message.model_dump() for message in message_objs]
+                    }
+                },
+                "$inc": {"version": 1},
+            }
+            with span("mongo_write", "store_messages"):
+                result = await self.conversations_collection.find_one_and_update(
+                    query,
+                    conversation_update,
+                    projection={"version": 1},
+                    return_document=ReturnDocument.AFTER,
+                )
+            if result:
+                new_messages = [
+                    to_history_message(message.model_dump()) for message in message_objs
+                ]
+                conversation_cache.apply(
+                    conversation_id,
+                    result["version"],
+                    lambda history: {
+                        **history,
+                        "messages": history["messages"] + new_messages,
+                    },
+                )
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def __journal_path(conversation_id: str, journal_id: str) -> str:
+        return os.path.join(
+            CONVERSATION_WAL_DIR, f"{conversation_id}.{os.getpid()}.{journal_id}.jsonl"
+        )
+
+    async def journal_messages(
+        self, conversation_id: str, journal_id: str, message_objs: List[Message]
+    ) -> None:
+        """
+        Appends messages to the local write-ahead journal, if one is configured,
+        so they can be replayed should the process die before they are stored.
+        Each agent turn writes its own journals, so a turn clearing its journal
+        never drops another turn's messages. The file is written off the event
+        loop.
+
+        Args:
+            conversation_id (str): The ID of the conversation.
+            journal_id (str): Names the journal; the messages carry it too.
+            message_objs (List[Message]): The messages not yet stored.
+        """
+        if not CONVERSATION_WAL_DIR:
+            return
+        lines = "".join(message.model_dump_json() + "\n" for message in message_objs)
+        await asyncio.to_thread(
+            self.__append_journal,
+            self.__journal_path(conversation_id, journal_id),
+            lines,
+        )
+
+    @staticmethod
+    def __append_journal(path: str, lines: str) -> None:
+        os.makedirs(CONVERSATION_WAL_DIR, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def clear_journal(self, conversation_id: str, journal_id: str) -> None:
+        """
+        Removes a journal once its messages are stored.
+
+        Args:
+            conversation_id (str): The ID of the conversation.
+            journal_id (str): Names the journal.
+        """
+        if not CONVERSATION_WAL_DIR:
+            return
+        await asyncio.to_thread(
+            self.__remove_journal, self.__journal_path(conversation_id, journal_id)
+        )
+
+    @staticmethod
+    def __remove_journal(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def replay_journal(self) -> int:
+        """
+        Stores messages left in journals by worker processes that are no longer
+        running, then removes those journals. Workers starting together each
+        claim a journal by renaming it to their own PID first, so only one of
+        them replays it. A journal whose messages were stored before its
+        process died is removed without storing them again.
+
+        Returns:
+            int: The number of messages replayed.
+        """
+        if not CONVERSATION_WAL_DIR:
+            return 0
+        replayed = 0
+        # Oldest first, so turns of one conversation are stored in order
+        paths = []
+        for path in glob.glob(os.path.join(CONVERSATION_WAL_DIR, "*.jsonl")):
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except FileNotFoundError:  # Replayed by another worker meanwhile
+                pass
+        for _, path in sorted(paths):
+            # <conversation_id>.<pid>.<journal_id>.jsonl
+            conversation_id, pid, journal_id = os.path.basename(path).split(".")[:3]
+            if int(pid) != os.getpid() and self.__process_alive(int(pid)):
+                continue
+            claimed = self.__journal_path(conversation_id, journal_id)
+            try:
+                os.rename(path, claimed)
+            except OSError:  # Claimed by another worker
+                continue
+            with open(claimed, encoding="utf-8") as f:
+                messages = [
+                    Message.model_validate_json(line) for line in f if line.strip()
+                ]
+            if await self.store_messages(conversation_id, messages, journal_id):
+                os.remove(claimed)
+                replayed += len(messages)
+        return replayed
+
+    @staticmethod
+    def __process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    async def get_history(self, conversation_id: str) -> Optional[dict]:
+        """
+        Retrieves the role, content and name of every message in a conversation,
+        without validating full Message models, along with its rolling summary.
+        Histories are cached per process; a cached history is brought up to date
+        by reading only the messages added since, in the same round trip as the
+        version check.
+
+        Args:
+            conversation_id (str): The ID of the conversation.
+
+        Returns:
+            Optional[dict]: {"messages": [...], "summary": {...} or None}, or None
+            if the conversation does not exist.
+        """
+        cached = conversation_cache.get(conversation_id)
+        known = len(cached[1]["messages"]) if cached else 0
+        pipeline = [
+            {"$match": {"_id": ObjectId(conversation_id)}},
+            {
+                "$project": {
+                    "version": {"$ifNull": ["$version", 0]},
+                    "summary": 1,
+                    "messages": {
+                        "$map": {
+                            "input": {
+                                "$slice": [
+                                    {"$ifNull": ["$messages", []]},
+                                    known,
+                                    MAX_SLICE,
+                                ]
+                            },
+                            "as": "message",
+                            "in": {
+                                "role": "$$message.role",
+                                "content": "$$message.content",
+                                "name": "$$message.name",
+                            },
+                        }
+                    },
+                }
+            },
+        ]
+        with span("mongo_read", "get_history"):
+            documents = await self.conversations_collection.aggregate(pipeline).to_list(
+                1
             )
+        if not documents:
+            conversation_cache.invalidate(conversation_id)
+            return None
+
+        document = documents[0]
+        if cached and cached[0] == document["version"]:
+            history = cached[1]
+        else:
+            new_messages = [
+                to_history_message(message) for message in document["messages"]
+            ]
+            history = {
+                "messages": (cached[1]["messages"] if cached else []) + new_messages,
+                "summary": document.get("summary"),
+            }
+            conversation_cache.put(conversation_id, document["version"], history)
+        return {"messages": list(history["messages"]), "summary": history["summary"]}
+
+    async def update_summary(
+        self, conversation_id: str, summary: ConversationSummary
+    ) -> bool:
+        """
+        Stores the rolling summary of a conversation's older messages.
+
+        Args:
+            conversation_id (str): The ID of the conversation.
+            summary (ConversationSummary): The summary and how many messages it covers.
+
+        Returns:
+            bool: True if the summary was successfully stored, False otherwise.
+        """
+        try:
+            summary_doc = summary.model_dump()
+            with span("mongo_write", "update_summary"):
+                result = await self.conversations_collection.find_one_and_update(
+                    {"_id": ObjectId(conversation_id)},
+                    {"$set": {"summary": summary_doc}, "$inc": {"version": 1}},
+                    projection={"version": 1},
+                    return_document=ReturnDocument.AFTER,
+                )
+            if result:
+                conversation_cache.apply(
+                    conversation_id,
+                    result["version"],
+                    lambda history: {**history, "summary": summary_doc},
+                )
             return True
         except Exception:
             return False
@@ -0,0 +1,70 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute time.monotonic() by which the current request must finish, if any.
+# Set around tool calls so services they reach (e.g. embeddings) can honour it.
+deadline_var: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when the current request's time budget is used up. Subclasses
+    TimeoutError so existing timeout handling also covers it.
+    """
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Returns the seconds left before a deadline.
+
+    Args:
+        deadline (float, optional): The deadline; defaults to the current scope's.
+
+    Returns:
+        Optional[float]: The seconds left (negative once passed), or None without
+        a deadline.
+    """
+    deadline = deadline if deadline is not None else deadline_var.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded_timeout(
+    timeout: Optional[float], deadline: Optional[float] = None
+) -> Optional[float]:
+    """
+    Shortens a per-operation timeout so the operation cannot outlive the deadline.
+
+    Args:
+        timeout (float, optional): The operation's own timeout, or None for none.
+        deadline (float, optional): The deadline; defaults to the current scope's.
+
+    Returns:
+        Optional[float]: The timeout to use, or None if neither applies.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed.
+    """
+    left = remaining(deadline)
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[None]:
+    """
+    Makes a deadline the current one for the enclosed block and the tasks it
+    starts.
+
+    Args:
+        deadline (float, optional): The deadline, or None to clear it.
+    """
+    token = deadline_var.set(deadline)
+    try:
+        yield
+    finally:
+        deadline_var.reset(token)
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from app.config.db import embedding_cache_collection
+from app.config.knowledge_base import (
+    KB_EMBEDDING_MODEL,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_PERSISTENT,
+    KB_SINGLE_FLIGHT,
+)
+from openai import NOT_GIVEN
+from app.services.deadline import bounded_timeout
+from app.services.resilience import resilient_openai
+from app.services.singleflight import SingleFlight
+from app.services.telemetry import embedding_cache_lookups, record_usage, span
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a query so trivially different phrasings share a cache entry.
+
+    Args:
+        text (str): The raw query text.
+
+    Returns:
+        str: The lower-cased text with whitespace collapsed.
+    """
+    return " ".join(text.split()).lower()
+
+
+def cache_key(model: str, text: str) -> str:
+    """
+    Builds the cache key for an embedding. The model is part of the key so
+    vectors from different embedding models are never mixed.
+
+    Args:
+        model (str): The embedding model name.
+        text (str): The normalized text.
+
+    Returns:
+        str: A hex digest identifying the (model, text) pair.
+    """
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    In-process LRU cache of embeddings with a per-entry TTL and hit/miss counters.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Returns the cached vector for a key, or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """
+        Stores a vector, evicting the least recently used entries beyond max_size.
+        """
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Returns the cache size and hit/miss counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent_hits": self.persistent_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL_SECONDS)
+embedding_flight = SingleFlight("query_embedding")
+
+
+async def ensure_embedding_cache_indexes() -> None:
+    """
+    Creates the TTL index that expires entries in the shared MongoDB cache tier.
+    """
+    if EMBEDDING_CACHE_PERSISTENT:
+        await embedding_cache_collection.create_index(
+            "created_at", expireAfterSeconds=int(EMBEDDING_CACHE_TTL_SECONDS)
+        )
+
+
+async def create_embedding(text: str, model: str = KB_EMBEDDING_MODEL) -> List[float]:
+    """
+    Embeds a text with the OpenAI embeddings API, bypassing the cache. The call
+    is bounded by the current request deadline, if any.
+
+    Args:
+        text (str): The text to embed.
+        model (str, optional): The embedding model. Defaults to KB_EMBEDDING_MODEL.
+
+    Returns:
+        List[float]: The embedding vector.
+    """
+    timeout = bounded_timeout(None)
+    with span("embedding", model):
+        # Failover or hedging may make several attempts; wait_for caps them all
+        response = await asyncio.wait_for(
+            resilient_openai.call(
+                "embedding",
+                lambda client: client.embeddings.create(
+                    input=text,
+                    model=model,
+                    timeout=NOT_GIVEN if timeout is None else timeout,
+                ),
+            ),
+            timeout,
+        )
+    record_usage(model, response.usage)
+    return response.data[0].embedding
+
+
+async def create_embeddings(
+    texts: List[str], model: str = KB_EMBEDDING_MODEL
+) -> List[List[float]]:
+    """
+    Embeds several texts with one OpenAI embeddings request, bypassing the cache.
+
+    Args:
+        texts (List[str]): The texts to embed.
+        model (str, optional): The embedding model. Defaults to KB_EMBEDDING_MODEL.
+
+    Returns:
+        List[List[float]]: The embedding vectors, in the order of the texts.
+    """
+    timeout = bounded_timeout(None)
+    with span("embedding", model):
+        # Failover or hedging may make several attempts; wait_for caps them all
+        response = await asyncio.wait_for(
+            resilient_openai.call(
+                "embedding",
+                lambda client: client.embeddings.create(
+                    input=texts,
+                    model=model,
+                    timeout=NOT_GIVEN if timeout is None else timeout,
+                ),
+            ),
+            timeout,
+        )
+    record_usage(model, response.usage)
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+async def embed_query(text: str, model: str = KB_EMBEDDING_MODEL) -> List[float]:
+    """
+    Embeds a search query, serving repeated queries from the in-process cache and,
+    when enabled, the MongoDB tier shared across workers. Concurrent misses for
+    the same query share one lookup and one embeddings call.
+
+    Args:
+        text (str): The query text.
+        model (str, optional): The embedding model. Defaults to KB_EMBEDDING_MODEL.
+
+    Returns:
+        List[float]: The embedding vector.
+    """
+    normalized = normalize_text(text)
+    key = cache_key(model, normalized)
+
+    vector = embedding_cache.get(key)
+    if vector is not None:
+        embedding_cache_lookups.inc(result="hit")
+        return vector
+
+    if KB_SINGLE_FLIGHT:
+        return await embedding_flight.do(
+            key, lambda: load_query_embedding(key, normalized, model)
+        )
+    return await load_query_embedding(key, normalized, model)
+
+
+async def load_query_embedding(key: str, normalized: str, model: str) -> List[float]:
+    """
+    Resolves an in-process cache miss from the MongoDB tier or the embeddings
+    API, filling the caches on the way back.
+
+    Args:
+        key (str): The cache key.
+        normalized (str): The normalized query text.
+        model (str): The embedding model.
+
+    Returns:
+        List[float]: The embedding vector.
+    """
+    if EMBEDDING_CACHE_PERSISTENT:
+        try:
+            with span("mongo_read", "embedding_cache"):
+                cached = await embedding_cache_collection.find_one(
+                    {"_id": key}, {"vector": 1}
+                )
+        except Exception as e:
+            cached = None
+            print(f"Error reading embedding cache: {e}")
+        if cached:
+            embedding_cache_lookups.inc(result="persistent_hit")
+            embedding_cache.persistent_hits += 1
+            embedding_cache.put(key, cached["vector"])
+            return cached["vector"]
+
+    embedding_cache_lookups.inc(result="miss")
+    vector = await create_embedding(normalized, model)
+    embedding_cache.put(key, vector)
+
+    if EMBEDDING_CACHE_PERSISTENT:
+        try:
+            await embedding_cache_collection.update_one(
+                {"_id": key},
+                {
+                    "$set": {
+                        "model": model,
+                        "vector": vector,
+                        "created_at": datetime.now(timezone.utc),
+                    }
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"Error writing embedding cache: {e}")
+    return vector
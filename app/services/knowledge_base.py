@@ -1,36 +1,448 @@
-import motor.motor_asyncio
-from typing import List, Dict
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, List, Dict, Optional, Tuple
 from bson import ObjectId
+from pydantic import ValidationError
 from app.models.knowledge_base import ApiDoc
-from pymongo.errors import PyMongoError
-from openai import OpenAI
-import numpy as np
-from app.config.db import api_doc_collection
-import os
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.config.db import api_doc_collection, kb_meta_collection
+from app.config.knowledge_base import (
+    KB_INDEX_REFRESH_SECONDS,
+    KB_VERSION_KEY,
+    KB_INDEX_BACKEND,
+    KB_IVF_NLIST,
+    KB_IVF_NPROBE,
+    KB_INDEX_SNAPSHOT_PATH,
+    KB_INDEX_MMAP_PATH,
+    KB_EMBEDDING_MODEL,
+    KB_LEGACY_EMBEDDING_MODEL,
+    KB_EMBED_BATCH_SIZE,
+    KB_EMBED_CONCURRENCY,
+    KB_CHUNKING_ENABLED,
+    KB_CHUNK_OVERFETCH,
+    KB_HYBRID_SEARCH,
+    KB_RRF_K,
+    KB_QUERY_EMBEDDING_TIMEOUT_SECONDS,
+    KB_VECTOR_FORMAT,
+    KB_SEARCH_CANDIDATES,
+    KB_SINGLE_FLIGHT,
+    KB_ACTIVE_MODEL_KEY,
+)
+from app.services.answer_cache import answer_cache
+from app.services.chunking import chunk_api_doc
+from app.services.deadline import bounded_timeout
+from app.services.embeddings import create_embeddings, embed_query, normalize_text
+from app.services.lexical_index import (
+    LexicalIndex,
+    document_text,
+    reciprocal_rank_fusion,
+)
+from app.services.mmap_index import build_lock, open_shared_index, publish_shared_index
+from app.services.singleflight import SingleFlight
+from app.services.telemetry import span
+from app.services.vector_codec import decode_vector, encode_vector, vector_format
+from app.services.vector_index import VectorIndex, create_index
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Document fields a search can return; the name is always included
+SEARCH_FIELDS = ("name", "description", "data", "response")
 
-def cosine_similarity(v1, v2):
+
+class IndexState:
+    """
+    Holds the process-resident vector and lexical indexes, the knowledge base
+    version they reflect and the embedding model the vectors came from.
+    """
+
+    def __init__(self) -> None:
+        self.index = new_index()
+        self.lexical = LexicalIndex()
+        self.version: Optional[int] = None
+        self.model = KB_EMBEDDING_MODEL
+        self.checked_at = 0.0
+
+
+def new_index() -> VectorIndex:
+    """
+    Creates an empty vector index using the configured backend.
+
+    Returns:
+        VectorIndex: An empty index.
+    """
+    return create_index(KB_INDEX_BACKEND, nlist=KB_IVF_NLIST, nprobe=KB_IVF_NPROBE)
+
+
+index_state = IndexState()
+
+
+async def get_kb_version() -> int:
+    """
+    Reads the knowledge base version counter, bumped on every insert.
+
+    Returns:
+        int: The current version, or 0 if nothing has been inserted yet.
+    """
+    meta = await kb_meta_collection.find_one({"_id": KB_VERSION_KEY})
+    return meta["version"] if meta else 0
+
+
+async def bump_kb_version() -> int:
+    """
+    Increments the knowledge base version counter.
+
+    Returns:
+        int: The version after the increment.
+    """
+    meta = await kb_meta_collection.find_one_and_update(
+        {"_id": KB_VERSION_KEY},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return meta["version"]
+
+
+async def get_active_model() -> str:
+    """
+    Reads the embedding model searches use, as last activated by a
+    re-embedding job.
+
+    Returns:
+        str: The active model, or KB_EMBEDDING_MODEL if none was activated.
+    """
+    meta = await kb_meta_collection.find_one({"_id": KB_ACTIVE_MODEL_KEY})
+    return meta["model"] if meta else KB_EMBEDDING_MODEL
+
+
+def model_field(model: str) -> str:
+    """
+    The key under "vectors" holding a document's vectors for a model, with
+    characters MongoDB field paths cannot contain replaced.
+    """
+    return model.replace(".", "_").replace("$", "_")
+
+
+def document_vectors(document: Dict, model: str) -> Optional[List[Any]]:
+    """
+    Finds a stored document's description and chunk vectors for a model: the
+    top-level "vector" and "chunks" if they came from it, otherwise the copy a
+    re-embedding job wrote under "vectors.<model>".
+
+    Args:
+        document (Dict): The MongoDB document.
+        model (str): The embedding model.
+
+    Returns:
+        Optional[List[Any]]: The stored vectors, description first, or None if
+        the document has none for the model.
+    """
+    if (
+        "vector" in document
+        and document.get("embedding_model", KB_LEGACY_EMBEDDING_MODEL) == model
+    ):
+        return [document["vector"]] + [
+            chunk["vector"] for chunk in document.get("chunks", [])
+        ]
+    stored = document.get("vectors", {}).get(model_field(model))
+    if stored:
+        return [stored["vector"], *stored.get("chunks", [])]
+    return None
+
+
+def load_index_snapshot(version: int, model: str) -> Optional[VectorIndex]:
+    """
+    Loads the on-disk index, the shared memory-mapped file if configured and
+    the .npz snapshot otherwise, if it matches the configured backend, the
+    current knowledge base version and the active embedding model.
+
+    Args:
+        version (int): The current knowledge base version.
+        model (str): The active embedding model.
+
+    Returns:
+        Optional[VectorIndex]: The snapshot index, or None if it is missing or stale.
+    """
+    options = {"id_factory": ObjectId, "nlist": KB_IVF_NLIST, "nprobe": KB_IVF_NPROBE}
+    if KB_INDEX_MMAP_PATH:
+        index = open_shared_index(KB_INDEX_MMAP_PATH, version, model, **options)
+        return (
+            index if index is not None and index.backend == KB_INDEX_BACKEND else None
+        )
+    if not KB_INDEX_SNAPSHOT_PATH:
+        return None
+    try:
+        index, meta = VectorIndex.load(KB_INDEX_SNAPSHOT_PATH, **options)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading vector index snapshot: {e}")
+        return None
+    if (
+        index.backend != KB_INDEX_BACKEND
+        or meta.get("version") != version
+        or meta.get("model") != model
+    ):
+        return None
+    return index
+
+
+async def scan_api_docs(
+    lexical: LexicalIndex, model: str, with_vectors: bool
+) -> Optional[VectorIndex]:
     """
-    Computes the cosine similarity between two vectors.
+    Reads every document from MongoDB into a lexical index and, if asked, a
+    new vector index of the model's vectors.
 
     Args:
-        v1 (numpy.ndarray): The first vector.
-        v2 (numpy.ndarray): The second vector.
+        lexical (LexicalIndex): The lexical index to fill.
+        model (str): The active embedding model.
+        with_vectors (bool): Whether to read vectors and build a vector index.
 
     Returns:
-        float: The cosine similarity score.
+        Optional[VectorIndex]: The vector index, or None without vectors.
     """
-    dot_product = np.dot(v1, v2)
-    norm_v1 = np.linalg.norm(v1)
-    norm_v2 = np.linalg.norm(v2)
-    return dot_product / (norm_v1 * norm_v2)
+    projection = {"name": 1, "description": 1, "data": 1, "response": 1}
+    if with_vectors:
+        projection.update(
+            {
+                "vector": 1,
+                "embedding_model": 1,
+                "chunks.vector": 1,
+                f"vectors.{model_field(model)}": 1,
+            }
+        )
+
+    ids, vectors, skipped = [], [], 0
+    async for document in api_doc_collection.find({}, projection):
+        lexical.add(document["_id"], document_text(document))
+        if not with_vectors:
+            continue
+        # Vectors from another embedding model are not comparable with
+        # query vectors, so they are left out until re-embedded
+        stored = document_vectors(document, model)
+        if stored is None:
+            skipped += 1
+            continue
+        for vector in stored:
+            ids.append(document["_id"])
+            vectors.append(decode_vector(vector))
+    if skipped:
+        print(f"Skipped {skipped} API docs with no vectors from {model}.")
+    if not with_vectors:
+        return None
+    index = new_index()
+    index.build(ids, vectors)
+    return index
+
+
+async def load_index() -> None:
+    """
+    Loads every document into fresh in-memory vector and lexical indexes and
+    swaps them in. Vectors come from an up-to-date snapshot when there is one,
+    otherwise from the same MongoDB scan that feeds the lexical index. With a
+    shared index file, one worker at a time builds it while the others wait and
+    then map it. On failure the current indexes are kept and marked stale so
+    the next search retries.
+    """
+    try:
+        version = await get_kb_version()
+        model = await get_active_model()
+        lexical = LexicalIndex()
+        index = load_index_snapshot(version, model)
+        built = None
+        if index is None and KB_INDEX_MMAP_PATH:
+            async with build_lock(KB_INDEX_MMAP_PATH):
+                # Another worker may have built the file while this one waited
+                index = load_index_snapshot(version, model)
+                if index is None:
+                    built = await scan_api_docs(lexical, model, with_vectors=True)
+                    await asyncio.to_thread(
+                        built.save_mapped,
+                        KB_INDEX_MMAP_PATH,
+                        version=version,
+                        model=model,
+                    )
+                    # Map the file like the other workers rather than keep a copy
+                    index = load_index_snapshot(version, model) or built
+        elif index is None:
+            index = built = await scan_api_docs(lexical, model, with_vectors=True)
+            if KB_INDEX_SNAPSHOT_PATH:
+                index.save(KB_INDEX_SNAPSHOT_PATH, version=version, model=model)
+        if built is None:
+            await scan_api_docs(lexical, model, with_vectors=False)
+
+        if index_state.version is not None and version != index_state.version:
+            # Another worker changed the knowledge base; cached answers may be stale
+            answer_cache.clear()
+        index_state.index = index
+        index_state.lexical = lexical
+        index_state.version = version
+        index_state.model = model
+        index_state.checked_at = time.monotonic()
+        print(
+            f"Loaded {len(index)} API doc vectors into {index.backend} index (version {version})."
+        )
+    except Exception as e:
+        index_state.version = None
+        print(f"Error loading vector index: {e}")
+
+
+async def publish_index() -> None:
+    """
+    Writes this worker's index to the shared file after it was updated in
+    place, so the other workers map the new version instead of rebuilding it
+    from MongoDB, then maps the file in place of the private copy.
+    """
+    version, model = index_state.version, index_state.model
+    if not KB_INDEX_MMAP_PATH or version is None:
+        return
+    try:
+        await publish_shared_index(
+            KB_INDEX_MMAP_PATH, index_state.index, version, model
+        )
+    except OSError as e:
+        print(f"Error publishing shared vector index: {e}")
+        return
+    mapped = load_index_snapshot(version, model)
+    if mapped is not None and index_state.version == version:
+        index_state.index = mapped
+
+
+async def ensure_index_fresh() -> None:
+    """
+    Reloads the in-memory index if another process has changed the knowledge base.
+    The version counter is checked at most once every KB_INDEX_REFRESH_SECONDS.
+    """
+    now = time.monotonic()
+    if (
+        index_state.version is not None
+        and now - index_state.checked_at < KB_INDEX_REFRESH_SECONDS
+    ):
+        return
+    index_state.checked_at = now
+    if index_state.version is None or await get_kb_version() != index_state.version:
+        await load_index()
+
+
+def content_hash(api_doc: ApiDoc, model: str) -> str:
+    """
+    Hashes a document's content together with the embedding model and chunking
+    mode, so a document only needs re-embedding when one of them changes.
+
+    Args:
+        api_doc (ApiDoc): The API document.
+        model (str): The embedding model name.
+
+    Returns:
+        str: A hex digest of the canonical document and model.
+    """
+    canonical = json.dumps(
+        api_doc.model_dump(), sort_keys=True, separators=(",", ":"), default=str
+    )
+    mode = "chunked" if KB_CHUNKING_ENABLED else "description"
+    return hashlib.sha256(
+        f"{model}\x00{mode}\x00{canonical}".encode("utf-8")
+    ).hexdigest()
+
+
+def embedding_texts(api_doc: ApiDoc) -> List[str]:
+    """
+    Lists the texts embedded for a document: its description first, then one per
+    chunk when chunking is enabled.
+
+    Args:
+        api_doc (ApiDoc): The API document.
+
+    Returns:
+        List[str]: The texts to embed.
+    """
+    texts = [api_doc.description]
+    if KB_CHUNKING_ENABLED:
+        texts.extend(chunk["text"] for chunk in chunk_api_doc(api_doc))
+    return texts
+
+
+def build_document(api_doc: ApiDoc, vectors: List[List[float]], model: str) -> Dict:
+    """
+    Builds the stored form of a document from its embedding_texts vectors. The
+    description vector stays in "vector"; chunk vectors go in "chunks". Vectors
+    are encoded in KB_VECTOR_FORMAT.
+
+    Args:
+        api_doc (ApiDoc): The API document.
+        vectors (List[List[float]]): One vector per text from embedding_texts.
+        model (str): The embedding model the vectors came from.
+
+    Returns:
+        Dict: The MongoDB document.
+    """
+    document = api_doc.model_dump(exclude_unset=True)
+    document["vector"] = encode_vector(vectors[0], KB_VECTOR_FORMAT)
+    if KB_CHUNKING_ENABLED:
+        document["chunks"] = [
+            {**chunk, "vector": encode_vector(vector, KB_VECTOR_FORMAT)}
+            for chunk, vector in zip(chunk_api_doc(api_doc), vectors[1:])
+        ]
+    document["embedding_model"] = model
+    document["content_hash"] = content_hash(api_doc, model)
+    return document
+
+
+def index_document(index: VectorIndex, document: Dict) -> None:
+    """
+    Adds a document's description and chunk vectors to an index. Every vector is
+    stored under the document id, so chunk hits point back at their parent.
+
+    Args:
+        index (VectorIndex): The index to add to.
+        document (Dict): The MongoDB document, with "_id", "vector" and "chunks".
+    """
+    index.add(document["_id"], decode_vector(document["vector"]))
+    for chunk in document.get("chunks", []):
+        index.add(document["_id"], decode_vector(chunk["vector"]))
+
+
+def parse_api_docs(text: str) -> Tuple[List[ApiDoc], List[Dict]]:
+    """
+    Parses API documents from a JSON array, a single JSON object or JSON Lines.
+
+    Args:
+        text (str): The raw payload.
+
+    Returns:
+        Tuple[List[ApiDoc], List[Dict]]: The valid documents and one failure entry
+        (with the 1-based item or line number) per invalid one.
+    """
+    docs, failures = [], []
+    try:
+        payload = json.loads(text)
+        items = payload if isinstance(payload, list) else [payload]
+        for position, item in enumerate(items, start=1):
+            try:
+                docs.append(ApiDoc.model_validate(item))
+            except ValidationError as e:
+                failures.append({"item": position, "error": str(e)})
+        return docs, failures
+    except json.JSONDecodeError:
+        pass
+
+    for position, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            docs.append(ApiDoc.model_validate_json(line))
+        except ValidationError as e:
+            failures.append({"item": position, "error": str(e)})
+    return docs, failures
 
 
 async def insert_api_doc(api_doc: ApiDoc):
     """
-    Inserts a new API document into MongoDB along with its vector embedding.
+    Inserts a new API document into MongoDB along with its description and chunk
+    embeddings.
 
     Args:
         api_doc (ApiDoc): The API document to insert.
@@ -39,15 +451,26 @@ async def insert_api_doc(api_doc: ApiDoc):
         dict: A dictionary with the result of the insertion or an error message.
     """
     try:
-        response = client.embeddings.create(
-            input=api_doc.description, model="text-embedding-3-small"
-        )
-        description_vector = response.data[0].embedding
-
-        document = api_doc.model_dump(exclude_unset=True)
-        document["vector"] = description_vector
+        model = await get_active_model()
+        vectors = await create_embeddings(embedding_texts(api_doc), model)
+        document = build_document(api_doc, vectors, model)
 
         result = await api_doc_collection.insert_one(document)
+
+        # Keep the local index in sync; if another worker inserted concurrently the
+        # version will have skipped ahead and the next search reloads the index.
+        # An index of another model's vectors is stale anyway and is reloaded.
+        if model == index_state.model:
+            index_document(index_state.index, document)
+            index_state.lexical.add(document["_id"], document_text(document))
+        version = await bump_kb_version()
+        if model != index_state.model:
+            index_state.version = None
+        elif index_state.version is not None and version == index_state.version + 1:
+            index_state.version = version
+            await publish_index()
+        answer_cache.invalidate_docs([api_doc.name])
+
         return {"id": str(result.inserted_id), "message": "successfully inserted"}
     except PyMongoError as e:
         return {"error": str(e)}
@@ -55,38 +478,352 @@ async def insert_api_doc(api_doc: ApiDoc):
         return {"error": f"Failed to generate vector: {str(e)}"}
 
 
-async def search_api_doc(description_query: str, top_n: int = 10) -> List[Dict]:
+async def embed_api_docs(api_docs: List[ApiDoc], model: str) -> List:
     """
-    Searches for similar API documents based on a query description using vector similarity.
+    Embeds the description and chunks of many documents in batches of
+    KB_EMBED_BATCH_SIZE texts, running at most KB_EMBED_CONCURRENCY embedding
+    requests at once. A failed batch does not stop the others.
 
     Args:
-        description_query (str): The query description to search for.
-        top_n (int, optional): The number of top similar documents to return. Defaults to 10.
+        api_docs (List[ApiDoc]): The documents to embed.
+        model (str): The embedding model name.
+
+    Returns:
+        List: One entry per document, either the vectors of its embedding_texts or
+        the Exception raised while embedding one of its batches.
+    """
+    semaphore = asyncio.Semaphore(KB_EMBED_CONCURRENCY)
+
+    async def embed_batch(batch: List[str]) -> List:
+        async with semaphore:
+            try:
+                return await create_embeddings(batch, model)
+            except Exception as e:
+                return [e] * len(batch)
+
+    texts_per_doc = [embedding_texts(doc) for doc in api_docs]
+    texts = [text for doc_texts in texts_per_doc for text in doc_texts]
+    batches = [
+        texts[start : start + KB_EMBED_BATCH_SIZE]
+        for start in range(0, len(texts), KB_EMBED_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    vectors = iter([vector for batch in results for vector in batch])
+
+    embedded = []
+    for doc_texts in texts_per_doc:
+        doc_vectors = [next(vectors) for _ in doc_texts]
+        failure = next((v for v in doc_vectors if isinstance(v, Exception)), None)
+        embedded.append(failure if failure is not None else doc_vectors)
+    return embedded
+
+
+async def bulk_insert_api_docs(api_docs: List[ApiDoc]) -> Dict:
+    """
+    Inserts or updates many API documents, keyed by name. Documents whose content
+    hash is unchanged are skipped without re-embedding; the rest are embedded in
+    batches and written with unordered bulk operations so one bad document does
+    not abort the load.
+
+    Args:
+        api_docs (List[ApiDoc]): The API documents to load.
 
     Returns:
-        List[Dict]: A list of the top similar documents with their similarity scores.
+        Dict: Counts of inserted, updated, unchanged and failed documents, plus
+        one result entry per input document.
     """
+    results = [{"name": doc.name, "status": "pending"} for doc in api_docs]
+
+    # Later duplicates of a name win, matching a sequence of single inserts
+    latest = {doc.name: position for position, doc in enumerate(api_docs)}
+    for position, doc in enumerate(api_docs):
+        if latest[doc.name] != position:
+            results[position].update(
+                status="failed",
+                error="superseded by a later document with the same name",
+            )
+
     try:
-        response = client.embeddings.create(
-            input=description_query, model="text-embedding-ada-002"
+        # Written with the active model even if this process has not loaded the
+        # index, as when loading from manage.py
+        model = await get_active_model()
+        cursor = api_doc_collection.find(
+            {"name": {"$in": list(latest)}},
+            {"name": 1, "content_hash": 1, f"vectors.{model_field(model)}": 1},
         )
-        query_vector = response.data[0].embedding
+        existing = {document["name"]: document async for document in cursor}
+    except PyMongoError as e:
+        return {"error": str(e)}
+
+    pending = []
+    for name, position in latest.items():
+        current = existing.get(name)
+        digest = content_hash(api_docs[position], model)
+        # Vectors a re-embedding job stored for the model are as good as primary ones
+        stored = (current or {}).get("vectors", {}).get(model_field(model), {})
+        if current is not None and digest in (
+            current.get("content_hash"),
+            stored.get("content_hash"),
+        ):
+            results[position].update(status="unchanged", id=str(current["_id"]))
+        else:
+            pending.append(position)
+
+    embedded = await embed_api_docs([api_docs[p] for p in pending], model)
+
+    inserts, replaces = [], []
+    for position, vectors in zip(pending, embedded):
+        if isinstance(vectors, Exception):
+            results[position].update(
+                status="failed", error=f"Failed to generate vector: {vectors}"
+            )
+            continue
+        document = build_document(api_docs[position], vectors, model)
+        current = existing.get(api_docs[position].name)
+        if current is None:
+            document["_id"] = ObjectId()
+            inserts.append((position, document))
+        else:
+            document["_id"] = current["_id"]
+            replaces.append((position, document))
+
+    written = []
+    for operations, status, write in (
+        (
+            inserts,
+            "inserted",
+            lambda docs: api_doc_collection.insert_many(docs, ordered=False),
+        ),
+        (
+            replaces,
+            "updated",
+            lambda docs: api_doc_collection.bulk_write(
+                [ReplaceOne({"_id": d["_id"]}, d) for d in docs], ordered=False
+            ),
+        ),
+    ):
+        if not operations:
+            continue
+        errors = {}
+        try:
+            await write([document for _, document in operations])
+        except BulkWriteError as e:
+            errors = {
+                error["index"]: error["errmsg"] for error in e.details["writeErrors"]
+            }
+        except PyMongoError as e:
+            errors = {i: str(e) for i in range(len(operations))}
+        for i, (position, document) in enumerate(operations):
+            if i in errors:
+                results[position].update(status="failed", error=errors[i])
+            else:
+                results[position].update(status=status, id=str(document["_id"]))
+                written.append(document)
+
+    if written and model == index_state.model:
+        # Replaced documents keep their id, so drop their old vectors before adding
+        index_state.index.remove({d["_id"] for d in written})
+        for document in written:
+            index_document(index_state.index, document)
+            index_state.lexical.add(document["_id"], document_text(document))
+    if written:
+        try:
+            version = await bump_kb_version()
+            if model != index_state.model:
+                index_state.version = None
+            elif index_state.version is not None and version == index_state.version + 1:
+                index_state.version = version
+                await publish_index()
+        except PyMongoError as e:
+            # Leave the index stale so the next search reloads it from MongoDB
+            index_state.version = None
+            print(f"Error bumping knowledge base version: {e}")
+        answer_cache.invalidate_docs([d["name"] for d in written])
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "items": results}
+
+
+async def migrate_vectors(fmt: str = KB_VECTOR_FORMAT, batch_size: int = 500) -> Dict:
+    """
+    Rewrites stored description and chunk vectors in another storage format,
+    including the copies re-embedding jobs keep under "vectors.<model>", leaving
+    documents already in that format untouched. Safe to re-run after an
+    interruption.
 
+    Args:
+        fmt (str, optional): The target format. Defaults to KB_VECTOR_FORMAT.
+        batch_size (int, optional): Documents per bulk write. Defaults to 500.
+
+    Returns:
+        Dict: The number of documents scanned and migrated, or an error message.
+    """
+    scanned = migrated = 0
+    operations = []
+    try:
         cursor = api_doc_collection.find(
-            {}, {"name": 1, "description": 1, "data": 1, "response": 1, "vector": 1}
+            {"$or": [{"vector": {"$exists": True}}, {"vectors": {"$exists": True}}]},
+            {"vector": 1, "chunks.vector": 1, "vectors": 1},
         )
+        async for document in cursor:
+            scanned += 1
+            # Field path of every stored vector, with its current value
+            stored = {}
+            if "vector" in document:
+                stored["vector"] = document["vector"]
+                for i, chunk in enumerate(document.get("chunks", [])):
+                    stored[f"chunks.{i}.vector"] = chunk["vector"]
+            for key, copy in document.get("vectors", {}).items():
+                stored[f"vectors.{key}.vector"] = copy["vector"]
+                for i, vector in enumerate(copy.get("chunks", [])):
+                    stored[f"vectors.{key}.chunks.{i}"] = vector
+            if all(vector_format(vector) == fmt for vector in stored.values()):
+                continue
+            # Only the vectors are set so chunk texts written meanwhile survive
+            update = {
+                path: encode_vector(decode_vector(vector), fmt)
+                for path, vector in stored.items()
+            }
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": update}))
+            if len(operations) >= batch_size:
+                await api_doc_collection.bulk_write(operations, ordered=False)
+                migrated += len(operations)
+                operations = []
+        if operations:
+            await api_doc_collection.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+        if migrated:
+            # Quantization changes the vectors slightly; have every worker reload
+            await bump_kb_version()
+    except (PyMongoError, ValueError) as e:
+        return {"error": str(e), "scanned": scanned, "migrated": migrated}
+    return {"scanned": scanned, "migrated": migrated}
 
-        results_with_scores = []
 
-        async for document in cursor:
-            doc_vector = document.get("vector")
-            if doc_vector:
-                score = cosine_similarity(np.array(query_vector), np.array(doc_vector))
-                results_with_scores.append((document, score))
+search_flight = SingleFlight("api_doc_search")
+
+
+async def search_api_doc(
+    description_query: str, top_n: int = 10, fields: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Searches for similar API documents based on a query description. Concurrent
+    identical searches (same model, query, top_n and fields) share one run; each
+    caller gets its own copies of the result documents.
+
+    Args:
+        description_query (str): The query description to search for.
+        top_n (int, optional): The number of top similar documents to return. Defaults to 10.
+        fields (List[str], optional): The SEARCH_FIELDS to return. Defaults to all.
+
+    Returns:
+        List[Dict]: A list of the top similar documents, most similar first.
+    """
+    if not KB_SINGLE_FLIGHT:
+        return await run_search(description_query, top_n, fields)
+    key = (
+        index_state.model,
+        index_state.version,
+        normalize_text(description_query),
+        top_n,
+        tuple(fields or ()),
+    )
+    result = await search_flight.do(
+        key, lambda: run_search(description_query, top_n, fields)
+    )
+    if isinstance(result, list):
+        return [dict(document) for document in result]
+    return dict(result)
+
+
+async def run_search(
+    description_query: str, top_n: int = 10, fields: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Runs one search for similar API documents. Vector
+    similarity is fused with BM25 keyword matches by reciprocal rank fusion, and
+    the keyword ranking alone is used when the query cannot be embedded within
+    KB_QUERY_EMBEDDING_TIMEOUT_SECONDS.
+
+    Scoring runs entirely on the in-memory indexes; only the top_n winners are
+    then read from MongoDB, with just the requested fields.
+
+    Args:
+        description_query (str): The query description to search for.
+        top_n (int, optional): The number of top similar documents to return. Defaults to 10.
+        fields (List[str], optional): The SEARCH_FIELDS to return. Defaults to all.
+
+    Returns:
+        List[Dict]: A list of the top similar documents, most similar first.
+    """
+    unknown = set(fields or []) - set(SEARCH_FIELDS)
+    if unknown:
+        return {"error": f"Unknown fields {sorted(unknown)}; expected {SEARCH_FIELDS}"}
+    projection = {field: 1 for field in ["name", *(fields or SEARCH_FIELDS)]}
+    # Fusion needs a few candidates from each ranking even when few are returned
+    depth = max(top_n, KB_SEARCH_CANDIDATES)
+
+    try:
+        await ensure_index_fresh()
+        # Taken together once: a reload while the query is embedded (say, after
+        # a re-embedding job switched models) must not pair the query vector
+        # with another model's index
+        model, index, lexical = (
+            index_state.model,
+            index_state.index,
+            index_state.lexical,
+        )
+        embedding_error = None
+        try:
+            # Queries are embedded with the same model as the indexed documents
+            query_vector = await asyncio.wait_for(
+                embed_query(description_query, model),
+                bounded_timeout(
+                    KB_QUERY_EMBEDDING_TIMEOUT_SECONDS if KB_HYBRID_SEARCH else None
+                ),
+            )
+        except Exception as e:
+            if not KB_HYBRID_SEARCH:
+                raise
+            embedding_error = str(e) or "query embedding timed out"
+            query_vector = None
+            print(f"Query embedding failed, using keyword search only: {e!r}")
+
+        rankings = []
+        if query_vector is not None:
+            # Several chunks of one document can match; over-fetch and keep each
+            # document once, at the rank of its best-scoring chunk
+            fetch = depth * KB_CHUNK_OVERFETCH if KB_CHUNKING_ENABLED else depth
+            with span("vector_search", index.backend):
+                hits = index.search(query_vector, fetch)
+            vector_ids = []
+            for doc_id, _ in hits:
+                if doc_id not in vector_ids:
+                    vector_ids.append(doc_id)
+            rankings.append(vector_ids[:depth])
+        if KB_HYBRID_SEARCH:
+            with span("lexical_search", "bm25"):
+                hits = lexical.search(description_query, depth)
+            rankings.append([doc_id for doc_id, _ in hits])
+
+        ranked_ids = reciprocal_rank_fusion(rankings, KB_RRF_K)[:top_n]
+        if not ranked_ids:
+            if embedding_error is not None:
+                return {"error": f"Failed to perform search: {embedding_error}"}
+            return []
 
-        results_with_scores.sort(key=lambda x: x[1], reverse=True)
+        # Fetch only the top matches; the vectors already live in the index
+        with span("mongo_read", "api_doc_hydrate"):
+            cursor = api_doc_collection.find({"_id": {"$in": ranked_ids}}, projection)
+            documents_by_id = {document["_id"]: document async for document in cursor}
 
-        return [doc for doc, score in results_with_scores[:top_n]]
+        return [
+            documents_by_id[doc_id]
+            for doc_id in ranked_ids
+            if doc_id in documents_by_id
+        ]
 
     except PyMongoError as e:
         return {"error": str(e)}
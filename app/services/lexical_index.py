@@ -0,0 +1,166 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lower-case terms. Identifiers such as "linkedin_url" are kept
+    whole and also split on underscores, so both exact field names and their
+    parts match.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms, in order, with repeats.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if "_" in token:
+            terms.extend(part for part in token.split("_") if part)
+    return terms
+
+
+def flatten_keys(value: Any) -> List[str]:
+    """
+    Collects every object key in a nested data or response payload.
+
+    Args:
+        value (Any): The payload.
+
+    Returns:
+        List[str]: The keys, depth first.
+    """
+    keys = []
+    if isinstance(value, dict):
+        for key, child in value.items():
+            keys.append(str(key))
+            keys.extend(flatten_keys(child))
+    elif isinstance(value, list):
+        for child in value:
+            keys.extend(flatten_keys(child))
+    return keys
+
+
+def document_text(document: Dict) -> str:
+    """
+    Builds the lexically indexed text of an API document: its name, description
+    and the keys of its data and response payloads.
+
+    Args:
+        document (Dict): The API document.
+
+    Returns:
+        str: The text to index.
+    """
+    parts = [document.get("name", ""), document.get("description", "")]
+    parts.extend(flatten_keys(document.get("data")))
+    parts.extend(flatten_keys(document.get("response")))
+    return " ".join(parts)
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index, updated incrementally as documents change.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        self._lengths: Dict[Any, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: Any, text: str) -> None:
+        """
+        Indexes a document, replacing any previous version with the same id.
+
+        Args:
+            doc_id: The document id.
+            text (str): The document text.
+        """
+        self.remove([doc_id])
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self._postings[term][doc_id] = count
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_ids: Iterable[Any]) -> int:
+        """
+        Removes documents from the index.
+
+        Args:
+            doc_ids (Iterable): The ids to remove.
+
+        Returns:
+            int: The number of documents removed.
+        """
+        removed = set(doc_id for doc_id in doc_ids if doc_id in self._lengths)
+        if not removed:
+            return 0
+        for term in list(self._postings):
+            postings = self._postings[term]
+            for doc_id in removed & postings.keys():
+                del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        for doc_id in removed:
+            self._total_length -= self._lengths.pop(doc_id)
+        return len(removed)
+
+    def search(self, query: str, k: int) -> List[Tuple[Any, float]]:
+        """
+        Scores documents against the query with BM25.
+
+        Args:
+            query (str): The query text.
+            k (int): The number of results to return.
+
+        Returns:
+            List[Tuple[Any, float]]: (id, BM25 score) pairs, best first.
+        """
+        if not self._lengths:
+            return []
+        count = len(self._lengths)
+        average_length = self._total_length / count or 1.0
+        scores: Dict[Any, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (
+                    1 - self.b + self.b * self._lengths[doc_id] / average_length
+                )
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Any]], k: int = 60) -> List:
+    """
+    Merges several rankings of ids by reciprocal rank fusion: each id scores
+    the sum of 1 / (k + rank) over the rankings it appears in.
+
+    Args:
+        rankings (Sequence[Sequence]): Rankings of ids, best first.
+        k (int, optional): Damping constant; larger values flatten rank differences.
+
+    Returns:
+        List: The fused ranking of ids, best first.
+    """
+    scores: Dict[Any, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,117 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+from app.services.vector_index import VectorIndex, read_mapped_header, write_mapped
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, each worker builds its own
+    fcntl = None
+
+# Seconds between attempts to take the build lock while another process holds it
+LOCK_POLL_SECONDS = 0.05
+
+
+@asynccontextmanager
+async def build_lock(path: str) -> AsyncIterator[None]:
+    """
+    Holds an exclusive lock on "<path>.lock", so one process per host builds
+    or replaces the shared index file while the others wait for it. Waiting
+    polls rather than blocking the event loop. An empty path does not lock.
+
+    Args:
+        path (str): The shared index file path.
+    """
+    if not path or fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def mapped_meta(path: str) -> Optional[dict]:
+    """
+    Reads the metadata of the shared index file from its header alone.
+
+    Args:
+        path (str): The shared index file path.
+
+    Returns:
+        Optional[dict]: The metadata, or None if the file is missing or unreadable.
+    """
+    try:
+        return read_mapped_header(path)[0]["meta"]
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            print(f"Error reading shared vector index header: {e}")
+        return None
+
+
+def open_shared_index(
+    path: str,
+    version: int,
+    model: str,
+    id_factory: Callable[[str], Any] = str,
+    **options: Any,
+) -> Optional[VectorIndex]:
+    """
+    Maps the shared index file if it is current.
+
+    Args:
+        path (str): The shared index file path.
+        version (int): The current knowledge base version.
+        model (str): The active embedding model.
+        id_factory (Callable, optional): Converts stored string ids back to ids.
+        **options: Backend options, e.g. nprobe.
+
+    Returns:
+        Optional[VectorIndex]: The mapped index, or None if it is missing or stale.
+    """
+    meta = mapped_meta(path)
+    if meta is None or meta.get("version") != version or meta.get("model") != model:
+        return None
+    try:
+        return VectorIndex.open_mapped(path, id_factory=id_factory, **options)[0]
+    except (OSError, ValueError) as e:
+        print(f"Error mapping shared vector index: {e}")
+        return None
+
+
+async def publish_shared_index(
+    path: str, index: VectorIndex, version: int, model: str
+) -> bool:
+    """
+    Writes an index to the shared file for a new knowledge base version,
+    unless another process already wrote that version or a later one. The
+    write happens off the event loop and the rename makes the new version
+    visible atomically.
+
+    Args:
+        path (str): The shared index file path.
+        index (VectorIndex): The index to write.
+        version (int): The knowledge base version it reflects.
+        model (str): The embedding model of its vectors.
+
+    Returns:
+        bool: True if this call wrote the file.
+    """
+    # Taken now: the index may change while the file is written
+    arrays = index.mapped_arrays()
+    async with build_lock(path):
+        meta = mapped_meta(path) or {}
+        if meta.get("model") == model and meta.get("version", -1) >= version:
+            return False
+        await asyncio.to_thread(
+            write_mapped, path, index.backend, arrays, version=version, model=model
+        )
+    return True
@@ -0,0 +1,78 @@
+from typing import List, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from app.config.llm import (
+    OPENAI_API_KEY,
+    OPENAI_ENDPOINTS,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_TIMEOUT_SECONDS,
+    OPENAI_CONNECT_TIMEOUT_SECONDS,
+    OPENAI_MAX_RETRIES,
+)
+
+# One client per configured endpoint; the first is the primary
+_clients: List[AsyncOpenAI] = []
+
+
+def create_client(base_url: Optional[str]) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=base_url,
+        max_retries=OPENAI_MAX_RETRIES,
+        timeout=httpx.Timeout(
+            OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS
+        ),
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            )
+        ),
+    )
+
+
+def init_openai_client() -> AsyncOpenAI:
+    """
+    Creates the process-wide AsyncOpenAI clients, one per configured endpoint,
+    each with a pooled HTTP connection.
+
+    Returns:
+        AsyncOpenAI: The primary endpoint's client.
+    """
+    global _clients
+    _clients = [create_client(base_url) for base_url in OPENAI_ENDPOINTS]
+    return _clients[0]
+
+
+def get_openai_clients() -> List[AsyncOpenAI]:
+    """
+    Returns the shared clients of every endpoint, creating them on first use
+    outside the app lifespan (e.g. in scripts).
+
+    Returns:
+        List[AsyncOpenAI]: The clients, primary first.
+    """
+    if not _clients:
+        init_openai_client()
+    return _clients
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Returns the primary endpoint's shared AsyncOpenAI client.
+
+    Returns:
+        AsyncOpenAI: The shared client.
+    """
+    return get_openai_clients()[0]
+
+
+async def close_openai_client() -> None:
+    """
+    Closes the shared clients and their connection pools.
+    """
+    global _clients
+    clients, _clients = _clients, []
+    for client in clients:
+        await client.close()
@@ -0,0 +1,252 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from app.config.db import api_doc_collection, kb_meta_collection
+from app.config.knowledge_base import (
+    KB_ACTIVE_MODEL_KEY,
+    KB_INDEX_REFRESH_SECONDS,
+    KB_REEMBED_BATCH_SIZE,
+    KB_REEMBED_JOB_PREFIX,
+    KB_REEMBED_TEXTS_PER_MINUTE,
+    KB_VECTOR_FORMAT,
+)
+from app.models.knowledge_base import ApiDoc
+from app.services.knowledge_base import (
+    bump_kb_version,
+    content_hash,
+    embed_api_docs,
+    embedding_texts,
+    get_active_model,
+    model_field,
+)
+from app.services.vector_codec import encode_vector
+
+# Passes over the collection before giving up on documents that keep failing
+# to embed or keep changing underneath the job
+REEMBED_MAX_PASSES = 3
+
+
+class TextRateLimiter:
+    """
+    Paces embedding requests to at most `texts_per_minute` texts, spreading
+    them evenly rather than in bursts. A limit of 0 disables pacing.
+    """
+
+    def __init__(self, texts_per_minute: int) -> None:
+        self.interval = 60 / texts_per_minute if texts_per_minute > 0 else 0
+        self.next_at = time.monotonic()
+
+    async def wait(self, texts: int) -> None:
+        now = time.monotonic()
+        start = max(now, self.next_at)
+        self.next_at = start + texts * self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def needs_embedding(document: Dict, api_doc: ApiDoc, model: str) -> bool:
+    """
+    Whether a document lacks up-to-date vectors from a model, either as its
+    primary vectors or under "vectors.<model>".
+    """
+    digest = content_hash(api_doc, model)
+    if document.get("content_hash") == digest:
+        return False
+    stored = document.get("vectors", {}).get(model_field(model))
+    return not stored or stored.get("content_hash") != digest
+
+
+async def save_progress(job_id: str, **fields) -> None:
+    await kb_meta_collection.update_one(
+        {"_id": job_id},
+        {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def reembed_pass(
+    model: str,
+    job_id: str,
+    progress: Dict,
+    last_id,
+    batch_size: int,
+    limiter: TextRateLimiter,
+) -> Tuple[int, int]:
+    """
+    Scans the knowledge base in _id order from last_id, embedding documents
+    that need it with the model and storing the vectors under
+    "vectors.<model>". Progress is saved after every batch so an interrupted
+    job resumes where it stopped.
+
+    Args:
+        model (str): The embedding model.
+        job_id (str): The job's progress document in kb_meta.
+        progress (Dict): Running totals, updated in place.
+        last_id: The last document id already handled, or None to start over.
+        batch_size (int): Documents per batch.
+        limiter (TextRateLimiter): Paces the embedding requests.
+
+    Returns:
+        Tuple[int, int]: The documents embedded and failed in this pass.
+    """
+    key = model_field(model)
+    projection = {
+        "name": 1,
+        "description": 1,
+        "data": 1,
+        "response": 1,
+        "content_hash": 1,
+        f"vectors.{key}.content_hash": 1,
+    }
+    embedded = failed = 0
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        cursor = api_doc_collection.find(query, projection).sort("_id", 1)
+        documents = await cursor.limit(batch_size).to_list(length=batch_size)
+        if not documents:
+            return embedded, failed
+
+        pending: List[Tuple[Dict, ApiDoc]] = []
+        for document in documents:
+            fields = {k: v for k, v in document.items() if k in ApiDoc.model_fields}
+            try:
+                api_doc = ApiDoc.model_validate(fields)
+            except ValidationError as e:
+                print(f"Skipping invalid API doc {document['_id']}: {e}")
+                continue
+            if needs_embedding(document, api_doc, model):
+                pending.append((document, api_doc))
+
+        await limiter.wait(sum(len(embedding_texts(d)) for _, d in pending))
+        results = await embed_api_docs([api_doc for _, api_doc in pending], model)
+        operations = []
+        for (document, api_doc), vectors in zip(pending, results):
+            if isinstance(vectors, Exception):
+                print(f"Failed to embed API doc {document['_id']}: {vectors}")
+                failed += 1
+                continue
+            stored = {
+                "vector": encode_vector(vectors[0], KB_VECTOR_FORMAT),
+                "chunks": [encode_vector(v, KB_VECTOR_FORMAT) for v in vectors[1:]],
+                "content_hash": content_hash(api_doc, model),
+            }
+            # Matching the content hash read above leaves documents replaced
+            # meanwhile for the next pass instead of pairing new content with
+            # vectors of the old
+            operations.append(
+                UpdateOne(
+                    {
+                        "_id": document["_id"],
+                        "content_hash": document.get("content_hash"),
+                    },
+                    {"$set": {f"vectors.{key}": stored}},
+                )
+            )
+        if operations:
+            await api_doc_collection.bulk_write(operations, ordered=False)
+        embedded += len(operations)
+
+        last_id = documents[-1]["_id"]
+        progress["scanned"] += len(documents)
+        progress["embedded"] += len(operations)
+        progress["failed"] += len(pending) - len(operations)
+        await save_progress(job_id, last_id=last_id, **progress)
+        print(
+            f"Re-embedding with {model}: {progress['scanned']} scanned, "
+            f"{progress['embedded']} embedded, {progress['failed']} failed"
+        )
+
+
+async def reembed(
+    model: str,
+    batch_size: int = KB_REEMBED_BATCH_SIZE,
+    texts_per_minute: int = KB_REEMBED_TEXTS_PER_MINUTE,
+    activate: bool = True,
+) -> Dict:
+    """
+    Re-embeds the knowledge base with another model without interrupting
+    search. Vectors are written next to the current ones, so searches keep
+    using the active model until every document has vectors from the new one;
+    then the active model is switched in one write and the version bump has
+    every worker rebuild its index. The old vectors are kept, so re-running
+    the job with the previous model switches back without re-embedding.
+
+    The job resumes from its saved progress if interrupted, and repeats passes
+    until a pass over the whole collection finds nothing left to embed, which
+    picks up documents written while it ran.
+
+    Args:
+        model (str): The embedding model to switch to.
+        batch_size (int, optional): Documents per batch.
+        texts_per_minute (int, optional): The embedding rate limit, 0 for none.
+        activate (bool, optional): Whether to switch to the model when done.
+
+    Returns:
+        Dict: The documents scanned, embedded and failed and whether the model
+        was activated, or an error message with the progress so far.
+    """
+    job_id = KB_REEMBED_JOB_PREFIX + model
+    progress = {"scanned": 0, "embedded": 0, "failed": 0}
+    limiter = TextRateLimiter(texts_per_minute)
+    try:
+        job = await kb_meta_collection.find_one({"_id": job_id})
+        last_id: Optional[object] = None
+        if job and job.get("status") == "running":
+            progress = {name: job.get(name, 0) for name in progress}
+            last_id = job.get("last_id")
+            print(f"Resuming re-embedding with {model} after {last_id}")
+        await save_progress(job_id, status="running", last_id=last_id, **progress)
+
+        for passes in range(1, REEMBED_MAX_PASSES + 1):
+            # A resumed pass only covers documents after its saved position, so
+            # only a pass over the whole collection can show nothing is left
+            full_pass = last_id is None
+            embedded, failed = await reembed_pass(
+                model, job_id, progress, last_id, batch_size, limiter
+            )
+            last_id = None
+            await save_progress(job_id, last_id=None)
+            if full_pass and not embedded and not failed:
+                break
+        else:
+            await save_progress(job_id, status="incomplete")
+            return {
+                "error": f"Documents still missing {model} vectors after {passes} passes",
+                **progress,
+            }
+
+        previous = await get_active_model()
+        if not activate or previous == model:
+            await save_progress(job_id, status="complete")
+            return {**progress, "activated": previous == model}
+
+        await kb_meta_collection.update_one(
+            {"_id": KB_ACTIVE_MODEL_KEY},
+            {
+                "$set": {
+                    "model": model,
+                    "previous": previous,
+                    "activated_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+        await bump_kb_version()
+        print(f"Activated embedding model {model} (was {previous})")
+
+        # Writes embedded with the old model just before the switch land within
+        # a refresh interval; cover them before declaring the job complete
+        await asyncio.sleep(KB_INDEX_REFRESH_SECONDS)
+        embedded, _ = await reembed_pass(
+            model, job_id, progress, None, batch_size, limiter
+        )
+        if embedded:
+            await bump_kb_version()
+        await save_progress(job_id, status="complete", last_id=None)
+        return {**progress, "activated": True}
+    except PyMongoError as e:
+        return {"error": str(e), **progress}
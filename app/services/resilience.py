@@ -0,0 +1,277 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+import numpy as np
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+from app.config.llm import (
+    OPENAI_BREAKER_FAILURES,
+    OPENAI_BREAKER_RESET_SECONDS,
+    OPENAI_ENDPOINTS,
+    OPENAI_HEDGE_BUDGET_BURST,
+    OPENAI_HEDGE_BUDGET_RATIO,
+    OPENAI_HEDGE_DEFAULT_DELAY_SECONDS,
+    OPENAI_HEDGE_MIN_DELAY_SECONDS,
+    OPENAI_HEDGE_MIN_SAMPLES,
+    OPENAI_HEDGE_OPERATIONS,
+    OPENAI_HEDGE_PERCENTILE,
+)
+from app.services.openai_client import get_openai_clients
+from app.services.telemetry import Counter
+
+T = TypeVar("T")
+
+# Errors worth retrying on another endpoint; anything else (bad requests,
+# unparseable output) would fail the same way everywhere
+FAILOVER_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Successful call latencies kept per operation to derive the hedge delay
+LATENCY_WINDOW = 500
+
+openai_attempts = Counter(
+    "openai_attempts_total",
+    "OpenAI API attempts by operation, endpoint and result.",
+    ("operation", "endpoint", "result"),
+)
+openai_hedges = Counter(
+    "openai_hedges_total",
+    "Hedged OpenAI requests: sent and won, sent and lost, or skipped for lack "
+    "of hedge budget.",
+    ("operation", "result"),
+)
+openai_failovers = Counter(
+    "openai_failovers_total",
+    "OpenAI requests retried on another endpoint after an error.",
+    ("operation",),
+)
+circuit_transitions = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes per endpoint.",
+    ("endpoint", "state"),
+)
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of one endpoint. After `failures` in a row the
+    circuit opens and the endpoint is skipped; once `reset_seconds` have passed
+    one trial request is let through, which closes the circuit on success and
+    reopens it on failure.
+    """
+
+    def __init__(self, name: str, failures: int, reset_seconds: float) -> None:
+        self.name = name
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+
+    def available(self) -> bool:
+        if self.state == "closed":
+            return True
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return False
+        # One trial request per reset period until a trial reports back; a
+        # trial that was cancelled never does
+        self.opened_at = time.monotonic()
+        if self.state == "open":
+            self.transition("half_open")
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            self.transition("closed")
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or (
+            self.state == "closed" and self.consecutive_failures >= self.failures
+        ):
+            self.opened_at = time.monotonic()
+            self.transition("open")
+
+    def transition(self, state: str) -> None:
+        self.state = state
+        circuit_transitions.inc(endpoint=self.name, state=state)
+        print(f"OpenAI endpoint {self.name} circuit {state}")
+
+
+class HedgeBudget:
+    """
+    Caps hedges at a share of all requests: every request earns `ratio` of a
+    credit, up to `burst`, and every hedge spends one.
+    """
+
+    def __init__(self, ratio: float, burst: float) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.credits = burst
+
+    def earn(self) -> None:
+        self.credits = min(self.burst, self.credits + self.ratio)
+
+    def spend(self) -> bool:
+        if self.credits < 1:
+            return False
+        self.credits -= 1
+        return True
+
+
+class Endpoint:
+    def __init__(self, index: int, base_url: Optional[str]) -> None:
+        self.index = index
+        self.name = urlparse(base_url).netloc if base_url else "api.openai.com"
+        if OPENAI_ENDPOINTS.count(base_url) > 1:
+            self.name = f"{self.name}#{index}"
+        self.breaker = CircuitBreaker(
+            self.name, OPENAI_BREAKER_FAILURES, OPENAI_BREAKER_RESET_SECONDS
+        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_openai_clients()[self.index]
+
+
+class ResilientOpenAI:
+    """
+    Sends OpenAI requests with failover across the configured endpoints,
+    circuit breakers per endpoint and optional hedging: a duplicate request
+    goes out when the first is slower than the recent latency percentile, the
+    first successful response is used and the other request is cancelled.
+    """
+
+    def __init__(self, base_urls: List[Optional[str]]) -> None:
+        self.endpoints = [Endpoint(i, url) for i, url in enumerate(base_urls)]
+        self.latencies: Dict[str, deque] = {}
+        self.budget = HedgeBudget(OPENAI_HEDGE_BUDGET_RATIO, OPENAI_HEDGE_BUDGET_BURST)
+
+    def candidates(self) -> List[Endpoint]:
+        """
+        The endpoints to try, primary first, skipping open circuits. If every
+        circuit is open all endpoints are tried rather than failing outright.
+        """
+        available = [e for e in self.endpoints if e.breaker.available()]
+        return available or list(self.endpoints)
+
+    @contextmanager
+    def session(self, operation: str) -> Iterator[Endpoint]:
+        """
+        Picks the endpoint for a request that cannot be hedged or retried
+        transparently, such as a stream, and reports its outcome to the
+        endpoint's circuit breaker.
+
+        Args:
+            operation (str): The operation, for metrics.
+
+        Yields:
+            Endpoint: The first endpoint whose circuit is not open.
+        """
+        endpoint = self.candidates()[0]
+        try:
+            yield endpoint
+        except FAILOVER_ERRORS:
+            endpoint.breaker.record_failure()
+            openai_attempts.inc(
+                operation=operation, endpoint=endpoint.name, result="error"
+            )
+            raise
+        endpoint.breaker.record_success()
+        openai_attempts.inc(operation=operation, endpoint=endpoint.name, result="ok")
+
+    def hedge_delay(self, operation: str) -> float:
+        samples = self.latencies.get(operation)
+        if not samples or len(samples) < OPENAI_HEDGE_MIN_SAMPLES:
+            return OPENAI_HEDGE_DEFAULT_DELAY_SECONDS
+        delay = float(np.percentile(samples, OPENAI_HEDGE_PERCENTILE))
+        return max(delay, OPENAI_HEDGE_MIN_DELAY_SECONDS)
+
+    def record_latency(self, operation: str, seconds: float) -> None:
+        self.latencies.setdefault(operation, deque(maxlen=LATENCY_WINDOW)).append(
+            seconds
+        )
+
+    async def call(
+        self, operation: str, request: Callable[[AsyncOpenAI], Awaitable[T]]
+    ) -> T:
+        """
+        Makes an OpenAI request with failover and, if enabled for the
+        operation, hedging.
+
+        Args:
+            operation (str): "chat" or "embedding"; keys latency stats and hedging.
+            request (Callable): Makes the request with a given client.
+
+        Returns:
+            The first successful response.
+        """
+        queue = self.candidates()
+        hedging = operation in OPENAI_HEDGE_OPERATIONS
+        if hedging:
+            self.budget.earn()
+        hedge_at = time.monotonic() + self.hedge_delay(operation) if hedging else None
+        # Each in-flight attempt with its endpoint and start time
+        pending: Dict[asyncio.Future, Tuple[Endpoint, float]] = {}
+        hedge: Optional[asyncio.Future] = None
+        last_error: Optional[Exception] = None
+
+        def launch(endpoint: Endpoint) -> asyncio.Future:
+            task = asyncio.ensure_future(request(endpoint.client))
+            pending[task] = (endpoint, time.monotonic())
+            return task
+
+        first = launch(queue.pop(0))
+        try:
+            while pending:
+                timeout = None
+                if hedge_at is not None:
+                    timeout = max(hedge_at - time.monotonic(), 0)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge_at = None
+                    if self.budget.spend():
+                        # With a single endpoint the duplicate goes to it again
+                        hedge = launch(queue.pop(0) if queue else pending[first][0])
+                    else:
+                        openai_hedges.inc(operation=operation, result="skipped_budget")
+                    continue
+                for task in done:
+                    endpoint, started = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        endpoint.breaker.record_success()
+                        openai_attempts.inc(
+                            operation=operation, endpoint=endpoint.name, result="ok"
+                        )
+                        self.record_latency(operation, time.monotonic() - started)
+                        if hedge is not None:
+                            result = "won" if task is hedge else "lost"
+                            openai_hedges.inc(operation=operation, result=result)
+                        return task.result()
+                    openai_attempts.inc(
+                        operation=operation, endpoint=endpoint.name, result="error"
+                    )
+                    if not isinstance(error, FAILOVER_ERRORS):
+                        raise error
+                    endpoint.breaker.record_failure()
+                    last_error = error
+                if not pending and queue:
+                    openai_failovers.inc(operation=operation)
+                    first = launch(queue.pop(0))
+            raise last_error
+        finally:
+            for task, (endpoint, _) in pending.items():
+                task.cancel()
+                openai_attempts.inc(
+                    operation=operation, endpoint=endpoint.name, result="cancelled"
+                )
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+resilient_openai = ResilientOpenAI(OPENAI_ENDPOINTS)
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from app.services.deadline import deadline_var
+from app.services.telemetry import Counter
+
+T = TypeVar("T")
+
+singleflight_calls = Counter(
+    "singleflight_calls_total",
+    "Calls through a single-flight group, by whether they ran the work or "
+    "joined a call already in flight.",
+    ("group", "result"),
+)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key onto one execution. The first
+    caller starts the work; callers arriving while it is in flight await the
+    same result, or the same exception. The key is forgotten as soon as the work
+    finishes, so nothing is cached beyond the flight itself.
+    """
+
+    def __init__(self, group: str) -> None:
+        self.group = group
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs fn() for key, or joins the run already in flight for it.
+
+        The work runs in its own task: a caller that is cancelled or times out
+        stops waiting without cancelling it for the others. It runs without the
+        starting caller's deadline, since that caller's budget says nothing
+        about the callers joining it; each caller bounds its own wait instead.
+
+        Args:
+            key (Hashable): Identifies identical calls.
+            fn (Callable): Starts the work; only called by the first caller.
+
+        Returns:
+            The work's result.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            singleflight_calls.inc(group=self.group, result="coalesced")
+            return await asyncio.shield(flight)
+
+        singleflight_calls.inc(group=self.group, result="leader")
+        flight = asyncio.ensure_future(self._run(fn))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(flight)
+
+    @staticmethod
+    async def _run(fn: Callable[[], Awaitable[T]]) -> T:
+        deadline_var.set(None)
+        return await fn()
+
+    def _land(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception retrieved even if every caller stopped waiting
+        if not flight.cancelled():
+            flight.exception()
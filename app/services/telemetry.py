@@ -0,0 +1,377 @@
+import json
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from app.config.telemetry import TELEMETRY_LOG_REQUESTS, TELEMETRY_LOG_SPANS
+
+# Latency buckets in seconds, from sub-millisecond index scans to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+# Per-request totals of stage time and token usage, logged when the request ends
+request_stats_var: ContextVar[Optional[dict]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Base class for metrics rendered in the Prometheus text exposition format.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count, per label combination.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(
+                f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+            )
+        return lines
+
+
+class Histogram(Metric):
+    """
+    A distribution of observations in cumulative buckets, per label combination.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: bucket counts, observation count and sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, (list(b), c, s)) for key, (b, c, s) in self._values.items()]
+        for key, (buckets, count, total) in items:
+            for bound, bucket_count in zip(self.buckets, buckets):
+                labels = format_labels(self.labelnames, key, le=format_value(bound))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = format_labels(self.labelnames, key, le="+Inf")
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+registry: List[Metric] = []
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status.",
+    ("method", "route", "status"),
+)
+stage_seconds = Histogram(
+    "stage_duration_seconds",
+    "Latency of request stages (embedding, scoring, mongo, llm, tool).",
+    ("stage", "operation"),
+)
+stage_errors = Counter(
+    "stage_errors_total",
+    "Stage executions that raised an exception.",
+    ("stage", "operation"),
+)
+llm_tokens = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the OpenAI API, by model and kind.",
+    ("model", "kind"),
+)
+agent_turns_aborted = Counter(
+    "agent_turns_aborted_total",
+    "Agent turns ended with a fallback reply, by reason.",
+    ("reason",),
+)
+embedding_cache_lookups = Counter(
+    "embedding_cache_lookups_total",
+    "Query embedding cache lookups by result.",
+    ("result",),
+)
+answer_cache_lookups = Counter(
+    "answer_cache_lookups_total",
+    "Semantic answer cache lookups by result.",
+    ("result",),
+)
+answer_cache_invalidations = Counter(
+    "answer_cache_invalidations_total",
+    "Cached answers dropped because a source API doc changed or the knowledge "
+    "base was reloaded.",
+    ("reason",),
+)
+answer_cache_saved_seconds = Counter(
+    "answer_cache_saved_seconds_total",
+    "Answer latency avoided by answer cache hits, as measured when each answer "
+    "was first produced.",
+)
+
+
+def render_metrics() -> str:
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition body.
+    """
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def log_event(event: str, **fields) -> None:
+    """
+    Prints a structured JSON log line tagged with the current trace id.
+
+    Args:
+        event (str): The event name.
+        **fields: Additional JSON-serializable fields.
+    """
+    record = {"event": event, "trace_id": trace_id_var.get(), **fields}
+    print(json.dumps(record, default=str))
+
+
+def observe_stage(stage: str, operation: str, seconds: float, error: bool = False):
+    """
+    Records the duration of one stage execution in the stage histogram and in
+    the current request's totals.
+
+    Args:
+        stage (str): The stage, e.g. "llm" or "mongo_read".
+        operation (str): What ran in the stage, e.g. the model or tool name.
+        seconds (float): How long it took.
+        error (bool, optional): Whether it raised. Defaults to False.
+    """
+    stage_seconds.observe(seconds, stage=stage, operation=operation)
+    if error:
+        stage_errors.inc(stage=stage, operation=operation)
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats["stages"][stage] = stats["stages"].get(stage, 0.0) + seconds
+    if TELEMETRY_LOG_SPANS:
+        log_event(
+            "span",
+            stage=stage,
+            operation=operation,
+            duration_ms=round(seconds * 1000, 2),
+            error=error,
+        )
+
+
+@contextmanager
+def span(stage: str, operation: str = "") -> Iterator[None]:
+    """
+    Times the enclosed block as one execution of a stage. Works around awaits.
+
+    Args:
+        stage (str): The stage name.
+        operation (str, optional): What runs in the stage.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe_stage(stage, operation, time.perf_counter() - start, error)
+
+
+def record_usage(model: str, usage) -> None:
+    """
+    Counts the tokens reported in an OpenAI response's usage block.
+
+    Args:
+        model (str): The model that served the request.
+        usage: The response's usage object, or None if it has none.
+    """
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    llm_tokens.inc(prompt, model=model, kind="prompt")
+    if completion:
+        llm_tokens.inc(completion, model=model, kind="completion")
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats["tokens"]["prompt"] += prompt
+        stats["tokens"]["completion"] += completion
+
+
+class TelemetryMiddleware:
+    """
+    ASGI middleware that gives every request a trace id (taken from the
+    X-Trace-Id header when the caller sends one), records its latency and logs
+    one structured line with its per-stage breakdown when the response ends.
+    Being plain ASGI, streamed responses are timed until their last chunk.
+    """
+
+    header = b"x-trace-id"
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id = headers.get(self.header, b"").decode("latin-1") or new_trace_id()
+        trace_token = trace_id_var.set(trace_id)
+        stats = {"stages": {}, "tokens": {"prompt": 0, "completion": 0}}
+        stats_token = request_stats_var.set(stats)
+        start = time.perf_counter()
+        status = {"code": 500}
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            elapsed = time.perf_counter() - start
+            # Raw paths of unmatched requests (scanners, typos) would give every
+            # one its own series, so they share a single label
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_seconds.observe(
+                elapsed,
+                method=scope.get("method", ""),
+                route=path,
+                status=str(status["code"]),
+            )
+            if TELEMETRY_LOG_REQUESTS and path != "/metrics":
+                log_event(
+                    "request",
+                    method=scope.get("method", ""),
+                    route=path,
+                    status=status["code"],
+                    duration_ms=round(elapsed * 1000, 2),
+                    stages_ms={
+                        stage: round(seconds * 1000, 2)
+                        for stage, seconds in stats["stages"].items()
+                    },
+                    tokens=stats["tokens"],
+                )
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", []))
+                    + [(self.header, trace_id.encode("latin-1"))],
+                }
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            finish()
+            request_stats_var.reset(stats_token)
+            trace_id_var.reset(trace_token)
@@ -0,0 +1,76 @@
+from typing import Any, Sequence
+import numpy as np
+from bson.binary import Binary, USER_DEFINED_SUBTYPE
+
+# Binary subtypes for packed vectors. Float32 vectors are the raw little-endian
+# values; int8 vectors are a float32 scale followed by one signed byte per value.
+FLOAT32_SUBTYPE = USER_DEFINED_SUBTYPE
+INT8_SUBTYPE = USER_DEFINED_SUBTYPE + 1
+
+VECTOR_FORMATS = ("list", "float32", "int8")
+
+
+def encode_vector(vector: Sequence[float], fmt: str) -> Any:
+    """
+    Encodes a vector for storage in MongoDB.
+
+    Args:
+        vector (Sequence[float]): The vector.
+        fmt (str): "list" (a plain array of doubles), "float32" (packed float32
+            Binary) or "int8" (scalar-quantized Binary with a per-vector scale).
+
+    Returns:
+        Any: The value to store.
+    """
+    if fmt == "list":
+        return [float(value) for value in vector]
+    values = np.asarray(vector, dtype="<f4")
+    if fmt == "float32":
+        return Binary(values.tobytes(), FLOAT32_SUBTYPE)
+    if fmt == "int8":
+        peak = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = np.float32(peak / 127 if peak else 1.0)
+        quantized = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+        return Binary(
+            np.asarray([scale], dtype="<f4").tobytes() + quantized.tobytes(),
+            INT8_SUBTYPE,
+        )
+    raise ValueError(f"Unknown vector format {fmt!r}; expected one of {VECTOR_FORMATS}")
+
+
+def decode_vector(value: Any) -> np.ndarray:
+    """
+    Decodes a stored vector in any supported format. Packed float32 vectors are
+    read without copying.
+
+    Args:
+        value (Any): The stored value.
+
+    Returns:
+        np.ndarray: The vector as float32.
+    """
+    if isinstance(value, Binary):
+        if value.subtype == FLOAT32_SUBTYPE:
+            return np.frombuffer(value, dtype="<f4")
+        if value.subtype == INT8_SUBTYPE:
+            scale = np.frombuffer(value, dtype="<f4", count=1)[0]
+            return (
+                np.frombuffer(value, dtype=np.int8, offset=4).astype(np.float32) * scale
+            )
+        raise ValueError(f"Unknown vector binary subtype {value.subtype}")
+    return np.asarray(value, dtype=np.float32)
+
+
+def vector_format(value: Any) -> str:
+    """
+    Identifies the storage format of a stored vector.
+
+    Args:
+        value (Any): The stored value.
+
+    Returns:
+        str: One of VECTOR_FORMATS.
+    """
+    if isinstance(value, Binary):
+        return "float32" if value.subtype == FLOAT32_SUBTYPE else "int8"
+    return "list"
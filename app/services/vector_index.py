@@ -0,0 +1,518 @@
+import json
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Collection, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+# Memory-mapped index files: magic bytes, header length, JSON header, then each
+# array as raw little-endian data starting on an ALIGNMENT-byte boundary
+MAPPED_MAGIC = b"KBVIDX01"
+ALIGNMENT = 64
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scales each row of a matrix to unit length so dot products are cosine scores.
+
+    Args:
+        matrix (numpy.ndarray): A 2-D array of vectors.
+
+    Returns:
+        numpy.ndarray: A contiguous float32 array of unit-length rows.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the positions of the k highest scores, best first.
+
+    Args:
+        scores (numpy.ndarray): A 1-D array of scores.
+        k (int): The number of positions to return.
+
+    Returns:
+        numpy.ndarray: The positions of the top k scores in descending order.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex(ABC):
+    """
+    Interface for the process-resident API doc vector index.
+
+    Vectors are kept pre-normalized in one contiguous float32 matrix, so every
+    backend scores with dot products. Backends differ in which rows they scan.
+    """
+
+    backend = "base"
+
+    def __init__(self) -> None:
+        self.ids: List[Any] = []
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    def build(self, ids: Sequence[Any], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Replaces the index contents with the given ids and vectors.
+
+        Args:
+            ids (Sequence): The document ids, one per vector.
+            vectors (Sequence): The document vectors.
+        """
+        self.ids = list(ids)
+        if self.ids:
+            self._matrix = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        else:
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = len(self.ids)
+
+    def add(self, doc_id: Any, vector: Sequence[float]) -> int:
+        """
+        Appends a single vector, growing the backing matrix geometrically.
+
+        Args:
+            doc_id: The document id.
+            vector (Sequence[float]): The document vector.
+
+        Returns:
+            int: The row position of the new vector.
+        """
+        row = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        if self._size == 0 and self._matrix.shape[1] != row.shape[1]:
+            self._matrix = np.empty((0, row.shape[1]), dtype=np.float32)
+        if row.shape[1] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Vector dimension {row.shape[1]} does not match index dimension {self._matrix.shape[1]}"
+            )
+        if self._size == self._matrix.shape[0]:
+            grown = np.empty(
+                (max(16, self._size * 2), self._matrix.shape[1]), dtype=np.float32
+            )
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size] = row[0]
+        self.ids.append(doc_id)
+        self._size += 1
+        return self._size - 1
+
+    def remove(self, doc_ids: Collection[Any]) -> int:
+        """
+        Removes every vector belonging to the given ids, compacting the matrix.
+
+        Args:
+            doc_ids (Collection): The ids to remove.
+
+        Returns:
+            int: The number of vectors removed.
+        """
+        keep = np.array(
+            [i for i, doc_id in enumerate(self.ids) if doc_id not in doc_ids],
+            dtype=np.int64,
+        )
+        removed = self._size - len(keep)
+        if removed:
+            self._matrix = np.ascontiguousarray(self.matrix[keep])
+            self.ids = [self.ids[i] for i in keep]
+            self._size = len(keep)
+            self._compact(keep)
+        return removed
+
+    def _compact(self, keep: np.ndarray) -> None:
+        """
+        Updates backend-specific structures after rows were removed.
+
+        Args:
+            keep (numpy.ndarray): The old positions of the remaining rows, in order.
+        """
+
+    def search(self, query: Sequence[float], k: int) -> List[Tuple[Any, float]]:
+        """
+        Finds the k vectors most similar to the query.
+
+        Args:
+            query (Sequence[float]): The query vector.
+            k (int): The number of results to return.
+
+        Returns:
+            List[Tuple[Any, float]]: (id, cosine score) pairs, best first.
+        """
+        if self._size == 0:
+            return []
+        query_vector = normalize_rows(
+            np.asarray(query, dtype=np.float32).reshape(1, -1)
+        )[0]
+        if len(query_vector) != self._matrix.shape[1]:
+            raise ValueError(
+                f"Query dimension {len(query_vector)} does not match index dimension {self._matrix.shape[1]}"
+            )
+        positions, scores = self._score(query_vector)
+        return [(self.ids[positions[i]], float(scores[i])) for i in top_k(scores, k)]
+
+    @abstractmethod
+    def _score(self, query_vector: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a normalized query against the candidate rows of the index.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: Candidate row positions and their scores.
+        """
+
+    def _state(self) -> dict:
+        """
+        Returns the backend-specific arrays to persist in a snapshot.
+        """
+        return {}
+
+    def _restore(self, state: dict) -> None:
+        """
+        Restores the backend-specific arrays saved by _state.
+        """
+
+    def save(self, path: str, **meta: Any) -> None:
+        """
+        Writes the index to an .npz snapshot, atomically replacing any existing file.
+
+        Args:
+            path (str): The snapshot file path.
+            **meta: Extra scalar metadata stored alongside (e.g. the KB version).
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                backend=np.array(self.backend),
+                ids=np.array([str(doc_id) for doc_id in self.ids], dtype=str),
+                matrix=self.matrix,
+                **{f"meta_{key}": np.array(value) for key, value in meta.items()},
+                **self._state(),
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(
+        path: str, id_factory: Callable[[str], Any] = str, **options: Any
+    ) -> Tuple["VectorIndex", dict]:
+        """
+        Reads an index snapshot written by save.
+
+        Args:
+            path (str): The snapshot file path.
+            id_factory (Callable, optional): Converts stored string ids back to ids.
+            **options: Backend options, e.g. nprobe, overriding the saved ones.
+
+        Returns:
+            Tuple[VectorIndex, dict]: The index and the metadata saved with it.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        index = create_index(str(arrays.pop("backend")), **options)
+        index.ids = [id_factory(doc_id) for doc_id in arrays.pop("ids")]
+        index._matrix = np.ascontiguousarray(arrays.pop("matrix"), dtype=np.float32)
+        index._size = len(index.ids)
+        meta = {
+            key[len("meta_") :]: arrays.pop(key).item()
+            for key in list(arrays)
+            if key.startswith("meta_")
+        }
+        index._restore(arrays)
+        return index, meta
+
+    def mapped_arrays(self) -> dict:
+        """
+        Returns the arrays save_mapped writes: the matrix, the id table and any
+        backend arrays. Later adds and removes do not modify them in place, so
+        they can be written out while the index keeps changing.
+        """
+        return {
+            "matrix": np.ascontiguousarray(self.matrix, dtype="<f4"),
+            "ids": np.array([str(doc_id).encode() for doc_id in self.ids], dtype="S"),
+            **self._state(),
+        }
+
+    def save_mapped(self, path: str, **meta: Any) -> None:
+        """
+        Writes the index as a memory-mappable file with write_mapped.
+
+        Args:
+            path (str): The index file path.
+            **meta: Extra metadata stored in the header (e.g. the KB version).
+        """
+        write_mapped(path, self.backend, self.mapped_arrays(), **meta)
+
+    @staticmethod
+    def open_mapped(
+        path: str, id_factory: Callable[[str], Any] = str, **options: Any
+    ) -> Tuple["VectorIndex", dict]:
+        """
+        Opens an index file written by write_mapped. The matrix is mapped
+        read-only rather than read, so processes opening the same file share
+        its pages; vectors added later go to a private copy.
+
+        Args:
+            path (str): The index file path.
+            id_factory (Callable, optional): Converts stored string ids back to ids.
+            **options: Backend options, e.g. nprobe, overriding the saved ones.
+
+        Returns:
+            Tuple[VectorIndex, dict]: The index and the metadata saved with it.
+        """
+        header, data_start = read_mapped_header(path)
+        arrays = {}
+        for name, section in header["sections"].items():
+            dtype, shape = np.dtype(section["dtype"]), tuple(section["shape"])
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=data_start + section["offset"],
+                shape=shape,
+            ).view(np.ndarray)
+        index = create_index(header["backend"], **options)
+        index.ids = [id_factory(doc_id.decode()) for doc_id in arrays.pop("ids")]
+        index._matrix = arrays.pop("matrix")
+        index._size = len(index.ids)
+        index._restore(arrays)
+        return index, header["meta"]
+
+
+def write_mapped(path: str, backend: str, arrays: dict, **meta: Any) -> None:
+    """
+    Writes a memory-mappable index file: a header, then the contiguous float32
+    matrix, the id table and any backend arrays. The file is written beside the
+    target and renamed over it, so processes that mapped the old file keep
+    reading it until they reopen.
+
+    Args:
+        path (str): The index file path.
+        backend (str): The index backend.
+        arrays (dict): The arrays from VectorIndex.mapped_arrays.
+        **meta: Extra metadata stored in the header (e.g. the KB version).
+    """
+    sections, offset = {}, 0
+    for name, array in arrays.items():
+        sections[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({"backend": backend, "meta": meta, "sections": sections})
+    header = header.encode("utf-8")
+    data_start = -(-(len(MAPPED_MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAPPED_MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + sections[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_mapped_header(path: str) -> Tuple[dict, int]:
+    """
+    Reads the header of an index file written by write_mapped.
+
+    Args:
+        path (str): The index file path.
+
+    Returns:
+        Tuple[dict, int]: The header and the file offset where the arrays start.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAPPED_MAGIC) + 8)
+        if prefix[: len(MAPPED_MAGIC)] != MAPPED_MAGIC:
+            raise ValueError(f"{path} is not a mapped vector index")
+        (length,) = struct.unpack("<Q", prefix[len(MAPPED_MAGIC) :])
+        header = json.loads(f.read(length))
+    data_start = -(-(len(prefix) + length) // ALIGNMENT) * ALIGNMENT
+    return header, data_start
+
+
+class ExactIndex(VectorIndex):
+    """
+    Brute-force index scoring every row with a single matrix-vector product.
+    """
+
+    backend = "exact"
+
+    def _score(self, query_vector: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.arange(self._size), self.matrix @ query_vector
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index with a spherical k-means coarse quantizer.
+
+    Rows are bucketed by their nearest centroid and stored bucket-contiguous, so
+    a query scans only the slices of its nprobe nearest buckets. Raising nprobe
+    trades latency for recall. Rows added after training are kept in per-bucket
+    overflow lists until the next build.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, iterations: int = 10) -> None:
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self._bounds = np.empty(0, dtype=np.int64)
+        self._trained_size = 0
+        self._overflow: List[List[int]] = []
+
+    def build(self, ids: Sequence[Any], vectors: Sequence[Sequence[float]]) -> None:
+        super().build(ids, vectors)
+        self._train()
+
+    def add(self, doc_id: Any, vector: Sequence[float]) -> int:
+        position = super().add(doc_id, vector)
+        if self.centroids is None:
+            return position
+        cluster = int(np.argmax(self.centroids @ self._matrix[position]))
+        # Grown with the matrix's capacity, so only the first _size are valid
+        if self.assignments.shape[0] < self._matrix.shape[0]:
+            grown = np.empty(self._matrix.shape[0], dtype=np.int32)
+            grown[:position] = self.assignments[:position]
+            self.assignments = grown
+        self.assignments[position] = cluster
+        self._overflow[cluster].append(position)
+        return position
+
+    def _compact(self, keep: np.ndarray) -> None:
+        if self.centroids is None:
+            return
+        # Rows keep their relative order, so the trained prefix stays bucket-sorted
+        self.assignments = self.assignments[keep]
+        self._trained_size = int(np.count_nonzero(keep < self._trained_size))
+        self._build_lists()
+
+    def _train(self) -> None:
+        """
+        Runs spherical k-means over the indexed vectors, then reorders the rows so
+        each bucket is a contiguous slice of the matrix. Indexes too small to
+        benefit are left untrained and scanned exhaustively.
+        """
+        nlist = self.nlist or int(np.sqrt(self._size))
+        if nlist < 2 or self._size < nlist * 4:
+            self.centroids = None
+            return
+
+        rng = np.random.default_rng(0)
+        sample = self.matrix
+        if self._size > nlist * 256:
+            sample = sample[rng.choice(self._size, nlist * 256, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = normalize_rows(centroids)
+        self.centroids = centroids
+
+        assignments = self._assign(self.matrix)
+        order = np.argsort(assignments, kind="stable")
+        self._matrix = np.ascontiguousarray(self.matrix[order])
+        self.ids = [self.ids[i] for i in order]
+        self.assignments = assignments[order]
+        self._trained_size = self._size
+        self._build_lists()
+
+    def _assign(self, vectors: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        labels = [
+            np.argmax(vectors[start : start + batch_size] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), batch_size)
+        ]
+        return np.concatenate(labels).astype(np.int32)
+
+    def _build_lists(self) -> None:
+        self._bounds = np.searchsorted(
+            self.assignments[: self._trained_size],
+            np.arange(len(self.centroids) + 1),
+        )
+        self._overflow = [[] for _ in range(len(self.centroids))]
+        for position in range(self._trained_size, self._size):
+            self._overflow[self.assignments[position]].append(position)
+
+    def _score(self, query_vector: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None:
+            return np.arange(self._size), self.matrix @ query_vector
+        positions, scores = [], []
+        for cluster in top_k(self.centroids @ query_vector, self.nprobe):
+            start, end = self._bounds[cluster], self._bounds[cluster + 1]
+            positions.append(np.arange(start, end))
+            scores.append(self._matrix[start:end] @ query_vector)
+            if self._overflow[cluster]:
+                extra = np.array(self._overflow[cluster])
+                positions.append(extra)
+                scores.append(self._matrix[extra] @ query_vector)
+        return np.concatenate(positions), np.concatenate(scores)
+
+    def _state(self) -> dict:
+        if self.centroids is None:
+            return {}
+        return {
+            "centroids": self.centroids,
+            "assignments": self.assignments[: self._size],
+            "trained_size": np.array(self._trained_size),
+        }
+
+    def _restore(self, state: dict) -> None:
+        if "centroids" in state:
+            self.centroids = np.ascontiguousarray(state["centroids"], dtype=np.float32)
+            self.assignments = state["assignments"].astype(np.int32)
+            self._trained_size = int(state["trained_size"])
+            self._build_lists()
+
+
+INDEX_BACKENDS = {"exact": ExactIndex, "ivf": IVFIndex}
+
+
+def create_index(backend: str = "exact", **options: Any) -> VectorIndex:
+    """
+    Instantiates a vector index backend by name.
+
+    Args:
+        backend (str, optional): One of INDEX_BACKENDS. Defaults to "exact".
+        **options: Backend-specific options, e.g. nlist and nprobe for "ivf".
+
+    Returns:
+        VectorIndex: An empty index.
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(
+            f"Unknown vector index backend '{backend}', expected one of {sorted(INDEX_BACKENDS)}"
+        )
+    if backend == "exact":
+        return ExactIndex()
+    return INDEX_BACKENDS[backend](**options)
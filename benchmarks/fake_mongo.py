@@ -0,0 +1,130 @@
+"""
+In-memory MongoDB stand-in for offline benchmarks, built on mongomock-motor.
+
+install() swaps the service's database and collections for in-memory ones,
+optionally adding a fixed round-trip latency to every operation so results
+resemble a networked database. It must run after the app modules are imported.
+
+Requires mongomock-motor (pip install mongomock-motor); it is not a runtime
+dependency of the service.
+"""
+
+import asyncio
+import sys
+from typing import Any
+
+# Collection methods that are awaited directly, and ones that return cursors
+AWAITABLE_METHODS = {
+    "bulk_write",
+    "count_documents",
+    "create_index",
+    "delete_many",
+    "delete_one",
+    "find_one",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "replace_one",
+    "update_many",
+    "update_one",
+}
+CURSOR_METHODS = {"find", "aggregate"}
+
+
+class DelayedCursor:
+    """
+    Wraps a cursor so the first read pays one round trip of latency.
+    """
+
+    def __init__(self, cursor: Any, latency: float) -> None:
+        self._cursor = cursor
+        self._latency = latency
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self._latency)
+        return await self._cursor.to_list(length)
+
+    async def __aiter__(self):
+        await asyncio.sleep(self._latency)
+        async for document in self._cursor:
+            yield document
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class FakeCollection:
+    """
+    Proxies an in-memory collection, adding latency and papering over
+    mongomock's bulk_write, which rejects operations from newer pymongo releases.
+    """
+
+    def __init__(self, collection: Any, latency: float) -> None:
+        self._collection = collection
+        self._latency = latency
+
+    async def _sequential_bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            filter_, document = operation._filter, operation._doc
+            upsert = bool(getattr(operation, "_upsert", False))
+            if type(operation).__name__ == "ReplaceOne":
+                await self._collection.replace_one(filter_, document, upsert=upsert)
+            else:
+                await self._collection.update_one(filter_, document, upsert=upsert)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._collection, name)
+        if name in CURSOR_METHODS:
+            return lambda *args, **kwargs: DelayedCursor(
+                attribute(*args, **kwargs), self._latency
+            )
+        if name not in AWAITABLE_METHODS:
+            return attribute
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self._latency)
+            if name == "bulk_write":
+                try:
+                    return await attribute(*args, **kwargs)
+                except TypeError:
+                    return await self._sequential_bulk_write(*args, **kwargs)
+            return await attribute(*args, **kwargs)
+
+        return call
+
+
+def install(latency_ms: float = 0.0) -> Any:
+    """
+    Replaces the MongoDB database and collections referenced by every loaded
+    app module with in-memory equivalents.
+
+    Args:
+        latency_ms (float, optional): Delay added to each operation. Defaults to 0.
+
+    Returns:
+        The in-memory database.
+    """
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit(
+            "The in-memory MongoDB needs mongomock-motor: pip install mongomock-motor"
+        )
+    import app.config.db as config
+
+    latency = latency_ms / 1000
+    client = AsyncMongoMockClient()
+    database = client[config.MONGO_DB or "benchmark"]
+    replacements = {id(config.client): client, id(config.db): database}
+    for name, value in list(vars(config).items()):
+        if name.endswith("_collection"):
+            fake = FakeCollection(database[value.name], latency)
+            replacements[id(value)] = fake
+
+    for module_name, module in list(sys.modules.items()):
+        if module_name != "app" and not module_name.startswith("app."):
+            continue
+        for name, value in list(vars(module).items()):
+            if id(value) in replacements:
+                setattr(module, name, replacements[id(value)])
+    return database
@@ -0,0 +1,259 @@
+"""
+Local stand-in for the OpenAI chat completions and embeddings APIs.
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:9000/v1.
+
+When a request offers tools and its last message is from the user, the stub
+first answers with a call to the first tool (its required string arguments set
+to the user's message), so each turn exercises the agent's tool loop. Set
+--tool-call-rate to the share of turns that do so.
+
+To exercise hedging, failover and circuit breakers, --slow-rate adds --slow-ms
+of latency to a random share of requests (a latency tail) and --error-rate
+answers a random share with 503.
+
+Usage:
+    python -m benchmarks.fake_openai --port 9000 --latency-ms 300 --tool-call-rate 1
+    python -m benchmarks.fake_openai --port 9001 --slow-rate 0.05 --slow-ms 3000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Optional
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+EMBEDDING_DIM = 1536
+
+app = FastAPI(title="Fake OpenAI")
+app.state.latency_ms = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "0"))
+app.state.embedding_latency_ms = float(
+    os.getenv("FAKE_OPENAI_EMBEDDING_LATENCY_MS", "0")
+)
+app.state.tool_call_rate = float(os.getenv("FAKE_OPENAI_TOOL_CALL_RATE", "1"))
+app.state.slow_rate = float(os.getenv("FAKE_OPENAI_SLOW_RATE", "0"))
+app.state.slow_ms = float(os.getenv("FAKE_OPENAI_SLOW_MS", "0"))
+app.state.error_rate = float(os.getenv("FAKE_OPENAI_ERROR_RATE", "0"))
+
+
+async def inject_faults(latency_ms: float) -> Optional[JSONResponse]:
+    """
+    Sleeps for the configured latency, plus the slow-request penalty for a
+    random share of requests, and fails a random share with 503.
+
+    Returns:
+        Optional[JSONResponse]: The error response, or None to answer normally.
+    """
+    if random.random() < app.state.slow_rate:
+        latency_ms += app.state.slow_ms
+    await asyncio.sleep(latency_ms / 1000)
+    if random.random() < app.state.error_rate:
+        return JSONResponse(
+            {"error": {"message": "Injected failure", "type": "server_error"}},
+            status_code=503,
+        )
+    return None
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """
+    Returns a deterministic unit vector derived from the text, so identical
+    texts always embed identically.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def usage(prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def stub_tool_call(body: dict) -> Optional[dict]:
+    """
+    Decides whether this turn calls a tool and, if so, builds the call. The
+    decision is a hash of the user's message, so runs are reproducible.
+    """
+    last = body["messages"][-1]
+    if not body.get("tools") or last.get("role") != "user":
+        return None
+    text = str(last.get("content", ""))
+    bucket = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:2], "big")
+    if bucket / 65536 >= app.state.tool_call_rate:
+        return None
+
+    function = body["tools"][0]["function"]
+    parameters = function.get("parameters", {})
+    arguments = {}
+    for name in parameters.get("required", []):
+        types = parameters.get("properties", {}).get(name, {}).get("type")
+        arguments[name] = text if types == "string" else None
+    return {
+        "id": f"call_stub_{time.time_ns()}",
+        "type": "function",
+        "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    try:
+        body = await request.json()
+    except ClientDisconnect:
+        # A hedged request cancelled by the client before it was sent in full
+        return Response(status_code=499)
+    failure = await inject_faults(app.state.latency_ms)
+    if failure is not None:
+        return failure
+
+    last = body["messages"][-1]
+    tool_call = stub_tool_call(body)
+    content = None
+    if tool_call is None:
+        content = json.dumps(
+            {
+                "content": f"Stub answer to: {str(last.get('content', ''))[:80]}",
+                "show_to_user": True,
+            }
+        )
+    prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body["messages"])
+    completion_tokens = len(content or tool_call["function"]["arguments"]) // 4
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_chunks(body, content, tool_call, prompt_tokens),
+            media_type="text/event-stream",
+        )
+    message = {"role": "assistant", "content": content, "refusal": None}
+    if tool_call is not None:
+        message["tool_calls"] = [tool_call]
+    return {
+        "id": f"chatcmpl-stub-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "stop" if tool_call is None else "tool_calls",
+                "logprobs": None,
+            }
+        ],
+        "usage": usage(prompt_tokens, completion_tokens),
+    }
+
+
+async def stream_chunks(
+    body: dict,
+    content: Optional[str],
+    tool_call: Optional[dict],
+    prompt_tokens: int,
+    chunk_size: int = 8,
+):
+    """
+    Streams a completion as chat.completion.chunk events, a few characters at a
+    time, ending with a usage chunk when the request asks for one.
+    """
+    base = {
+        "id": f"chatcmpl-stub-{time.time_ns()}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+    }
+    text = content if tool_call is None else tool_call["function"]["arguments"]
+    for start in range(0, len(text), chunk_size):
+        piece = text[start : start + chunk_size]
+        if tool_call is None:
+            delta = {"content": piece}
+        else:
+            function = {"arguments": piece}
+            call = {"index": 0, "function": function}
+            if start == 0:
+                call.update(id=tool_call["id"], type="function")
+                function["name"] = tool_call["function"]["name"]
+            delta = {"tool_calls": [call]}
+        if start == 0:
+            delta["role"] = "assistant"
+        chunk = {
+            **base,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    finish_reason = "stop" if tool_call is None else "tool_calls"
+    chunk = {
+        **base,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+    }
+    yield f"data: {json.dumps(chunk)}\n\n"
+    if (body.get("stream_options") or {}).get("include_usage"):
+        chunk = {
+            **base,
+            "choices": [],
+            "usage": usage(prompt_tokens, len(text) // 4),
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    try:
+        body = await request.json()
+    except ClientDisconnect:
+        return Response(status_code=499)
+    failure = await inject_faults(app.state.embedding_latency_ms)
+    if failure is not None:
+        return failure
+
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    return {
+        "object": "list",
+        "model": body.get("model", "stub"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": usage(sum(len(t) // 4 for t in inputs), 0),
+    }
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=app.state.latency_ms)
+    parser.add_argument(
+        "--embedding-latency-ms", type=float, default=app.state.embedding_latency_ms
+    )
+    parser.add_argument(
+        "--tool-call-rate", type=float, default=app.state.tool_call_rate
+    )
+    parser.add_argument("--slow-rate", type=float, default=app.state.slow_rate)
+    parser.add_argument("--slow-ms", type=float, default=app.state.slow_ms)
+    parser.add_argument("--error-rate", type=float, default=app.state.error_rate)
+    args = parser.parse_args()
+
+    app.state.latency_ms = args.latency_ms
+    app.state.embedding_latency_ms = args.embedding_latency_ms
+    app.state.tool_call_rate = args.tool_call_rate
+    app.state.slow_rate = args.slow_rate
+    app.state.slow_ms = args.slow_ms
+    app.state.error_rate = args.error_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Concurrent /send load test against a running service.
+
+Start the stub LLM server and the service pointed at it, then run the test:
+    python -m benchmarks.fake_openai --latency-ms 300
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 python server.py
+    python -m benchmarks.load_send --url http://127.0.0.1:8000 --concurrency 1 4 16 64
+
+With a non-blocking LLM client, throughput should grow roughly linearly with
+concurrency while per-request latency stays near the stub latency.
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+
+
+async def start_conversations(client: httpx.AsyncClient, count: int) -> list:
+    conversation_ids = []
+    for i in range(count):
+        response = await client.post("/start", json={"user_id": f"load-{i}"})
+        response.raise_for_status()
+        conversation_ids.append(response.json()["conversation_id"])
+    return conversation_ids
+
+
+async def send(client: httpx.AsyncClient, conversation_id: str, user_id: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        "/send",
+        json={
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "message": "How do I search people by title?",
+        },
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run_level(
+    client: httpx.AsyncClient, conversation_ids: list, concurrency: int, requests: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int) -> float:
+        async with semaphore:
+            return await send(
+                client, conversation_ids[i % len(conversation_ids)], f"load-{i}"
+            )
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(worker(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(
+        f"{concurrency:>12}{requests / elapsed:>10.1f}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests-per-level", type=int, default=128)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        conversation_ids = await start_conversations(client, max(args.concurrency))
+        print(
+            f"{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for concurrency in args.concurrency:
+            await run_level(
+                client, conversation_ids, concurrency, args.requests_per_level
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
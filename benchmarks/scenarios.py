@@ -0,0 +1,274 @@
+"""
+Scripted load scenarios for /start, /send and /knowledge_base/search with
+latency percentiles, throughput and a per-stage breakdown taken from /metrics.
+
+By default everything runs offline in this process: the service is driven
+through its ASGI interface, MongoDB is the in-memory stand-in from
+benchmarks.fake_mongo and OpenAI is the stub from benchmarks.fake_openai served
+on a local port. Pass --url to drive an already running service instead.
+
+Usage:
+    python -m benchmarks.scenarios --scenario search send --concurrency 1 8 32
+    python -m benchmarks.scenarios --docs 5000 --mongo-latency-ms 1 --llm-latency-ms 300
+    python -m benchmarks.scenarios --url http://127.0.0.1:8000 --scenario search
+    OPENAI_HEDGE_OPERATIONS=chat,embedding python -m benchmarks.scenarios \
+        --scenario send --endpoints 2 --llm-slow-rate 0.05 --llm-slow-ms 3000
+
+Exits non-zero when --max-p95-ms is given and any level exceeds it, so it can
+gate a deploy.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+import httpx
+import numpy as np
+from benchmarks.synthetic_kb import generate_api_docs, generate_queries
+
+METRIC_LINE = re.compile(r'^stage_duration_seconds_(sum|count)\{stage="([^"]*)"')
+
+
+def parse_stage_totals(exposition: str) -> Dict[str, List[float]]:
+    """
+    Sums the stage histogram's _sum and _count series per stage.
+    """
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for line in exposition.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, stage = match.groups()
+            totals[stage][0 if kind == "sum" else 1] += float(line.rsplit(" ", 1)[1])
+    return totals
+
+
+async def stage_totals(client: httpx.AsyncClient) -> Dict[str, List[float]]:
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return parse_stage_totals(response.text)
+
+
+def start_fake_openai(args: argparse.Namespace) -> str:
+    """
+    Serves the stub OpenAI API from a background thread on a free local port.
+    Every server started shares the same latency and fault settings.
+
+    Returns:
+        str: The base URL to use as OPENAI_BASE_URL.
+    """
+    import uvicorn
+    from benchmarks import fake_openai
+
+    fake_openai.app.state.latency_ms = args.llm_latency_ms
+    fake_openai.app.state.embedding_latency_ms = args.embedding_latency_ms
+    fake_openai.app.state.slow_rate = args.llm_slow_rate
+    fake_openai.app.state.slow_ms = args.llm_slow_ms
+    fake_openai.app.state.error_rate = args.llm_error_rate
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(fake_openai.app, host="127.0.0.1", port=port, log_level="error")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+class Scenario:
+    """
+    A named request generator. prepare() runs untimed setup; request(i) issues
+    the i-th timed request.
+    """
+
+    def __init__(self, name: str, client: httpx.AsyncClient, queries: List[str]):
+        self.name = name
+        self.client = client
+        self.queries = queries
+        self.conversations: List[str] = []
+
+    async def prepare(self, concurrency: int) -> None:
+        if self.name == "send":
+            # One conversation per concurrent user, so turns on a conversation
+            # stay sequential as they would in a real chat
+            while len(self.conversations) < concurrency:
+                response = await self.client.post(
+                    "/start", json={"user_id": f"bench-{len(self.conversations)}"}
+                )
+                response.raise_for_status()
+                self.conversations.append(response.json()["conversation_id"])
+
+    async def request(self, i: int, worker: int) -> httpx.Response:
+        query = self.queries[i % len(self.queries)]
+        if self.name == "start":
+            return await self.client.post("/start", json={"user_id": f"bench-{i}"})
+        if self.name == "search":
+            return await self.client.post(
+                "/knowledge_base/search",
+                params={"description_query": query, "top_k": 5},
+            )
+        return await self.client.post(
+            "/send",
+            json={
+                "conversation_id": self.conversations[worker],
+                "user_id": f"bench-{worker}",
+                "message": query,
+            },
+        )
+
+
+async def run_level(scenario: Scenario, concurrency: int, requests: int) -> Dict:
+    """
+    Runs one scenario at one concurrency level.
+
+    Returns:
+        Dict: Latency percentiles, throughput, error count and stage breakdown.
+    """
+    await scenario.prepare(concurrency)
+    before = await stage_totals(scenario.client)
+    counter = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(i, worker_id)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await stage_totals(scenario.client)
+
+    stages = {}
+    for stage, (total, count) in after.items():
+        delta = total - before.get(stage, [0.0, 0.0])[0]
+        calls = count - before.get(stage, [0.0, 0.0])[1]
+        if calls:
+            stages[stage] = (delta * 1000 / requests, calls / requests)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "rps": requests / elapsed,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "errors": errors,
+        "stages": stages,
+    }
+
+
+def print_level(name: str, concurrency: int, result: Dict) -> None:
+    print(
+        f"{name:<8}{concurrency:>6}{result['rps']:>9.1f}{result['p50']:>9.1f}"
+        f"{result['p95']:>9.1f}{result['p99']:>9.1f}{result['errors']:>8}"
+    )
+    for stage, (ms, calls) in sorted(result["stages"].items()):
+        print(f"{'':<14}{stage:<16}{ms:>9.2f} ms/req{calls:>7.2f} calls/req")
+
+
+async def run(args: argparse.Namespace, client_factory: Callable) -> int:
+    failed = False
+    async with client_factory() as client:
+        if args.docs:
+            docs = generate_api_docs(args.docs, args.seed)
+            for start in range(0, len(docs), 500):
+                response = await client.post(
+                    "/knowledge_base/bulk_insert", json=docs[start : start + 500]
+                )
+                response.raise_for_status()
+        queries = generate_queries(max(args.requests, 100), args.seed + 1)
+        random.Random(args.seed).shuffle(queries)
+
+        print(
+            f"{'scenario':<8}{'conc':>6}{'req/s':>9}{'p50 ms':>9}"
+            f"{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+        )
+        for name in args.scenario:
+            scenario = Scenario(name, client, queries)
+            for concurrency in args.concurrency:
+                result = await run_level(scenario, concurrency, args.requests)
+                print_level(name, concurrency, result)
+                if args.max_p95_ms and result["p95"] > args.max_p95_ms:
+                    failed = True
+                failed = failed or result["errors"] > 0
+    return 1 if failed else 0
+
+
+async def run_offline(args: argparse.Namespace) -> int:
+    # Several stub servers stand in for separate endpoints to fail over between
+    urls = [start_fake_openai(args) for _ in range(args.endpoints)]
+    os.environ["OPENAI_BASE_URL"] = urls[0]
+    os.environ["OPENAI_ENDPOINTS"] = ",".join(urls)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017")
+    os.environ.setdefault("MONGO_DB", "benchmark")
+    os.environ.setdefault("MONGO_API_DOC_COLLECTION", "api_docs")
+    os.environ.setdefault("MONGO_CONVERSATIONS_COLLECTION", "conversations")
+    os.environ.setdefault("TELEMETRY_LOG_REQUESTS", "false")
+    # A handful of simulated users send every message; don't rate limit them
+    os.environ.setdefault("USER_RATE_LIMIT_PER_MINUTE", "0")
+    os.environ.setdefault("USER_TOKEN_BUDGET_PER_MINUTE", "0")
+
+    # The app reads its configuration at import time
+    from app.main import app
+    from benchmarks import fake_mongo
+
+    fake_mongo.install(args.mongo_latency_ms)
+    async with app.router.lifespan_context(app):
+        return await run(
+            args,
+            lambda: httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://benchmark",
+                timeout=120,
+            ),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=["start", "search", "send"],
+        default=["start", "search", "send"],
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Drive a running service instead")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50)
+    parser.add_argument("--mongo-latency-ms", type=float, default=1)
+    parser.add_argument("--endpoints", type=int, default=1)
+    parser.add_argument("--llm-slow-rate", type=float, default=0)
+    parser.add_argument("--llm-slow-ms", type=float, default=0)
+    parser.add_argument("--llm-error-rate", type=float, default=0)
+    parser.add_argument("--max-p95-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    if args.url:
+        code = asyncio.run(
+            run(args, lambda: httpx.AsyncClient(base_url=args.url, timeout=120))
+        )
+    else:
+        code = asyncio.run(run_offline(args))
+    raise SystemExit(code)
+
+
+if __name__ == "__main__":
+    main()
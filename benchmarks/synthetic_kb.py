@@ -0,0 +1,132 @@
+"""
+Synthetic API docs shaped like the Crustdata catalog, for load tests.
+
+Usage:
+    python -m benchmarks.synthetic_kb --docs 2000 > docs.jsonl
+    python manage.py load-kb docs.jsonl
+"""
+
+import argparse
+import json
+import random
+from typing import Dict, List
+
+ENTITIES = [
+    "company",
+    "person",
+    "job_listing",
+    "funding_round",
+    "headcount",
+    "web_traffic",
+    "linkedin_post",
+    "investor",
+    "employee_review",
+    "product",
+]
+ACTIONS = ["search", "enrich", "screen", "list", "get", "autocomplete"]
+FIELDS = [
+    "company_name",
+    "company_domain",
+    "linkedin_url",
+    "linkedin_id",
+    "headcount",
+    "hq_country",
+    "industry",
+    "title",
+    "seniority",
+    "region",
+    "founded_year",
+    "total_funding_usd",
+    "last_funding_date",
+    "employee_growth_6m",
+    "monthly_visitors",
+    "job_title",
+    "job_location",
+    "posted_at",
+    "reactions",
+    "rating",
+]
+PHRASES = [
+    "Returns {entity} records matching the given filters.",
+    "Use this endpoint to {action} {entity} data by {field}.",
+    "Supports pagination with page and limit parameters.",
+    "Results are sorted by {field} in descending order.",
+    "Requires an API token in the Authorization header.",
+    "Filters can be combined with AND/OR conditions on {field}.",
+    "Responses include {field} and {other} for every {entity}.",
+]
+
+
+def generate_api_doc(i: int, rng: random.Random) -> Dict:
+    """
+    Generates one synthetic API doc with a description, request parameters and
+    a response example.
+    """
+    entity, action = rng.choice(ENTITIES), rng.choice(ACTIONS)
+    fields = rng.sample(FIELDS, rng.randint(4, 10))
+    words = {"entity": entity.replace("_", " "), "action": action}
+    description = " ".join(
+        phrase.format(field=rng.choice(fields), other=rng.choice(fields), **words)
+        for phrase in rng.sample(PHRASES, rng.randint(2, 4))
+    )
+    data = {field: f"<{field}>" for field in fields[: rng.randint(1, 4)]}
+    data["page"] = 1
+    response = [
+        {field: f"example {field} {row}" for field in fields} for row in range(2)
+    ]
+    return {
+        "name": f"/{entity}/{action}_v{i}",
+        "description": description,
+        "data": data,
+        "response": response,
+    }
+
+
+def generate_api_docs(count: int, seed: int = 0) -> List[Dict]:
+    """
+    Generates reproducible synthetic API docs.
+
+    Args:
+        count (int): The number of docs.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        List[Dict]: ApiDoc-shaped dictionaries.
+    """
+    rng = random.Random(seed)
+    return [generate_api_doc(i, rng) for i in range(count)]
+
+
+def generate_queries(count: int, seed: int = 1) -> List[str]:
+    """
+    Generates user questions in the style the agent receives.
+    """
+    rng = random.Random(seed)
+    templates = [
+        "How do I {action} {entity} by {field}?",
+        "Which API returns {field} for a {entity}?",
+        "Can I filter {entity} results on {field} and {other}?",
+        "{field}",
+    ]
+    return [
+        rng.choice(templates).format(
+            action=rng.choice(ACTIONS),
+            entity=rng.choice(ENTITIES).replace("_", " "),
+            field=rng.choice(FIELDS),
+            other=rng.choice(FIELDS),
+        )
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for doc in generate_api_docs(args.docs, args.seed):
+        print(json.dumps(doc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Recall@k vs latency of the approximate vector index backends against the exact one.
+
+Usage:
+    python -m benchmarks.vector_index --docs 20000 --queries 200 --k 10
+"""
+
+import argparse
+import time
+import numpy as np
+from app.services.vector_index import ExactIndex, IVFIndex
+
+
+def synthetic_embeddings(
+    n: int, dim: int, topics: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Generates vectors that mimic text embeddings: a topic direction plus a
+    position in a shared low-rank "meaning" space, plus a little noise. Nearest
+    neighbours mostly share a topic but neighbourhoods overlap across topics.
+    """
+    latent_dim = 64
+    centers = rng.standard_normal((topics, latent_dim)).astype(np.float32)
+    labels = rng.integers(0, topics, n)
+    latent = centers[labels] + rng.standard_normal((n, latent_dim)).astype(np.float32)
+    projection = rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    noise = rng.standard_normal((n, dim)).astype(np.float32)
+    return latent @ projection + noise * 2.0
+
+
+def run_queries(index, queries: np.ndarray, k: int):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([doc_id for doc_id, _ in index.search(query, k)])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return results, elapsed_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = synthetic_embeddings(args.docs + args.queries, args.dim, args.topics, rng)
+    docs, queries = vectors[: args.docs], vectors[args.docs :]
+    ids = list(range(args.docs))
+
+    exact = ExactIndex()
+    exact.build(ids, docs)
+    truth, exact_ms = run_queries(exact, queries, args.k)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(nlist=args.nlist)
+    ivf.build(ids, docs)
+    build_s = time.perf_counter() - start
+
+    print(f"docs={args.docs} dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"ivf nlist={len(ivf.centroids)} built in {build_s:.1f}s")
+    print(f"{'backend':<10}{'nprobe':>8}{'recall@k':>10}{'ms/query':>10}")
+    print(f"{'exact':<10}{'-':>8}{1.0:>10.3f}{exact_ms:>10.2f}")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        results, ivf_ms = run_queries(ivf, queries, args.k)
+        recall = np.mean(
+            [len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]
+        )
+        print(f"{'ivf':<10}{nprobe:>8}{recall:>10.3f}{ivf_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Storage size, decode time, memory and recall of the vector storage formats.
+
+Each format is encoded into BSON documents the way they are stored in MongoDB,
+then decoded back into an index matrix the way the service loads them.
+
+Usage:
+    python -m benchmarks.vector_storage --docs 5000 --queries 200 --k 10
+"""
+
+import argparse
+import sys
+import time
+import bson
+import numpy as np
+from benchmarks.vector_index import run_queries, synthetic_embeddings
+from app.services.vector_codec import VECTOR_FORMATS, decode_vector, encode_vector
+from app.services.vector_index import ExactIndex
+
+
+def decoded_footprint(value) -> int:
+    """
+    Approximates the Python heap used by one decoded BSON vector value.
+    """
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = synthetic_embeddings(args.docs + args.queries, args.dim, args.topics, rng)
+    docs, queries = vectors[: args.docs], vectors[args.docs :]
+    ids = list(range(args.docs))
+
+    exact = ExactIndex()
+    exact.build(ids, docs.astype(np.float64))
+    truth, _ = run_queries(exact, queries, args.k)
+
+    print(f"docs={args.docs} dim={args.dim} k={args.k} queries={args.queries}")
+    print(
+        f"{'format':<10}{'bson KB/doc':>12}{'decode ms':>11}"
+        f"{'heap MB':>10}{'recall@k':>10}"
+    )
+    for fmt in VECTOR_FORMATS:
+        payload = b"".join(
+            bson.encode({"_id": i, "vector": encode_vector(v, fmt)})
+            for i, v in enumerate(docs)
+        )
+
+        start = time.perf_counter()
+        documents = bson.decode_all(payload)
+        matrix = np.vstack([decode_vector(d["vector"]) for d in documents])
+        decode_ms = (time.perf_counter() - start) * 1000
+
+        heap = sum(decoded_footprint(d["vector"]) for d in documents) + matrix.nbytes
+        index = ExactIndex()
+        index.build(ids, matrix)
+        results, _ = run_queries(index, queries, args.k)
+        recall = np.mean(
+            [len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]
+        )
+        print(
+            f"{fmt:<10}{len(payload) / args.docs / 1024:>12.1f}{decode_ms:>11.0f}"
+            f"{heap / 2**20:>10.1f}{recall:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
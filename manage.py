@@ -0,0 +1,130 @@
+"""
+Maintenance commands for the support agent.
+
+Usage:
+    python manage.py load-kb docs.jsonl [docs2.json ...]
+    python manage.py migrate-vectors --format int8
+    python manage.py reembed --model text-embedding-3-large
+"""
+
+import argparse
+import asyncio
+import json
+from app.config.knowledge_base import (
+    KB_REEMBED_BATCH_SIZE,
+    KB_REEMBED_TEXTS_PER_MINUTE,
+    KB_VECTOR_FORMAT,
+)
+from app.services.knowledge_base import (
+    bulk_insert_api_docs,
+    migrate_vectors,
+    parse_api_docs,
+)
+from app.services.reembed import reembed
+from app.services.vector_codec import VECTOR_FORMATS
+from app.services.openai_client import close_openai_client
+
+
+async def load_kb(args: argparse.Namespace) -> int:
+    """
+    Loads API docs from JSON or JSONL files into the knowledge base.
+
+    Returns:
+        int: The process exit code, non-zero if any document failed.
+    """
+    failed = 0
+    try:
+        for path in args.paths:
+            with open(path, encoding="utf-8") as f:
+                api_docs, invalid = parse_api_docs(f.read())
+            result = await bulk_insert_api_docs(api_docs) if api_docs else None
+            if result is not None and "error" in result:
+                print(f"{path}: {result['error']}")
+                failed += len(api_docs)
+                continue
+
+            items = (result["items"] if result else []) + [
+                {**failure, "status": "failed"} for failure in invalid
+            ]
+            counts = {status: 0 for status in ("inserted", "updated", "unchanged")}
+            for item in items:
+                if item["status"] == "failed":
+                    failed += 1
+                    label = item.get("name") or f"item {item['item']}"
+                    print(f"{path}: {label}: {item['error']}")
+                else:
+                    counts[item["status"]] += 1
+            print(f"{path}: {json.dumps(counts)}")
+    finally:
+        await close_openai_client()
+    return 1 if failed else 0
+
+
+async def migrate_vectors_command(args: argparse.Namespace) -> int:
+    """
+    Rewrites stored document vectors in the requested storage format.
+
+    Returns:
+        int: The process exit code, non-zero on failure.
+    """
+    result = await migrate_vectors(args.format, args.batch_size)
+    print(json.dumps(result))
+    return 1 if "error" in result else 0
+
+
+async def reembed_command(args: argparse.Namespace) -> int:
+    """
+    Re-embeds the knowledge base with another model and switches search to it.
+
+    Returns:
+        int: The process exit code, non-zero on failure.
+    """
+    try:
+        result = await reembed(
+            args.model, args.batch_size, args.rate, activate=not args.no_activate
+        )
+    finally:
+        await close_openai_client()
+    print(json.dumps(result))
+    return 1 if "error" in result else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load-kb", help="Load API docs from JSON or JSONL files")
+    load.add_argument("paths", nargs="+")
+    load.set_defaults(handler=load_kb)
+
+    migrate = commands.add_parser(
+        "migrate-vectors", help="Rewrite stored vectors in another storage format"
+    )
+    migrate.add_argument("--format", choices=VECTOR_FORMATS, default=KB_VECTOR_FORMAT)
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.set_defaults(handler=migrate_vectors_command)
+
+    re_embed = commands.add_parser(
+        "reembed", help="Re-embed all API docs with another model, then switch to it"
+    )
+    re_embed.add_argument("--model", required=True)
+    re_embed.add_argument("--batch-size", type=int, default=KB_REEMBED_BATCH_SIZE)
+    re_embed.add_argument(
+        "--rate",
+        type=int,
+        default=KB_REEMBED_TEXTS_PER_MINUTE,
+        help="Most texts embedded per minute, 0 for no limit",
+    )
+    re_embed.add_argument(
+        "--no-activate",
+        action="store_true",
+        help="Only write the vectors; leave the active model unchanged",
+    )
+    re_embed.set_defaults(handler=reembed_command)
+
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(args.handler(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+
+# The config modules read these at import time; the unit tests never connect to
+# MongoDB or call OpenAI
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "test")
+os.environ.setdefault("MONGO_API_DOC_COLLECTION", "api_docs")
+os.environ.setdefault("MONGO_CONVERSATIONS_COLLECTION", "conversations")
+os.environ.setdefault("OPENAI_API_KEY", "test")
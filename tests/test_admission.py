@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from app.services import admission
+from app.services.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    MemoryBucketStore,
+)
+from app.services.telemetry import request_stats_var
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_bucket_grants_up_to_capacity_then_refills():
+    store = MemoryBucketStore()
+
+    async def take():
+        return await store.update("user", 2, 1, 1, 1)
+
+    assert run(take())[0] and run(take())[0]
+    granted, tokens = run(take())
+    assert not granted and tokens == pytest.approx(0, abs=0.01)
+
+    # Pretend a second passed since the last update
+    store._buckets["user"][1] -= 1
+    assert run(take())[0]
+
+
+def test_bucket_store_drops_least_recently_used_keys():
+    store = MemoryBucketStore(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        run(store.update(key, 1, 1, 0, 0))
+
+    assert list(store._buckets) == ["a", "c"]
+
+
+def test_rate_limit_rejects_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "USER_RATE_LIMIT_PER_MINUTE", 60)
+    monkeypatch.setattr(admission, "USER_RATE_LIMIT_BURST", 1)
+    monkeypatch.setattr(admission, "USER_TOKEN_BUDGET_PER_MINUTE", 0)
+    controller = AdmissionController(MemoryBucketStore())
+
+    run(controller.check_user("u"))
+    with pytest.raises(AdmissionRejected) as rejected:
+        run(controller.check_user("u"))
+
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "1"}
+    run(controller.check_user("someone else"))
+
+
+def test_token_budget_is_charged_on_release(monkeypatch):
+    monkeypatch.setattr(admission, "USER_RATE_LIMIT_PER_MINUTE", 0)
+    monkeypatch.setattr(admission, "USER_TOKEN_BUDGET_PER_MINUTE", 60)
+    monkeypatch.setattr(admission, "USER_TOKEN_BUDGET_BURST", 100)
+    controller = AdmissionController(MemoryBucketStore())
+
+    async def turn(tokens: int):
+        request_stats_var.set({"stages": {}, "tokens": {"prompt": tokens}})
+        async with await controller.admit("u"):
+            pass
+
+    # A turn is admitted while the budget is positive, even if it overdraws it
+    run(turn(150))
+    with pytest.raises(AdmissionRejected) as rejected:
+        run(turn(0))
+    assert rejected.value.status_code == 429
+
+
+def test_queue_full_and_queue_timeout_return_503():
+    async def scenario():
+        controller = AdmissionController(
+            MemoryBucketStore(), max_in_flight=1, max_queue=1, queue_timeout=0.05
+        )
+        await controller.acquire_slot()
+        waiter = asyncio.ensure_future(controller.acquire_slot())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire_slot()
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await waiter
+        return controller, full.value, timed_out.value
+
+    controller, full, timed_out = run(scenario())
+
+    assert full.status_code == timed_out.status_code == 503
+    assert controller.in_flight == 1 and controller.waiting == 0
+
+
+def test_release_frees_the_slot_once():
+    async def scenario():
+        controller = AdmissionController(
+            MemoryBucketStore(), max_in_flight=1, max_queue=1, queue_timeout=1
+        )
+        await controller.acquire_slot()
+        waiter = asyncio.ensure_future(controller.acquire_slot())
+        await asyncio.sleep(0)
+        ticket = admission.AdmissionTicket(controller, "u")
+        await ticket.release()
+        await ticket.release()
+        await waiter
+        return controller
+
+    controller = run(scenario())
+
+    assert controller.in_flight == 1
+    assert controller.slots.locked()
@@ -0,0 +1,185 @@
+import asyncio
+import anyio
+import pytest
+from app.agent import agent as agent_module
+from app.agent.agent import Agent, OpenAIResponse
+from app.agent.config import FALLBACK_MESSAGES
+from app.services.telemetry import agent_turns_aborted
+
+
+class FakeConversationService:
+    """
+    Records what the agent stores and journals instead of writing to MongoDB.
+    """
+
+    def __init__(self) -> None:
+        self.stored = []
+        self.writes = 0
+        self.journals = {}
+        self.fail = False
+
+    async def store_messages(self, conversation_id, message_objs, journal_id=None):
+        await asyncio.sleep(0)
+        if self.fail:
+            return False
+        self.writes += 1
+        self.stored.extend((m.role, m.content) for m in message_objs)
+        return True
+
+    async def journal_messages(self, conversation_id, journal_id, message_objs):
+        await asyncio.sleep(0)
+        self.journals.setdefault(journal_id, []).extend(message_objs)
+
+    async def clear_journal(self, conversation_id, journal_id):
+        await asyncio.sleep(0)
+        self.journals.pop(journal_id, None)
+
+
+@pytest.fixture
+def service():
+    return FakeConversationService()
+
+
+@pytest.fixture
+def agent(service):
+    return Agent({"content": "system"}, "conversation", service, tools={})
+
+
+def answer(content: str, show_to_user: bool = True):
+    return OpenAIResponse(content=content, show_to_user=show_to_user), "assistant"
+
+
+def test_turn_is_stored_in_one_write_and_its_journal_cleared(agent, service):
+    replies = iter([answer("thinking", False), answer("done")])
+
+    async def call_llm():
+        # Nothing is written until the turn ends, only journaled
+        assert service.writes == 0 and service.journals
+        return next(replies)
+
+    agent.call_llm = call_llm
+
+    assert asyncio.run(agent.interact("hello")) == "done"
+
+    assert service.writes == 1
+    assert service.stored == [
+        ("user", "hello"),
+        ("assistant", "thinking"),
+        ("assistant", "done"),
+    ]
+    assert service.journals == {}
+    assert agent.pending_messages == []
+
+
+def test_failed_flush_keeps_messages_buffered_and_journaled(agent, service):
+    agent.call_llm = lambda: asyncio.sleep(0, answer("done"))
+    service.fail = True
+
+    asyncio.run(agent.interact("hello"))
+
+    assert service.stored == []
+    assert [m.content for m in agent.pending_messages] == ["hello", "done"]
+    assert [m.content for m in service.journals[agent.journal_id]] == [
+        "hello",
+        "done",
+    ]
+    # Every message carries the journal it can be replayed from
+    assert {m.journal_id for m in agent.pending_messages} == {agent.journal_id}
+
+    service.fail = False
+    assert asyncio.run(agent.flush())
+    assert service.stored == [("user", "hello"), ("assistant", "done")]
+    assert service.journals == {}
+
+
+def test_disconnected_stream_still_stores_the_turn(agent, service):
+    async def stream_routed():
+        yield {"event": "token", "data": {"content": "Hel"}}
+        await asyncio.sleep(60)
+
+    agent._Agent__stream_routed = stream_routed
+    events = []
+
+    async def client():
+        # Starlette cancels the response's task group when the client leaves
+        with anyio.CancelScope() as scope:
+            async for event in agent.interact_stream("hello"):
+                events.append(event)
+                scope.cancel()
+
+    asyncio.run(client())
+
+    assert events == [{"event": "token", "data": {"content": "Hel"}}]
+    assert service.stored == [("user", "hello")]
+    assert service.journals == {}
+
+
+def test_turn_stops_after_max_iterations(agent, service, monkeypatch):
+    monkeypatch.setattr(agent_module, "AGENT_MAX_ITERATIONS", 2)
+    calls = []
+
+    async def call_llm():
+        calls.append(True)
+        return None, "tools"
+
+    agent.call_llm = call_llm
+    aborted = agent_turns_aborted.value(reason="max_iterations")
+
+    reply = asyncio.run(agent.interact("hello"))
+
+    assert len(calls) == 2
+    assert reply == FALLBACK_MESSAGES["max_iterations"]
+    assert service.stored[-1] == ("assistant", reply)
+    assert agent_turns_aborted.value(reason="max_iterations") == aborted + 1
+
+
+def test_turn_past_its_deadline_makes_no_llm_call(agent, service, monkeypatch):
+    monkeypatch.setattr(agent_module, "AGENT_TURN_TIMEOUT_SECONDS", 0)
+
+    async def call_llm():
+        raise AssertionError("the LLM should not be called")
+
+    agent.call_llm = call_llm
+
+    assert asyncio.run(agent.interact("hello")) == FALLBACK_MESSAGES["deadline"]
+    assert service.stored == [
+        ("user", "hello"),
+        ("assistant", FALLBACK_MESSAGES["deadline"]),
+    ]
+
+
+def test_llm_failure_is_reported_as_deadline_once_time_is_up(agent, monkeypatch):
+    async def failed_call_llm():
+        return None, None
+
+    agent.call_llm = failed_call_llm
+    assert asyncio.run(agent.interact("hello")) == FALLBACK_MESSAGES["llm_error"]
+
+    monkeypatch.setattr(agent_module, "AGENT_TURN_TIMEOUT_SECONDS", 0.01)
+
+    async def slow_failed_call_llm():
+        await asyncio.sleep(0.02)
+        return None, None
+
+    agent.call_llm = slow_failed_call_llm
+    assert asyncio.run(agent.interact("again")) == FALLBACK_MESSAGES["deadline"]
+
+
+def test_failed_stream_ends_with_the_fallback_reply(agent, service):
+    async def stream_routed():
+        yield {"event": "token", "data": {"content": "Hel"}}
+        raise ConnectionError("stream reset")
+
+    agent._Agent__stream_routed = stream_routed
+
+    async def client():
+        return [event async for event in agent.interact_stream("hello")]
+
+    events = asyncio.run(client())
+
+    reply = FALLBACK_MESSAGES["llm_error"]
+    assert events[1:] == [
+        {"event": "message", "data": {"content": reply, "show_to_user": True}},
+        {"event": "done", "data": {"content": reply}},
+    ]
+    assert service.stored == [("user", "hello"), ("assistant", reply)]
@@ -0,0 +1,87 @@
+import pytest
+from app.agent import context
+from app.agent.context import build_context
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # 4 characters per token, so a 36-character message costs 10 + 4 tokens
+    monkeypatch.setattr(context, "get_encoding", lambda: None)
+    monkeypatch.setattr(context, "CONTEXT_KEEP_RECENT_MESSAGES", 2)
+
+
+def history(count: int) -> list:
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[(count - 1 - i) % 2], "content": str(i) * 36}
+        for i in range(count)
+    ]
+
+
+def test_older_messages_fill_the_budget_newest_first():
+    messages = history(10)
+
+    sent, first = build_context("sys", messages, budget=5 + 14 * 5)
+
+    assert first == 5
+    assert sent[0] == {"role": "system", "content": "sys"}
+    assert sent[1:] == messages[5:]
+
+
+def test_current_turn_and_recent_messages_are_kept_over_budget():
+    messages = history(10)
+    messages[7:] = [
+        {"role": "user", "content": "question"},
+        {"role": "function", "name": "search", "content": "x" * 5000},
+        {"role": "assistant", "content": "answer"},
+    ]
+
+    sent, first = build_context("sys", messages, budget=0)
+
+    assert first == 7
+    assert sent[1:] == messages[7:]
+
+
+def test_old_tool_results_are_compacted(monkeypatch):
+    monkeypatch.setattr(context, "CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS", 10)
+    messages = [
+        {"role": "user", "content": "first"},
+        {"role": "function", "name": "search", "content": "x" * 5000},
+        {"role": "assistant", "content": "a"},
+        {"role": "user", "content": "b"},
+        {"role": "assistant", "content": "c"},
+        {"role": "user", "content": "d"},
+    ]
+
+    sent, first = build_context("sys", messages)
+
+    assert first == 0
+    assert sent[2]["content"] == "x" * 40 + " ...[truncated]"
+    assert sent[3:] == messages[2:]
+
+
+def test_summary_replaces_the_messages_it_covers():
+    messages = history(10)
+
+    sent, first = build_context("sys", messages, {"content": "earlier", "upto": 6})
+
+    assert first == 6
+    assert sent[1]["content"] == "Summary of the earlier conversation:\nearlier"
+    assert sent[2:] == messages[6:]
+
+
+def test_unknown_model_without_encoding_files_estimates(monkeypatch):
+    monkeypatch.undo()
+    monkeypatch.setattr(context, "MODEL_NAME", "not-a-model")
+
+    def unreachable(name):
+        assert name == "o200k_base"
+        raise OSError("network unreachable")
+
+    monkeypatch.setattr(context.tiktoken, "get_encoding", unreachable)
+    context.get_encoding.cache_clear()
+    try:
+        assert context.get_encoding() is None
+        assert context.count_tokens("x" * 40) == 11
+    finally:
+        context.get_encoding.cache_clear()
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import subprocess
+import sys
+import pytest
+from bson import ObjectId
+from app.models import Message
+from app.services import conversation
+from app.services.conversation import ConversationService
+
+
+class FakeConversations:
+    """
+    Just enough of a conversations collection for store_messages.
+    """
+
+    def __init__(self, *conversation_ids: str) -> None:
+        self.documents = {
+            ObjectId(conversation_id): {"messages": [], "version": 0}
+            for conversation_id in conversation_ids
+        }
+        self.fail = False
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError("MongoDB is unreachable")
+        document = self.documents.get(query["_id"])
+        skip = query.get("messages.journal_id", {}).get("$ne")
+        if document is None or any(
+            message.get("journal_id") == skip for message in document["messages"]
+        ):
+            return None
+        document["messages"].extend(update["$push"]["messages"]["$each"])
+        document["version"] += update["$inc"]["version"]
+        return {"version": document["version"]}
+
+
+CONVERSATION_ID = str(ObjectId())
+
+
+@pytest.fixture
+def wal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversation, "CONVERSATION_WAL_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def service():
+    service = ConversationService(db=None)
+    service.conversations_collection = FakeConversations(CONVERSATION_ID)
+    return service
+
+
+def stored(service: ConversationService) -> list:
+    document = service.conversations_collection.documents[ObjectId(CONVERSATION_ID)]
+    return [message["content"] for message in document["messages"]]
+
+
+def message(content: str, journal_id: str) -> Message:
+    return Message(
+        role="user", content=content, status="message_sent", journal_id=journal_id
+    )
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def write_journal(wal_dir, pid: int, journal_id: str, *contents: str) -> str:
+    path = wal_dir / f"{CONVERSATION_ID}.{pid}.{journal_id}.jsonl"
+    path.write_text(
+        "".join(message(c, journal_id).model_dump_json() + "\n" for c in contents)
+    )
+    return str(path)
+
+
+def test_clearing_a_journal_keeps_other_turns(wal_dir, service):
+    async def scenario():
+        await service.journal_messages(CONVERSATION_ID, "j1", [message("a", "j1")])
+        await service.journal_messages(CONVERSATION_ID, "j2", [message("b", "j2")])
+        await service.clear_journal(CONVERSATION_ID, "j1")
+
+    asyncio.run(scenario())
+
+    assert os.listdir(wal_dir) == [f"{CONVERSATION_ID}.{os.getpid()}.j2.jsonl"]
+
+
+def test_replay_stores_journals_of_dead_workers_only(wal_dir, service):
+    write_journal(wal_dir, dead_pid(), "dead", "a", "b")
+    live = write_journal(wal_dir, os.getppid(), "live", "c")
+
+    assert asyncio.run(service.replay_journal()) == 2
+
+    assert stored(service) == ["a", "b"]
+    assert os.listdir(wal_dir) == [os.path.basename(live)]
+
+
+def test_replay_skips_a_journal_that_was_already_stored(wal_dir, service):
+    # The worker stored the messages but died before removing the journal
+    asyncio.run(service.store_messages(CONVERSATION_ID, [message("a", "j1")]))
+    write_journal(wal_dir, dead_pid(), "j1", "a")
+
+    asyncio.run(service.replay_journal())
+
+    assert stored(service) == ["a"]
+    assert os.listdir(wal_dir) == []
+
+
+def test_failed_replay_keeps_the_journal_claimed(wal_dir, service):
+    write_journal(wal_dir, dead_pid(), "j1", "a")
+    service.conversations_collection.fail = True
+
+    assert asyncio.run(service.replay_journal()) == 0
+
+    # Renamed to this worker, so workers starting meanwhile leave it alone
+    assert os.listdir(wal_dir) == [f"{CONVERSATION_ID}.{os.getpid()}.j1.jsonl"]
+    service.conversations_collection.fail = False
+    assert asyncio.run(service.replay_journal()) == 1
+    assert stored(service) == ["a"]
+
+
+def test_a_journal_claimed_by_another_worker_is_skipped(wal_dir, service, monkeypatch):
+    write_journal(wal_dir, dead_pid(), "j1", "a")
+
+    def claimed_elsewhere(source, destination):
+        raise FileNotFoundError(source)
+
+    monkeypatch.setattr(conversation.os, "rename", claimed_elsewhere)
+
+    assert asyncio.run(service.replay_journal()) == 0
+    assert stored(service) == []
@@ -0,0 +1,41 @@
+import time
+import pytest
+from app.services.deadline import (
+    DeadlineExceeded,
+    bounded_timeout,
+    deadline_scope,
+    deadline_var,
+    remaining,
+)
+
+
+def test_without_a_deadline_timeouts_are_unchanged():
+    assert remaining() is None
+    assert bounded_timeout(5) == 5
+    assert bounded_timeout(None) is None
+
+
+def test_timeouts_are_cut_to_the_time_left():
+    deadline = time.monotonic() + 2
+
+    assert bounded_timeout(10, deadline) == pytest.approx(2, abs=0.1)
+    assert bounded_timeout(1, deadline) == 1
+    assert bounded_timeout(None, deadline) == pytest.approx(2, abs=0.1)
+
+
+def test_passed_deadline_raises_a_timeout_error():
+    with pytest.raises(TimeoutError):
+        bounded_timeout(5, time.monotonic() - 1)
+    assert issubclass(DeadlineExceeded, TimeoutError)
+
+
+def test_scope_sets_and_restores_the_current_deadline():
+    deadline = time.monotonic() + 2
+
+    with deadline_scope(deadline):
+        assert deadline_var.get() == deadline
+        assert remaining() == pytest.approx(2, abs=0.1)
+        assert bounded_timeout(10) == pytest.approx(2, abs=0.1)
+        with deadline_scope(None):
+            assert remaining() is None
+    assert deadline_var.get() is None
@@ -0,0 +1,172 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+from app.models.knowledge_base import ApiDoc
+from app.services import knowledge_base
+from app.services.knowledge_base import bulk_insert_api_docs, content_hash
+
+MODEL = "test-embedding-model"
+
+
+class FakeApiDocs:
+    """
+    Just enough of the API doc collection for bulk_insert_api_docs, plus what
+    the patched helpers were called with.
+    """
+
+    def __init__(self) -> None:
+        self.documents = {}
+        self.rejected = set()
+        self.unreachable = False
+        self.embedded, self.invalidated, self.bumps = [], [], []
+
+    def find(self, query, projection=None):
+        if self.unreachable:
+            raise ServerSelectionTimeoutError("MongoDB is unreachable")
+        names = set(query["name"]["$in"])
+        matches = [d for d in self.documents.values() if d["name"] in names]
+
+        async def cursor():
+            for document in matches:
+                yield document
+
+        return cursor()
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        for i, document in enumerate(documents):
+            if document["name"] in self.rejected:
+                errors.append({"index": i, "errmsg": "document too large"})
+            else:
+                self.documents[document["_id"]] = document
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            self.documents[operation._filter["_id"]] = operation._doc
+
+
+def doc(name: str, description: str = "Searches people") -> ApiDoc:
+    return ApiDoc(name=name, description=description, response={"ok": True})
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeApiDocs()
+
+    async def get_active_model():
+        return MODEL
+
+    async def embed_api_docs(api_docs, model):
+        collection.embedded.extend(api_doc.name for api_doc in api_docs)
+        return [
+            (
+                ValueError("rate limited")
+                if api_doc.name == "unembeddable"
+                else [[1.0, 0.0]] * len(knowledge_base.embedding_texts(api_doc))
+            )
+            for api_doc in api_docs
+        ]
+
+    async def bump_kb_version():
+        collection.bumps.append(True)
+        return len(collection.bumps)
+
+    monkeypatch.setattr(knowledge_base, "api_doc_collection", collection)
+    monkeypatch.setattr(knowledge_base, "get_active_model", get_active_model)
+    monkeypatch.setattr(knowledge_base, "embed_api_docs", embed_api_docs)
+    monkeypatch.setattr(knowledge_base, "bump_kb_version", bump_kb_version)
+    monkeypatch.setattr(
+        knowledge_base.answer_cache, "invalidate_docs", collection.invalidated.extend
+    )
+    # This process has no index loaded, so only MongoDB is written
+    monkeypatch.setattr(knowledge_base.index_state, "model", None)
+    monkeypatch.setattr(knowledge_base.index_state, "version", None)
+    return collection
+
+
+def stored(collection: FakeApiDocs, name: str) -> dict:
+    return next(d for d in collection.documents.values() if d["name"] == name)
+
+
+def test_new_docs_are_inserted_and_changed_ones_replaced(collection):
+    unchanged, changed = doc("unchanged"), doc("changed")
+    unchanged_id, changed_id = ObjectId(), ObjectId()
+    collection.documents = {
+        unchanged_id: {
+            "_id": unchanged_id,
+            "name": "unchanged",
+            "content_hash": content_hash(unchanged, MODEL),
+        },
+        changed_id: {
+            "_id": changed_id,
+            "name": "changed",
+            "content_hash": content_hash(doc("changed", "Old text"), MODEL),
+        },
+    }
+
+    result = asyncio.run(bulk_insert_api_docs([unchanged, changed, doc("new")]))
+
+    assert {k: result[k] for k in ("inserted", "updated", "unchanged", "failed")} == {
+        "inserted": 1,
+        "updated": 1,
+        "unchanged": 1,
+        "failed": 0,
+    }
+    assert [item["status"] for item in result["items"]] == [
+        "unchanged",
+        "updated",
+        "inserted",
+    ]
+    # Only changed content is embedded, and replacements keep their id
+    assert collection.embedded == ["changed", "new"]
+    assert stored(collection, "changed")["_id"] == changed_id
+    assert stored(collection, "changed")["description"] == "Searches people"
+    assert stored(collection, "new")["content_hash"] == content_hash(doc("new"), MODEL)
+    assert collection.bumps == [True]
+    assert sorted(collection.invalidated) == ["changed", "new"]
+
+
+def test_failures_are_reported_per_document(collection):
+    collection.rejected = {"too-large"}
+    docs = [
+        doc("dup", "First copy"),
+        doc("unembeddable"),
+        doc("too-large"),
+        doc("ok"),
+        doc("dup", "Second copy"),
+    ]
+
+    result = asyncio.run(bulk_insert_api_docs(docs))
+
+    items = result["items"]
+    assert [item["status"] for item in items] == [
+        "failed",
+        "failed",
+        "failed",
+        "inserted",
+        "inserted",
+    ]
+    assert items[0]["error"] == "superseded by a later document with the same name"
+    assert items[1]["error"] == "Failed to generate vector: rate limited"
+    assert items[2]["error"] == "document too large"
+    assert result["inserted"] == 2 and result["failed"] == 3
+    assert stored(collection, "dup")["description"] == "Second copy"
+    assert sorted(d["name"] for d in collection.documents.values()) == ["dup", "ok"]
+
+
+def test_nothing_written_leaves_the_version_alone(collection):
+    result = asyncio.run(bulk_insert_api_docs([doc("unembeddable")]))
+
+    assert result["failed"] == 1
+    assert collection.bumps == [] and collection.invalidated == []
+
+
+def test_unreachable_database_is_reported(collection):
+    collection.unreachable = True
+
+    assert asyncio.run(bulk_insert_api_docs([doc("a")])) == {
+        "error": "MongoDB is unreachable"
+    }
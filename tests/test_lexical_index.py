@@ -0,0 +1,70 @@
+from app.services.lexical_index import (
+    LexicalIndex,
+    document_text,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    assert tokenize("Find LinkedIn_URL, headcount!") == [
+        "find",
+        "linkedin_url",
+        "linkedin",
+        "url",
+        "headcount",
+    ]
+
+
+def test_document_text_includes_nested_payload_keys():
+    text = document_text(
+        {
+            "name": "people",
+            "description": "Search people",
+            "data": {"filters": [{"title": "CEO"}]},
+            "response": [{"linkedin_url": "u"}],
+        }
+    )
+
+    assert text.split() == [
+        "people",
+        "Search",
+        "people",
+        "filters",
+        "title",
+        "linkedin_url",
+    ]
+
+
+def test_bm25_prefers_rare_terms():
+    index = LexicalIndex()
+    index.add("a", "company search headcount")
+    index.add("b", "company search")
+    index.add("c", "company enrichment")
+
+    hits = index.search("company headcount", 3)
+
+    assert hits[0][0] == "a"
+    assert {doc_id for doc_id, _ in hits} == {"a", "b", "c"}
+
+
+def test_add_replaces_and_remove_forgets_documents():
+    index = LexicalIndex()
+    index.add("a", "people search")
+    index.add("a", "company search")
+
+    assert index.search("people", 5) == []
+    assert index.remove(["a", "missing"]) == 1
+    assert len(index) == 0
+    assert index.search("company", 5) == []
+
+
+def test_rrf_rewards_ids_ranked_by_both_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "b", "d"]], k=60)
+
+    # c: 1/63 + 1/61 beats b: 2/62, and both beat ids found by one list only
+    assert fused == ["c", "b", "a", "d"]
+
+
+def test_rrf_of_a_single_ranking_keeps_its_order():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
@@ -0,0 +1,84 @@
+import asyncio
+import numpy as np
+import pytest
+from app.services.mmap_index import (
+    mapped_meta,
+    open_shared_index,
+    publish_shared_index,
+)
+from app.services.vector_index import VectorIndex, create_index
+
+
+def build(backend: str, count: int = 200) -> VectorIndex:
+    vectors = np.random.default_rng(0).normal(size=(count, 16))
+    index = create_index(backend, nlist=4, nprobe=2)
+    index.build([f"doc{i}" for i in range(count)], vectors)
+    return index
+
+
+def is_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+@pytest.mark.parametrize("backend", ["exact", "ivf"])
+def test_mapped_round_trip_searches_the_same(tmp_path, backend):
+    index = build(backend)
+    path = str(tmp_path / "index.idx")
+
+    index.save_mapped(path, version=3, model="m")
+    mapped, meta = VectorIndex.open_mapped(path, nlist=4, nprobe=2)
+
+    assert meta == {"version": 3, "model": "m"}
+    assert is_mapped(mapped.matrix)
+    assert not mapped.matrix.flags.writeable
+    query = np.random.default_rng(1).normal(size=16)
+    assert mapped.search(query, 5) == index.search(query, 5)
+
+
+def test_changes_to_a_mapped_index_stay_private(tmp_path):
+    path = str(tmp_path / "index.idx")
+    build("exact").save_mapped(path, version=1, model="m")
+    mapped, _ = VectorIndex.open_mapped(path)
+    query = np.ones(16)
+
+    mapped.add("new", query)
+    mapped.remove({"doc0"})
+
+    assert mapped.search(query, 1)[0][0] == "new"
+    reopened, _ = VectorIndex.open_mapped(path)
+    assert len(reopened) == 200
+
+
+def test_empty_index_round_trip(tmp_path):
+    path = str(tmp_path / "index.idx")
+    create_index("exact").save_mapped(path, version=0, model="m")
+
+    mapped, _ = VectorIndex.open_mapped(path)
+
+    assert len(mapped) == 0 and mapped.search([1.0, 0.0], 3) == []
+
+
+def test_shared_index_is_only_opened_for_its_version_and_model(tmp_path):
+    path = str(tmp_path / "index.idx")
+    assert open_shared_index(path, 1, "m") is None
+
+    build("exact").save_mapped(path, version=1, model="m")
+
+    assert open_shared_index(path, 1, "m") is not None
+    assert open_shared_index(path, 2, "m") is None
+    assert open_shared_index(path, 1, "other") is None
+
+
+def test_publish_never_replaces_a_newer_version(tmp_path):
+    path = str(tmp_path / "index.idx")
+    index = build("exact")
+
+    assert asyncio.run(publish_shared_index(path, index, 2, "m"))
+    assert not asyncio.run(publish_shared_index(path, index, 1, "m"))
+    assert not asyncio.run(publish_shared_index(path, index, 2, "m"))
+    assert mapped_meta(path) == {"version": 2, "model": "m"}
+    assert asyncio.run(publish_shared_index(path, index, 3, "m"))
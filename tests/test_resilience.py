@@ -0,0 +1,114 @@
+import asyncio
+import httpx
+import pytest
+from openai import APIConnectionError
+from app.services import resilience
+from app.services.resilience import CircuitBreaker, HedgeBudget, ResilientOpenAI
+
+
+def connection_error() -> APIConnectionError:
+    return APIConnectionError(request=httpx.Request("POST", "http://test"))
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    # Each endpoint's "client" is just its name
+    monkeypatch.setattr(resilience, "get_openai_clients", lambda: ["a", "b"])
+    return ResilientOpenAI(["http://a/v1", "http://b/v1"])
+
+
+def test_breaker_opens_after_consecutive_failures_and_half_opens():
+    breaker = CircuitBreaker("test", failures=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.available()
+
+    breaker.opened_at -= 30
+    assert breaker.available() and breaker.state == "half_open"
+    # One trial per reset period
+    assert not breaker.available()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    breaker.opened_at -= 30
+    breaker.available()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.available()
+
+
+def test_hedge_budget_earns_a_fraction_per_request():
+    budget = HedgeBudget(ratio=0.5, burst=1)
+    assert budget.spend()
+    assert not budget.spend()
+
+    budget.earn()
+    assert not budget.spend()
+    budget.earn()
+    assert budget.spend()
+
+
+def test_call_fails_over_to_the_next_endpoint(endpoints):
+    async def request(client):
+        if client == "a":
+            raise connection_error()
+        return client
+
+    assert asyncio.run(endpoints.call("chat", request)) == "b"
+    assert endpoints.endpoints[0].breaker.consecutive_failures == 1
+
+
+def test_non_retryable_errors_are_not_failed_over(endpoints):
+    tried = []
+
+    async def request(client):
+        tried.append(client)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(endpoints.call("chat", request))
+    assert tried == ["a"]
+
+
+def test_open_circuits_are_skipped(endpoints):
+    for _ in range(resilience.OPENAI_BREAKER_FAILURES):
+        endpoints.endpoints[0].breaker.record_failure()
+
+    async def request(client):
+        return client
+
+    assert asyncio.run(endpoints.call("chat", request)) == "b"
+
+
+def test_slow_request_is_hedged_and_the_loser_cancelled(endpoints, monkeypatch):
+    monkeypatch.setattr(resilience, "OPENAI_HEDGE_OPERATIONS", {"chat"})
+    monkeypatch.setattr(resilience, "OPENAI_HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    cancelled = []
+
+    async def request(client):
+        try:
+            await asyncio.sleep(1 if client == "a" else 0)
+        except asyncio.CancelledError:
+            cancelled.append(client)
+            raise
+        return client
+
+    assert asyncio.run(endpoints.call("chat", request)) == "b"
+    assert cancelled == ["a"]
+
+
+def test_hedge_delay_follows_the_latency_percentile(endpoints, monkeypatch):
+    monkeypatch.setattr(resilience, "OPENAI_HEDGE_MIN_SAMPLES", 10)
+    assert (
+        endpoints.hedge_delay("chat") == resilience.OPENAI_HEDGE_DEFAULT_DELAY_SECONDS
+    )
+
+    for i in range(100):
+        endpoints.record_latency("chat", i / 100)
+
+    assert endpoints.hedge_delay("chat") == pytest.approx(
+        0.99 * resilience.OPENAI_HEDGE_PERCENTILE / 100, abs=0.01
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from app.services.deadline import deadline_var
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_key_is_forgotten_once_the_work_finishes():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        flight = SingleFlight("test")
+        return [await flight.do("key", work), await flight.do("key", work)]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_joined_callers_get_the_same_exception():
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flight = SingleFlight("test")
+        return await asyncio.gather(
+            flight.do("key", work), flight.do("key", work), return_exceptions=True
+        )
+
+    first, second = asyncio.run(scenario())
+
+    assert isinstance(first, RuntimeError) and first is second
+
+
+def test_cancelled_caller_does_not_cancel_the_work_for_others():
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "result"
+
+    async def scenario():
+        flight = SingleFlight("test")
+        leader = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "result"
+    assert finished == [1]
+
+
+def test_work_runs_without_the_leaders_deadline():
+    async def work():
+        return deadline_var.get()
+
+    async def scenario():
+        deadline_var.set(123.0)
+        result = await SingleFlight("test").do("key", work)
+        return result, deadline_var.get()
+
+    assert asyncio.run(scenario()) == (None, 123.0)
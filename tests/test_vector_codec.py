@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from bson import BSON
+from bson.binary import Binary
+from app.services.vector_codec import (
+    VECTOR_FORMATS,
+    decode_vector,
+    encode_vector,
+    vector_format,
+)
+
+VECTOR = np.random.default_rng(0).normal(size=64).astype(np.float32)
+
+
+@pytest.mark.parametrize("fmt", VECTOR_FORMATS)
+def test_format_is_detected(fmt):
+    assert vector_format(encode_vector(VECTOR, fmt)) == fmt
+
+
+@pytest.mark.parametrize("fmt", ["list", "float32"])
+def test_lossless_formats_round_trip(fmt):
+    np.testing.assert_array_equal(decode_vector(encode_vector(VECTOR, fmt)), VECTOR)
+
+
+def test_int8_error_is_within_half_a_step():
+    encoded = encode_vector(VECTOR, "int8")
+    step = np.abs(VECTOR).max() / 127
+
+    assert len(encoded) == 4 + len(VECTOR)
+    assert np.abs(decode_vector(encoded) - VECTOR).max() <= step / 2 + 1e-6
+
+
+def test_int8_zero_vector_decodes_to_zeros():
+    np.testing.assert_array_equal(
+        decode_vector(encode_vector([0.0, 0.0], "int8")), [0.0, 0.0]
+    )
+
+
+@pytest.mark.parametrize("fmt", VECTOR_FORMATS)
+def test_vectors_survive_bson_encoding(fmt):
+    stored = BSON.encode({"vector": encode_vector(VECTOR, fmt)}).decode()["vector"]
+
+    np.testing.assert_allclose(
+        decode_vector(stored), decode_vector(encode_vector(VECTOR, fmt))
+    )
+
+
+def test_unknown_format_and_subtype_are_rejected():
+    with pytest.raises(ValueError):
+        encode_vector(VECTOR, "float16")
+    with pytest.raises(ValueError):
+        decode_vector(Binary(b"\x00" * 8, 0x90))
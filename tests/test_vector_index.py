@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from app.services.vector_index import ExactIndex, IVFIndex, VectorIndex, create_index
+
+
+def random_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def test_exact_search_ranks_by_cosine_similarity():
+    index = create_index("exact")
+    index.build(["a", "b", "c"], [[1, 0], [1, 1], [0, 1]])
+
+    hits = index.search([2, 0], 3)
+
+    assert [doc_id for doc_id, _ in hits] == ["a", "b", "c"]
+    assert hits[0][1] == pytest.approx(1.0)
+    assert hits[1][1] == pytest.approx(np.sqrt(0.5))
+
+
+def test_add_and_remove_keep_ids_and_rows_aligned():
+    index = ExactIndex()
+    for doc_id, vector in [("a", [1, 0]), ("b", [0, 1]), ("a", [1, 1])]:
+        index.add(doc_id, vector)
+
+    assert index.remove({"a"}) == 2
+    assert len(index) == 1
+    assert index.search([0, 1], 5) == [("b", pytest.approx(1.0))]
+
+
+def test_dimension_mismatch_is_rejected():
+    index = create_index("exact")
+    index.build(["a"], [[1, 0, 0]])
+
+    with pytest.raises(ValueError):
+        index.add("b", [1, 0])
+    with pytest.raises(ValueError):
+        index.search([1, 0], 1)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown vector index backend"):
+        create_index("hnsw")
+
+
+def test_ivf_with_every_bucket_probed_matches_exact():
+    vectors = random_vectors(400)
+    ids = [f"doc{i}" for i in range(len(vectors))]
+    exact, ivf = ExactIndex(), IVFIndex(nlist=8, nprobe=8)
+    exact.build(ids, vectors)
+    ivf.build(ids, vectors)
+    assert ivf.centroids is not None
+
+    for query in random_vectors(5, seed=1):
+        assert [i for i, _ in ivf.search(query, 10)] == [
+            i for i, _ in exact.search(query, 10)
+        ]
+
+
+def test_ivf_finds_vectors_added_after_training():
+    index = IVFIndex(nlist=8, nprobe=1)
+    index.build([f"doc{i}" for i in range(400)], random_vectors(400))
+    query = random_vectors(1, seed=2)[0]
+
+    index.add("new", query)
+
+    assert index.search(query, 1)[0][0] == "new"
+
+
+def test_ivf_adds_survive_removal_and_snapshot(tmp_path):
+    index = IVFIndex(nlist=8, nprobe=1)
+    index.build([f"doc{i}" for i in range(400)], random_vectors(400))
+    added = random_vectors(50, seed=4)
+    for i, vector in enumerate(added):
+        index.add(f"new{i}", vector)
+    index.remove({"doc0", "new0"})
+    path = str(tmp_path / "index.npz")
+
+    index.save(path)
+    loaded, _ = VectorIndex.load(path, nprobe=1)
+
+    assert len(loaded.assignments) == len(loaded) == 448
+    for i in range(1, len(added)):
+        assert loaded.search(added[i], 1)[0][0] == f"new{i}"
+
+
+def test_small_ivf_index_is_scanned_exhaustively():
+    index = IVFIndex(nlist=8)
+    index.build(["a", "b"], [[1, 0], [0, 1]])
+
+    assert index.centroids is None
+    assert index.search([0, 1], 1)[0][0] == "b"
+
+
+@pytest.mark.parametrize("backend", ["exact", "ivf"])
+def test_snapshot_round_trip(tmp_path, backend):
+    vectors = random_vectors(200)
+    index = create_index(backend, nlist=4, nprobe=2)
+    index.build([f"doc{i}" for i in range(len(vectors))], vectors)
+    path = str(tmp_path / "index.npz")
+
+    index.save(path, version=7, model="m")
+    loaded, meta = VectorIndex.load(path, nlist=4, nprobe=2)
+
+    assert meta == {"version": 7, "model": "m"}
+    assert loaded.backend == backend
+    query = random_vectors(1, seed=3)[0]
+    assert loaded.search(query, 5) == index.search(query, 5)